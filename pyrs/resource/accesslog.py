@@ -0,0 +1,163 @@
+"""
+Structured access log of the application.
+
+When :py:data:`.conf.access_log` is enabled the :py:meth:`.base.App.dispatch`
+puts a record of every request (`time`, `method`, `path`, `endpoint`,
+`status`, `latency`, phase `timings`, `request_size` and `response_size`)
+into a bounded queue. The records are written in batches by a background
+thread, so the (possibly slow) log handlers never block the requests. When
+the queue is full the records are dropped (and counted).
+
+By default every record is logged as a JSON document on `INFO` level by the
+`pyrs.resource.accesslog.AccessLog` logger, a custom `writer` gets the
+batches (list of records).
+"""
+import json
+import threading
+import time
+
+import six
+from six.moves import queue
+
+from . import lib
+from . import response
+
+_stop = object()
+_SIZED_TYPES = (six.text_type, six.binary_type) + response.RAW_TYPES
+
+
+class AccessLog(object):
+    """
+    :param writer: Callable gets the list of records, `None` logs them
+    :param int batch_size: Maximum number of records written at once
+    :param float interval: Maximum delay of the records (seconds)
+    :param int queue_size: Maximum number of waiting records
+    """
+
+    def __init__(self, writer=None, batch_size=100, interval=1.0,
+                 queue_size=10000):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.interval = interval
+        #: Number of the records dropped because the queue was full
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['access_log_writer'],
+            batch_size=config['access_log_batch_size'],
+            interval=config['access_log_interval'],
+            queue_size=config['access_log_queue_size'],
+        )
+
+    def log(self, trace, path, method, request_size=None,
+            response_size=None):
+        """
+        Queue the record of the request, gives back `False` if it's dropped
+        (never blocks)
+        """
+        record = {
+            'time': time.time() - trace.elapsed,
+            'method': method,
+            'path': path,
+            'endpoint': trace.endpoint,
+            'status': trace.status,
+            'latency': trace.elapsed,
+            'timings': dict(trace.timings),
+            'request_size': request_size,
+            'response_size': response_size,
+        }
+        return self.put(record)
+
+    def put(self, record):
+        """
+        Queue the record, gives back `False` if it's dropped (never blocks)
+        """
+        self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def write(self, records):
+        if self.writer is not None:
+            self.writer(records)
+            return
+        logger = lib.get_logger(self)
+        for record in records:
+            logger.info(json.dumps(record, default=repr))
+
+    def close(self):
+        """
+        Stop the writer after the queued records are written
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_stop)
+            thread.join()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _work(self):
+        running = True
+        while running:
+            batch = []
+            record = self._queue.get()
+            deadline = lib.timer() + self.interval
+            while record is not _stop:
+                batch.append(record)
+                remaining = deadline - lib.timer()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            running = record is not _stop
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            self.write(batch)
+        except Exception:
+            lib.get_logger(self).exception(
+                "Writing of %s records failed", len(batch)
+            )
+
+
+def get_size(value):
+    """
+    Gives back the size of the encoded or raw body, `None` if it's unknown
+    """
+    if isinstance(value, _SIZED_TYPES):
+        return len(value)
+    return None
+
+
+def get_request_size(body, headers):
+    """
+    Gives back the `Content-Length` of the request or the size of the body
+    """
+    length = lib.get_header(headers, 'Content-Length')
+    if length is not None:
+        try:
+            return int(length)
+        except ValueError:
+            pass
+    return get_size(body)
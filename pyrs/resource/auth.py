@@ -0,0 +1,172 @@
+"""
+Bearer token authentication.
+
+.. code:: python
+
+    app = App(hooks=[auth.BearerAuth(auth.HMACVerifier(b'secret'))])
+
+The :py:class:`BearerAuth` hook takes the token from the
+`Authorization: Bearer <token>` header, verifies it and sets the claims as
+:py:attr:`.request.Request.auth` (can be injected by the `inject_auth`
+option). Invalid tokens are answered by :py:class:`.errors.Unauthorized`
+(401), as well as the missing token when the endpoint has the
+`auth_required` option (or the hook is created with `required=True`).
+
+The verified claims are cached (keyed by the hash of the token, for
+`cache_ttl` seconds but not longer than the `exp` claim), so the repeated
+requests skip the signature check.
+
+The verifier can be anything having `verify(token)` method which gives back
+the claims or raises :py:class:`InvalidToken`.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import six
+
+from . import errors
+from . import hooks
+from . import lib
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class HMACVerifier(object):
+    """
+    Verifies the HMAC signed (JWT `HS256`, `HS384`, `HS512`) tokens.
+
+    :param bytes secret: The shared secret
+    :param str algorithm: Accepted algorithm
+    :param float leeway: Allowed clock skew of the `exp` and `nbf` claims
+    """
+
+    algorithms = {
+        'HS256': hashlib.sha256,
+        'HS384': hashlib.sha384,
+        'HS512': hashlib.sha512,
+    }
+
+    def __init__(self, secret, algorithm='HS256', leeway=0):
+        if algorithm not in self.algorithms:
+            raise ValueError("Unsupported algorithm: %s" % algorithm)
+        if isinstance(secret, six.text_type):
+            secret = secret.encode('utf-8')
+        self.secret = secret
+        self.algorithm = algorithm
+        self.leeway = leeway
+
+    def sign(self, claims):
+        """
+        Gives back the signed token of the claims
+        """
+        header = _b64encode(lib.dumps(
+            {'alg': self.algorithm, 'typ': 'JWT'}
+        ).encode('utf-8'))
+        payload = _b64encode(lib.dumps(claims).encode('utf-8'))
+        signing_input = header + b'.' + payload
+        return (
+            signing_input + b'.' + _b64encode(self._digest(signing_input))
+        ).decode('ascii')
+
+    def verify(self, token):
+        """
+        Gives back the claims of the token, raises :py:class:`InvalidToken`
+        """
+        if isinstance(token, six.text_type):
+            token = token.encode('ascii', 'replace')
+        try:
+            signing_input, signature = token.rsplit(b'.', 1)
+            header, payload = signing_input.split(b'.')
+            header = json.loads(_b64decode(header).decode('utf-8'))
+            signature = _b64decode(signature)
+        except (ValueError, TypeError):
+            raise InvalidToken("Malformed token")
+        if not isinstance(header, dict) or \
+                header.get('alg') != self.algorithm:
+            raise InvalidToken("Unexpected algorithm")
+        if not hmac.compare_digest(self._digest(signing_input), signature):
+            raise InvalidToken("Invalid signature")
+        try:
+            claims = json.loads(_b64decode(payload).decode('utf-8'))
+        except (ValueError, TypeError):
+            raise InvalidToken("Malformed claims")
+        if not isinstance(claims, dict):
+            raise InvalidToken("Malformed claims")
+        now = time.time()
+        if 'exp' in claims and claims['exp'] + self.leeway <= now:
+            raise InvalidToken("Token expired")
+        if 'nbf' in claims and claims['nbf'] - self.leeway > now:
+            raise InvalidToken("Token not yet valid")
+        return claims
+
+    def _digest(self, data):
+        return hmac.new(
+            self.secret, data, self.algorithms[self.algorithm]
+        ).digest()
+
+
+class BearerAuth(hooks.Hook):
+    """
+    Authentication hook of the bearer tokens.
+
+    :param verifier: Verifier of the tokens (eg. :py:class:`HMACVerifier`)
+    :param bool required: Default of the `auth_required` endpoint option
+    :param int cache_size: Maximum number of cached claims
+    :param float cache_ttl: Time to live of the cached claims in seconds
+    """
+
+    def __init__(self, verifier, required=False, cache_size=1024,
+                 cache_ttl=300):
+        self.verifier = verifier
+        self.required = required
+        self.cache = lib.LRU(cache_size, ttl=cache_ttl)
+
+    def request(self, request):
+        token = self.get_token(request)
+        if token is None:
+            if request.opts.get('auth_required', self.required):
+                raise errors.Unauthorized("Authentication required")
+            return
+        request.auth = self.verify(token)
+
+    def get_token(self, request):
+        """
+        Gives back the bearer token of the request or `None`
+        """
+        header = lib.get_header(request.headers, 'Authorization')
+        if not header:
+            return None
+        scheme, unused, token = header.partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            raise errors.Unauthorized("Bearer token expected")
+        return token.strip()
+
+    def verify(self, token):
+        """
+        Gives back the (cached) claims of the token
+        """
+        key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        claims = self.cache.get(key)
+        if claims is not None:
+            if 'exp' not in claims or claims['exp'] > time.time():
+                return claims
+            self.cache.pop(key)
+        try:
+            claims = self.verifier.verify(token)
+        except InvalidToken as ex:
+            raise errors.Unauthorized(str(ex), cause=ex)
+        self.cache.set(key, claims)
+        return claims
@@ -1,10 +1,28 @@
+import hashlib
 import inspect
+import json
+import threading
 
 import werkzeug
+import werkzeug.exceptions
 
+from . import accesslog
+from . import batch
+from . import cache
+from . import client
+from . import deadline
+from . import idempotency
 from . import lib
+from . import openapi
+from . import pagination
+from . import profiler
+from . import replay
 from . import request
 from . import response
+from . import routing
+from . import sessions
+from . import store
+from . import tasks
 from . import errors
 
 
@@ -12,29 +30,98 @@ class App(object):
     """
     Resource application, provide routing and execution
 
-    :param list hooks: List of hook classes (check :py:mod:`.hooks`)
+    :param list hooks: List of hook classes or instances
+                       (check :py:mod:`.hooks`)
     :param list resources: Expected items `(path, resource class, [namespace])`
+    :param dict exception_map: Mapping of exception types (updated
+                               :py:attr:`exception_map`)
     :param config: optional configuration values (updated :py:mod:`.conf`)
     """
     hooks = []
 
+    #: Mapping of exception types to :py:class:`.errors.Error` classes (or
+    #: any callable gives back the error, `None` disables the inherited
+    #: mapping), check :py:meth:`transform_exception`. The mappings of the
+    #: base classes are **merged**, then **updated** by
+    #: App(exception_map={})
+    exception_map = {
+        pagination.InvalidCursor: errors.BadRequest,
+    }
+
     #: List of rules, will be **extended** by App(resources=[])
     #: Tuple should be presented: ('path', Resource, [namespace])
     resources = []
 
-    def __init__(self, hooks=None, resources=None, **config):
+    def __init__(
+        self, hooks=None, resources=None, exception_map=None, **config
+    ):
         #: Store the configuration (copied from :py:mod:`.conf`)
         self.config = lib.get_config(getattr(self, 'config', {}))
         self.functions = {}
+        #: Response builders of the endpoints (check
+        #: :py:class:`.response.Builder`)
+        self.builders = {}
+        #: Endpoints of mounted applications: `{name: (app, endpoint)}`
+        self.mounts = {}
         if hooks is not None:
             self.hooks = hooks
+        self.exception_map = {}
+        for cls in reversed(inspect.getmro(type(self))):
+            self.exception_map.update(vars(cls).get('exception_map') or {})
+        self.exception_map.update(exception_map or {})
+        self._exception_targets = {}
         self.config.update(config)
-        self.rules = werkzeug.routing.Map()
+        self._routing_lock = threading.Lock()
+        #: Incremented when the routing changes
+        self.routing_version = 0
+        #: Any request dispatched already, check :py:meth:`add_rule`
+        self.dispatched = False
+        self.set_rules(werkzeug.routing.Map(
+            host_matching=self['host_matching']
+        ))
         for resource in self.resources:
             self.add(*resource)
         for resource in resources or ():
             self.add(*resource)
-        self.adapter = self.rules.bind(self['host'])
+        self.openapi = openapi.OpenAPI(
+            self, self['openapi_title'], self['openapi_version']
+        )
+        if self['openapi_path']:
+            self.add(self['openapi_path'], openapi.spec)
+        if self['batch_path']:
+            self.add(self['batch_path'], batch.dispatch)
+        self.profiler = None
+        if self['profile']:
+            self.profiler = profiler.Profiler.from_config(self)
+        self.recorder = None
+        if self['record']:
+            self.recorder = replay.Recorder.from_config(self)
+        self.access_log = None
+        if self['access_log']:
+            self.access_log = accesslog.AccessLog.from_config(self)
+        self.idempotency = idempotency.Idempotency(
+            self['idempotency_store'] or store.MemoryStore(
+                self['idempotency_store_size'], ttl=self['idempotency_ttl']
+            )
+        )
+        self.cache = self['cache_backend'] or cache.MemoryCache(
+            self['cache_size']
+        )
+        #: Already built responses of the static errors (check
+        #: :py:class:`.errors.ErrorResponse`)
+        self.error_cache = lib.LRU(self['error_cache_size'])
+        self.session_store = self['session_store']
+        if self.session_store is not None and self['session_local_size']:
+            self.session_store = store.TieredStore(
+                self.session_store, self['session_local_size'],
+                ttl=self['session_local_ttl']
+            )
+        self.task_pool = tasks.TaskPool(
+            self['task_workers'], self['task_queue_size']
+        )
+        self._executor = None
+        self._process_executor = None
+        self._executor_lock = threading.Lock()
         self.setup_hooks()
 
     def __getitem__(self, name):
@@ -42,32 +129,292 @@ class App(object):
 
     def dispatch(
         self, path_info, method, query=None, body=None, headers=None,
-        cookies=None, session=None
+        cookies=None, session=None, local=False
+    ):
+        """
+        Dispatch the request, gives back the `(content, status, headers)`.
+        The `local` requests (check :py:meth:`client`) get back the JSON
+        compatible value of the content (not encoded) and the exceptions
+        (transformed the same way, check :py:meth:`handle_exception`) are
+        raised instead of the error responses.
+        """
+        trace = lib.Trace()
+        args = (
+            trace, path_info, method, query, body, headers, cookies, session,
+            local
+        )
+        result = None
+        try:
+            if self.profiler is not None:
+                result = self.profiler.run(trace, {
+                    'path': path_info,
+                    'method': method,
+                    'query': query,
+                    'headers': headers,
+                }, self._dispatch, *args)
+            else:
+                result = self._dispatch(*args)
+            return result
+        finally:
+            # The raised (local) requests are recorded and logged as well
+            if self.recorder is not None:
+                self.recorder.record(
+                    trace, path_info, method, query, body, headers
+                )
+            if self.access_log is not None:
+                self.access_log.log(
+                    trace, path_info, method,
+                    accesslog.get_request_size(body, headers),
+                    accesslog.get_size(result[0]) if result else 0
+                )
+
+    def _dispatch(
+        self, trace, path_info, method, query, body, headers, cookies, session,
+        local=False
     ):
-        opts = None
+        if session is None and self.session_store is not None:
+            session = sessions.Session(
+                self.session_store,
+                (cookies or {}).get(self['session_cookie'])
+            )
+        try:
+            result = self._execute(
+                trace, path_info, method, query, body, headers, cookies,
+                session, local
+            )
+        except Exception as ex:
+            trace.lap('response')
+            trace.status = 500
+            if isinstance(ex, errors.Error):
+                trace.status = ex.get_status()
+            raise
+        if isinstance(session, sessions.Session) and session.save():
+            headers = dict(result[2])
+            headers['Set-Cookie'] = session.get_cookie(self['session_cookie'])
+            result = result[:2] + (headers,)
+        trace.lap('response')
+        trace.status = result[1]
+        return result
+
+    def _execute(
+        self, trace, path_info, method, query, body, headers, cookies, session,
+        local=False
+    ):
+        self.dispatched = True
+        try:
+            adapter = self.get_adapter(lib.get_header(headers, 'Host'))
+            endpoint, path = adapter.match(path_info, method)
+        except Exception as ex:
+            if local:
+                self._raise_local(ex)
+            res = self.handle_client_exceptions(ex, path_info, method)
+            return res.build()
+        trace.endpoint = endpoint
+        trace.lap('match')
+        app, endpoint = self.mounts.get(endpoint, (self, endpoint))
+        return app.execute(
+            trace, endpoint, path, path_info, method, query, body, headers,
+            cookies, session, local
+        )
+
+    def execute(
+        self, trace, endpoint, path, path_info, method, query=None, body=None,
+        headers=None, cookies=None, session=None, local=False
+    ):
+        """
+        Execute the already matched endpoint of this application
+        """
+        func = self.functions.get(endpoint)
+        if func is None:
+            # Removed since the request was matched
+            if local:
+                self._raise_local(errors.NotFound())
+            res = self.handle_client_exceptions(
+                errors.NotFound(), path_info, method
+            )
+            return res.build()
+        opts = lib.get_options(func)
         req = None
+        timeout = opts.get('timeout', self['timeout'])
+        limit = None
+        if timeout is not None:
+            limit = deadline.Deadline(timeout, trace.started)
         try:
-            endpoint, path = self.adapter.match(path_info, method)
-            func = self.functions[endpoint]
-            opts = lib.get_options(func)
+            # The authentication (and the other request hooks) should run
+            # before the cached or stored results are given back
             req = request.Request(
-                opts, self, path, query, body, headers, cookies, session
+                opts, self, path, query, body, headers, cookies=cookies,
+                session=session, deadline=limit, local=local
             )
-            kwargs = req.build()
+            content = self.run_request_hooks(req)
         except Exception as ex:
+            if local:
+                self._raise_local(ex)
             res = self.handle_client_exceptions(
                 ex, path_info, method, opts, req
             )
             return res.build()
+        args = (
+            trace, func, opts, self.builders.get(endpoint), req, content,
+            path_info, method
+        )
+        if content is not None:
+            return self._call(*args)
+        identity = self.get_identity(req)
+        ttl = opts.get('cache')
+        if ttl and method == 'GET':
+            key = cache.make_key(
+                endpoint, path, query, identity, headers, cache.get_vary(
+                    opts.get(self['option_headers_name'])
+                ), local
+            )
+            result = self.cache.get(key)
+            if result is None:
+                result = self._call(*args)
+                if 200 <= result[1] < 300 and response.is_storable(result):
+                    self.cache.set(key, response.copy_result(result), ttl)
+                return result
+            return response.copy_result(result)
+        if opts.get('idempotent'):
+            key = lib.get_header(headers, self['idempotency_header'])
+            if key:
+                try:
+                    return self.idempotency.run(
+                        idempotency.make_key(endpoint, key, identity, local),
+                        self._call, *args,
+                        fingerprint=idempotency.fingerprint(
+                            method, path, query, body
+                        )
+                    )
+                except errors.UnprocessableEntity as ex:
+                    if local:
+                        self._raise_local(ex)
+                    res = self.handle_client_exceptions(
+                        ex, path_info, method, opts, req
+                    )
+                    return res.build()
+        return self._call(*args)
 
+    def _call(
+        self, trace, func, opts, builder, req, content, path_info, method
+    ):
+        """
+        Call the endpoint with the arguments of the already created request
+        (the `content` of the request hooks is used if it's not `None`)
+        """
         try:
-            content = func(**kwargs)
-            res = response.Response(content, self, opts, req)
+            kwargs = None
+            if content is None:
+                kwargs = req.build()
+            trace.lap('request')
+        except Exception as ex:
+            if req.local:
+                self._raise_local(ex)
+            res = self.handle_client_exceptions(
+                ex, path_info, method, opts, req
+            )
             return res.build()
+
+        try:
+            if kwargs is not None:
+                executor = None
+                if opts.get('executor') == 'process':
+                    executor = self.process_executor
+                elif req.deadline is not None:
+                    executor = self.executor
+                content = deadline.call(func, kwargs, req.deadline, executor)
+            trace.lap('call')
+            res = response.Response(content, self, opts, req, builder)
+            for hook in self._hooks:
+                res = hook.response(res)
+            result = res.build()
+            if req.tasks:
+                self.task_pool.submit_all(req.tasks)
+            return result
         except Exception as ex:
             res = self.handle_exception(ex, opts, req)
         return res.build()
 
+    def get_identity(self, req):
+        """
+        Gives back the identity of the authenticated caller
+        (:py:attr:`.request.Request.auth`) as string or `None`. The cached
+        and the stored idempotent results are scoped by it. By default the
+        `sub` claim, otherwise the hash of the whole auth.
+        """
+        auth = req.auth
+        if auth is None:
+            return None
+        if isinstance(auth, dict) and auth.get('sub') is not None:
+            return 'sub:%s' % auth['sub']
+        return hashlib.sha1(json.dumps(
+            auth, sort_keys=True, default=repr
+        ).encode('utf-8')).hexdigest()
+
+    def close(self):
+        """
+        Release the resources of the application, waits for the queued
+        background tasks and access log records.
+        """
+        self.task_pool.shutdown()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._process_executor is not None:
+            self._process_executor.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.access_log is not None:
+            self.access_log.close()
+
+    @property
+    def executor(self):
+        """
+        Executor of the endpoints having deadline (created on first use),
+        check :py:class:`.deadline.Executor`
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = deadline.Executor(
+                        self['timeout_workers'], self['timeout_abandoned']
+                    )
+        return self._executor
+
+    @property
+    def process_executor(self):
+        """
+        Process pool of the CPU bound work: endpoints having
+        `executor='process'` option and the parallel bulk validation.
+        Created on first use, the workers import the modules of the
+        endpoints (and :py:data:`.conf.process_modules`) before the calls.
+        The endpoint functions, their arguments and results should be
+        picklable.
+        """
+        if self._process_executor is None:
+            with self._executor_lock:
+                if self._process_executor is None:
+                    self._process_executor = lib.ProcessPoolExecutor(
+                        self['process_workers'], self.get_modules()
+                    )
+        return self._process_executor
+
+    def client(self, **defaults):
+        """
+        Gives back a local client of the application, check :py:mod:`.client`
+        """
+        return client.LocalClient(self, **defaults)
+
+    def get_modules(self):
+        """
+        Gives back the names of the modules of the endpoints
+        """
+        modules = set(self['process_modules'])
+        for func in self.functions.values():
+            modules.add(func.__module__)
+        for app, unused in self.mounts.values():
+            modules.update(app.get_modules())
+        return sorted(modules)
+
     def add(self, path, resource, prefix=''):
         if inspect.isfunction(resource):
             self._add_function(path, resource, prefix)
@@ -76,29 +423,231 @@ class App(object):
         else:
             self._add_class(path, resource, prefix)
 
+    def mount(self, prefix, app, name=None):
+        """
+        Mount the other application under the given path prefix.
+        The rules of the mounted application are merged into the routing of
+        this application (so the request will be matched only once), but the
+        endpoints are executed by the mounted application with its own
+        config, hooks and error handling.
+        The endpoint names will be prefixed by the `name` (default is the
+        fully qualified name of the mounted application), raises
+        `ValueError` if an application is already mounted by that name.
+        The host and the subdomain patterns of the rules are matched by this
+        application, so the :py:data:`.conf.host_matching` and the
+        :py:data:`.conf.server_name` should be the same, otherwise raises
+        `ValueError`.
+        Endpoints added to the mounted application later won't be mounted.
+        """
+        if not name:
+            name = lib.get_fqname(app)
+        if any(endpoint.startswith(name + ':') for endpoint in self.mounts):
+            raise ValueError("Already mounted by this name: %s" % name)
+        for setting in ('host_matching', 'server_name'):
+            if app[setting] != self[setting]:
+                raise ValueError(
+                    "The %s of the mounted application differs: %r != %r"
+                    % (setting, app[setting], self[setting])
+                )
+        for rule in app.rules.iter_rules():
+            endpoint = name + ':' + rule.endpoint
+            self.add_rule(
+                self._make_rule(
+                    prefix+rule.rule, rule.methods, endpoint,
+                    host=rule.host, subdomain=rule.subdomain,
+                    defaults=rule.defaults,
+                    strict_slashes=rule.strict_slashes
+                )
+            )
+            self.mounts[endpoint] = app.mounts.get(
+                rule.endpoint, (app, rule.endpoint)
+            )
+
     def handle_client_exceptions(
         self, ex, path_info, method, opts=None, req=None
     ):
+        """
+        Gives back the error response of the routing and request exceptions
+        """
+        ex = self.convert_routing_exception(ex)
         ex = self.transform_exception(ex)
         res = errors.ErrorResponse(ex, self, opts, req)
         return res
 
+    def _raise_local(self, ex):
+        """
+        Raise the transformed routing or request exception of the local
+        request (instead of the error response)
+        """
+        raise self.transform_exception(self.convert_routing_exception(ex))
+
+    def convert_routing_exception(self, ex):
+        """
+        Gives back the :py:mod:`.errors` exception of the routing exception
+        """
+        if isinstance(ex, werkzeug.exceptions.MethodNotAllowed):
+            return errors.MethodNotAllowed(allow=ex.valid_methods, cause=ex)
+        if isinstance(ex, werkzeug.exceptions.NotFound):
+            return errors.NotFound(cause=ex)
+        return ex
+
     def handle_exception(self, ex, opts, req):
+        """
+        Gives back the response of the endpoint's exception: the response of
+        the first `exception` hook or the error response of the transformed
+        exception, the local requests (:py:attr:`.request.Request.local`)
+        raise the transformed exception instead
+        """
+        for hook in self._hooks:
+            res = hook.exception(req, ex)
+            if res is not None:
+                return res
         ex = self.transform_exception(ex)
+        if req is not None and req.local:
+            raise ex
         res = errors.ErrorResponse(ex, self, opts, req)
         return res
 
     def transform_exception(self, ex):
-        return ex
+        """
+        Gives back the mapped error of the exception: the first type of the
+        exception's MRO found in the :py:attr:`exception_map` gives the
+        target, which is called as `target(cause=ex)`. Without arguments
+        the mapped errors are static, so their responses are cached (check
+        :py:meth:`.errors.Error.is_static`). The :py:class:`.errors.Error`
+        exceptions are mapped only by their exact type, the exceptions
+        without mapping are given back as they are.
+        """
+        target = self.get_exception_target(type(ex))
+        if target is None:
+            return ex
+        return target(cause=ex)
+
+    def get_exception_target(self, exc_type):
+        """
+        Gives back the target of the exception type from the
+        :py:attr:`exception_map` or `None`, the lookup is cached by type
+        """
+        try:
+            return self._exception_targets[exc_type]
+        except KeyError:
+            pass
+        target = None
+        if issubclass(exc_type, errors.Error):
+            # The raised errors are already what the endpoint meant
+            target = self.exception_map.get(exc_type)
+        else:
+            for cls in inspect.getmro(exc_type):
+                if cls in self.exception_map:
+                    target = self.exception_map[cls]
+                    break
+        self._exception_targets[exc_type] = target
+        return target
+
+    def map_exception(self, exc_type, target):
+        """
+        Add (or replace) a mapping of the :py:attr:`exception_map`
+        """
+        self.exception_map[exc_type] = target
+        self._exception_targets = {}
 
     def add_rule(self, rule):
-        self.rules.add(rule)
+        """
+        Add the rule to the routing. Until the first request is dispatched
+        the routing is extended in place (sorted once, on the first match),
+        later by copy-on-write (check :py:mod:`.routing`), so the in-flight
+        requests are matched on the previous routing.
+        """
+        with self._routing_lock:
+            if self.dispatched:
+                self.set_rules(routing.add_rule(self.rules, rule))
+            else:
+                self.rules.add(rule)
+                self.set_rules(self.rules)
+
+    def remove(self, endpoint):
+        """
+        Remove the endpoint (rules and function) from the application.
+        The requests already matched on the previous routing will finish.
+        Raises `ValueError` if there is no such endpoint.
+        """
+        with self._routing_lock:
+            try:
+                rules = routing.remove_endpoint(self.rules, endpoint)
+            except KeyError:
+                raise ValueError("There is no such endpoint: %s" % endpoint)
+            self.set_rules(rules)
+            self.functions.pop(endpoint, None)
+            self.builders.pop(endpoint, None)
+            self.mounts.pop(endpoint, None)
+
+    def set_rules(self, rules):
+        """
+        Replace the routing map, the bound adapter swapped in one step
+        (the adapters of the hosts as well)
+        """
+        self.rules = rules
+        self.routing_version += 1
+        self.adapter = rules.bind(self['host'])
+        self._adapters = (rules, lib.LRU(self['host_cache_size']))
+
+    def get_adapter(self, host=None):
+        """
+        Gives back the adapter of the routing bound to the host (value of
+        the `Host` header). Only the host matching
+        (:py:data:`.conf.host_matching`) and the subdomain matching
+        (:py:data:`.conf.server_name`) applications bind the adapters by
+        host, the bound adapters are cached (up to
+        :py:data:`.conf.host_cache_size` hosts) until the routing changes.
+        Raises `NotFound` for the hosts out of the server name.
+        """
+        server_name = self['server_name']
+        if not host or not (self['host_matching'] or server_name):
+            return self.adapter
+        host = host.lower()
+        if not host.endswith(']'):
+            host = host.rsplit(':', 1)[0]
+        rules, adapters = self._adapters
+        adapter = adapters.get(host)
+        if adapter is not None:
+            return adapter
+        if self['host_matching']:
+            adapter = rules.bind(host)
+        elif host == server_name:
+            adapter = rules.bind(server_name, subdomain='')
+        elif host.endswith('.' + server_name):
+            adapter = rules.bind(
+                server_name, subdomain=host[:-len(server_name) - 1]
+            )
+        else:
+            raise werkzeug.exceptions.NotFound()
+        adapters.set(host, adapter)
+        return adapter
 
     def set_function(self, name, resource):
         self.functions[name] = resource
+        self.builders[name] = response.Builder(
+            self, lib.get_options(resource)
+        )
 
     def setup_hooks(self):
-        pass
+        """
+        Instantiate the hook classes (instances are used as they are)
+        """
+        self._hooks = [
+            hook() if inspect.isclass(hook) else hook for hook in self.hooks
+        ]
+
+    def run_request_hooks(self, req):
+        """
+        Executes the `request` hooks, gives back the first not `None` result
+        (the endpoint won't be called in that case)
+        """
+        for hook in self._hooks:
+            content = hook.request(req)
+            if content is not None:
+                return content
+        return None
 
     def _add_class(self, path, resource, prefix=''):
         members = lib.get_resource_members(resource)
@@ -118,7 +667,10 @@ class App(object):
             if prefix:
                 prefix += '#'
             name = prefix+opts['name']
-            rule = self._make_rule(path, opts['methods'], name)
+            rule = self._make_rule(
+                path, opts['methods'], name,
+                host=opts.get('host'), subdomain=opts.get('subdomain')
+            )
             self.add_rule(rule)
             self.set_function(name, resource)
         else:
@@ -127,5 +679,14 @@ class App(object):
                 % resource
             )
 
-    def _make_rule(self, path, methods, endpoint):
-        return werkzeug.routing.Rule(path, methods=methods, endpoint=endpoint)
+    def _make_rule(
+        self, path, methods, endpoint, host=None, subdomain=None,
+        defaults=None, strict_slashes=None
+    ):
+        if self['host_matching'] and host is None:
+            host = self['host']
+        return werkzeug.routing.Rule(
+            path, methods=methods, endpoint=endpoint, host=host,
+            subdomain=subdomain, defaults=defaults,
+            strict_slashes=strict_slashes
+        )
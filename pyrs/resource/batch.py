@@ -0,0 +1,79 @@
+"""
+Batch endpoint of the application.
+
+When :py:data:`.conf.batch_path` is set the application serves an endpoint
+on that path which expects an array of calls (`method`, `path` with the
+query string, `body` and `headers`) and gives back the array of the results
+(`status`, `headers` and `body`) in the same order. The calls are matched and
+executed locally (see :py:meth:`.base.App.execute`), so the results aren't
+encoded one by one and the dispatching of the batch request (profiling,
+recording, access log, session) isn't repeated per call. The headers, the
+cookies and the session of the batch request are inherited by the calls.
+The response cache and the idempotency store (check :py:mod:`.idempotency`)
+apply to the calls as well, so a retried batch isn't executed twice.
+Nested batch calls are rejected. The generated clients (check
+:py:mod:`.client`) use it to send many calls on one connection in one round
+trip.
+"""
+import json
+
+from six.moves.urllib import parse as urlparse
+
+from . import errors
+from . import lib
+from . import resource
+
+_inherited = ('content-type', 'content-length')
+
+
+@resource.POST(
+    name='batch', openapi=False, status=200, inject_app='app',
+    inject_body='calls', inject_request='request', inject_query=False
+)
+def dispatch(app, calls, request):
+    """
+    Dispatches the calls of the batch
+    """
+    if not isinstance(calls, list):
+        raise errors.InputValidationError("Array of calls expected")
+    headers = dict(
+        (k, v) for k, v in request.headers.items()
+        if k.lower() not in _inherited
+    )
+    return [
+        call_one(app, call, headers, request.cookies, request.session)
+        for call in calls
+    ]
+
+
+def call_one(app, call, headers, cookies=None, session=None):
+    """
+    Gives back the result of the call
+    """
+    parts = urlparse.urlsplit(call.get('path', ''))
+    query = dict(
+        (k, v[0] if len(v) == 1 else v)
+        for k, v in urlparse.parse_qs(parts.query).items()
+    )
+    method = call.get('method', 'GET')
+    headers = dict(headers, **(call.get('headers') or {}))
+    try:
+        try:
+            adapter = app.get_adapter(lib.get_header(headers, 'Host'))
+            endpoint, path = adapter.match(parts.path, method)
+        except Exception as ex:
+            raise app.convert_routing_exception(ex)
+        target, endpoint = app.mounts.get(endpoint, (app, endpoint))
+        if target.functions.get(endpoint) is dispatch:
+            raise errors.BadRequest("Nested batch calls are not allowed")
+        content, status, response_headers = target.execute(
+            lib.Trace(), endpoint, path, parts.path, method, query=query,
+            body=call.get('body'), headers=headers, cookies=cookies,
+            session=session, local=True
+        )
+    except Exception as ex:
+        content, status, response_headers = errors.ErrorResponse(
+            app.transform_exception(ex), app
+        ).build()
+        content = json.loads(content)
+    return {'status': status, 'headers': response_headers, 'body': content}
@@ -0,0 +1,91 @@
+"""
+Chunked validation of array request bodies.
+
+The endpoints with `bulk=True` option expect an array body, the `request`
+schema describes the items. The items are loaded in chunks
+(:py:data:`.conf.bulk_chunk_size`), with the `bulk_parallel` option (or
+:py:data:`.conf.bulk_parallel`) the chunks are loaded on the process pool of
+the application (:py:attr:`.base.App.process_executor`), so the schema
+should be picklable (defined on module level).
+
+The failing items are collected into one
+:py:class:`.errors.InputValidationError` (the `items` of the details are the
+indexes and messages), the validation stops after
+:py:data:`.conf.bulk_max_errors` failures.
+"""
+import copy
+import inspect
+
+import jsonschema
+
+from . import errors
+
+
+def load(processor, items, chunk_size=1000, max_errors=100, executor=None):
+    """
+    Gives back the loaded items, raises
+    :py:class:`.errors.InputValidationError` if any of them invalid
+    """
+    chunks = [
+        (start, items[start:start + chunk_size])
+        for start in range(0, len(items), chunk_size)
+    ]
+    futures = []
+    if executor is None or len(chunks) < 2:
+        results = (
+            _load_chunk(processor, start, chunk, max_errors)
+            for start, chunk in chunks
+        )
+    else:
+        processor = _portable(processor)
+        futures = [
+            executor.submit(_load_chunk, processor, start, chunk, max_errors)
+            for start, chunk in chunks
+        ]
+        results = (future.result() for future in futures)
+    loaded = []
+    failures = []
+    try:
+        for values, chunk_failures in results:
+            loaded.extend(values)
+            failures.extend(chunk_failures)
+            if len(failures) >= max_errors:
+                break
+    finally:
+        # Stop the not yet started chunks
+        for future in futures:
+            future.cancel()
+    if failures:
+        raise errors.InputValidationError(
+            "Invalid items", items=failures[:max_errors]
+        )
+    return loaded
+
+
+def _portable(processor):
+    """
+    Gives back the schema without the cached (not picklable) validator
+    """
+    if inspect.isclass(processor):
+        return processor
+    processor = copy.copy(processor)
+    processor.__dict__.pop('_validator', None)
+    processor.__dict__.pop('_value', None)
+    return processor
+
+
+def _load_chunk(processor, start, chunk, max_errors):
+    if inspect.isclass(processor):
+        processor = processor()
+    loaded = []
+    failures = []
+    for index, item in enumerate(chunk, start):
+        try:
+            loaded.append(processor.load(item))
+        except jsonschema.exceptions.ValidationError as ex:
+            failures.append({'index': index, 'message': ex.message})
+        except (TypeError, ValueError) as ex:
+            failures.append({'index': index, 'message': str(ex)})
+        if len(failures) >= max_errors:
+            break
+    return loaded, failures
@@ -0,0 +1,219 @@
+"""
+Response cache of the endpoints.
+
+The built `(content, status, headers)` of the successful (2xx) `GET`
+requests of the endpoints having the `cache` option (time to live in
+seconds) are cached by the endpoint, the path arguments and the query, so
+the cached requests skip the validation and the execution as well.
+The request hooks (eg. the authentication) run before the lookup and the
+responses are cached per authenticated identity
+(:py:meth:`.base.App.get_identity`) and by the values of the request headers
+listed in the `Vary` header of the endpoint (`headers` option). The raw
+and partial responses aren't cached (check :py:func:`.response.is_storable`).
+
+Every cache backend has the `get(key, default=None)` and
+`set(key, value, ttl)` methods, the keys are strings.
+
+- :py:class:`MemoryCache` is an in-process LRU cache,
+- :py:class:`SharedMemoryCache` is stored in a shared memory region, so the
+  worker processes forked from the same master share it.
+"""
+import collections
+import hashlib
+import mmap
+import multiprocessing
+import pickle
+import struct
+import threading
+import time
+
+import six
+from six.moves.urllib import parse as urlparse
+
+from . import lib
+
+
+def make_key(endpoint, path=None, query=None, identity=None, headers=None,
+             vary=(), local=False):
+    """
+    Gives back the cache key of the request: the URL encoded path arguments,
+    query parameters (repeated parameters as lists), values of the `vary`
+    headers and the authenticated `identity`. The responses of the `local`
+    requests (not encoded) are cached separately.
+    """
+    parts = [
+        endpoint,
+        _encode(path),
+        _encode(query),
+        _encode(dict(
+            (name.lower(), lib.get_header(headers, name, ''))
+            for name in vary
+        )),
+        urlparse.quote(identity or '', safe=''),
+    ]
+    if local:
+        parts.append('local')
+    return '|'.join(parts)
+
+
+def get_vary(headers):
+    """
+    Gives back the names of the request headers listed by the `Vary` header
+    of the response headers
+    """
+    value = lib.get_header(headers, 'Vary')
+    if not value:
+        return ()
+    return tuple(name.strip() for name in value.split(',') if name.strip())
+
+
+def _encode(values):
+    if not values:
+        return ''
+    if hasattr(values, 'lists'):
+        items = values.lists()
+    else:
+        items = values.items()
+    return urlparse.urlencode(sorted(
+        (name, list(value) if isinstance(value, (list, tuple)) else value)
+        for name, value in items
+    ), doseq=True)
+
+
+class MemoryCache(object):
+    """
+    In-process cache, the least recently used items are evicted.
+
+    :param int maxsize: Maximum number of cached items
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires <= time.time():
+                return default
+            self._data[key] = (value, expires)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.time() + ttl)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SharedMemoryCache(object):
+    """
+    Cache stored in an anonymous shared memory map. Should be created in the
+    master process before the workers are forked.
+
+    The region is divided into `sets` hash buckets, each of them has `ways`
+    fixed size slots. A key can be stored only in the slots of its bucket,
+    when all of them are used the least recently used slot of the bucket is
+    evicted. The buckets are protected by `locks` number of process shared
+    locks (lock striping). Values bigger than the slot are not cached.
+
+    :param int sets: Number of the buckets
+    :param int ways: Number of the slots in a bucket
+    :param int slot_size: Size of a slot in bytes (header included)
+    :param int locks: Number of the locks
+    """
+
+    #: Slot header: key hash, expires, last used, size of payload
+    header = struct.Struct('<8sddI')
+
+    def __init__(self, sets=1024, ways=4, slot_size=4096, locks=64):
+        if slot_size <= self.header.size:
+            raise ValueError("The slot size should be bigger than %s" % (
+                self.header.size
+            ))
+        self.sets = sets
+        self.ways = ways
+        self.slot_size = slot_size
+        self._memory = mmap.mmap(-1, sets * ways * slot_size)
+        self._locks = [multiprocessing.Lock() for _ in range(locks)]
+
+    def get(self, key, default=None):
+        digest, key = self._digest(key)
+        bucket = self._bucket(digest)
+        with self._lock(bucket):
+            slot = self._find(bucket, digest)
+            if slot is None:
+                return default
+            unused, expires, unused, size = self._read_header(slot)
+            now = time.time()
+            if expires <= now:
+                return default
+            offset = slot + self.header.size
+            payload = self._memory[offset:offset + size]
+            self._write_header(slot, digest, expires, now, size)
+        key_size = struct.unpack('<I', payload[:4])[0]
+        if payload[4:4 + key_size] != key:
+            return default
+        return pickle.loads(payload[4 + key_size:])
+
+    def set(self, key, value, ttl):
+        digest, key = self._digest(key)
+        payload = struct.pack('<I', len(key)) + key + pickle.dumps(
+            value, pickle.HIGHEST_PROTOCOL
+        )
+        if len(payload) > self.slot_size - self.header.size:
+            return False
+        bucket = self._bucket(digest)
+        now = time.time()
+        with self._lock(bucket):
+            slot = self._find(bucket, digest)
+            if slot is None:
+                slot = self._victim(bucket, now)
+            offset = slot + self.header.size
+            self._memory[offset:offset + len(payload)] = payload
+            self._write_header(slot, digest, now + ttl, now, len(payload))
+        return True
+
+    def _digest(self, key):
+        if isinstance(key, six.text_type):
+            key = key.encode('utf-8')
+        return hashlib.sha1(key).digest()[:8], key
+
+    def _bucket(self, digest):
+        return struct.unpack('<Q', digest)[0] % self.sets
+
+    def _lock(self, bucket):
+        return self._locks[bucket % len(self._locks)]
+
+    def _slots(self, bucket):
+        start = bucket * self.ways * self.slot_size
+        return range(start, start + self.ways * self.slot_size, self.slot_size)
+
+    def _find(self, bucket, digest):
+        for slot in self._slots(bucket):
+            if self._memory[slot:slot + 8] == digest:
+                if self._read_header(slot)[3]:
+                    return slot
+        return None
+
+    def _victim(self, bucket, now):
+        victim = None
+        oldest = None
+        for slot in self._slots(bucket):
+            unused, expires, used, size = self._read_header(slot)
+            if not size or expires <= now:
+                return slot
+            if oldest is None or used < oldest:
+                victim, oldest = slot, used
+        return victim
+
+    def _read_header(self, slot):
+        return self.header.unpack_from(self._memory, slot)
+
+    def _write_header(self, slot, digest, expires, used, size):
+        self.header.pack_into(self._memory, slot, digest, expires, used, size)
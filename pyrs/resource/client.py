@@ -0,0 +1,451 @@
+"""
+Clients of the applications.
+
+The :py:class:`LocalClient` calls an application hosted in the same process
+(:py:meth:`.base.App.client`) through the :py:meth:`.base.App.dispatch`
+without the JSON encoding:
+
+.. code:: python
+
+    user = app.client().get('/user/admin')
+
+The request and the response are validated the same way, but the result is
+the JSON compatible value of the response (the same as a remote call would
+give back after decoding) and the exceptions (eg. the
+:py:class:`.errors.Error` instances) are raised as they are.
+
+The :py:func:`generate` creates a remote client class of an application,
+with one method per endpoint:
+
+.. code:: python
+
+    Client = client.generate(app)
+    remote = Client('http://users.local:8080')
+    user = remote.get_user(name='admin')
+
+The remote client keeps the connections alive (:py:class:`ConnectionPool`),
+validates the responses by the response schemas of the endpoints and raises
+:py:class:`RemoteError` for the error responses. The calls collected by
+:py:meth:`RemoteClient.batch` are sent in one request to the batch endpoint
+(:py:data:`.conf.batch_path`, check :py:mod:`.batch`) if the application
+has one.
+"""
+import inspect
+import json
+import re
+import socket
+import threading
+
+from pyrs import schema
+import jsonschema
+from six.moves import http_client
+from six.moves import queue
+from six.moves.urllib import parse as urlparse
+import werkzeug.routing
+
+from . import errors
+from . import response
+
+
+class LocalClient(object):
+    """
+    :param app: The called application (:py:class:`.base.App`)
+    :param dict headers: Default headers of the requests
+    :param dict cookies: Default cookies of the requests
+    """
+
+    def __init__(self, app, headers=None, cookies=None):
+        self.app = app
+        self.headers = headers or {}
+        self.cookies = cookies or {}
+
+    def request(self, method, path, query=None, body=None, headers=None,
+                cookies=None):
+        """
+        Gives back the `(content, status, headers)` of the request
+        """
+        return self.app.dispatch(
+            path, method, query=query, body=body,
+            headers=dict(self.headers, **(headers or {})),
+            cookies=dict(self.cookies, **(cookies or {})),
+            local=True
+        )
+
+    def get(self, path, query=None, **kwargs):
+        return self.request('GET', path, query, **kwargs)[0]
+
+    def post(self, path, body=None, **kwargs):
+        return self.request('POST', path, body=body, **kwargs)[0]
+
+    def put(self, path, body=None, **kwargs):
+        return self.request('PUT', path, body=body, **kwargs)[0]
+
+    def patch(self, path, body=None, **kwargs):
+        return self.request('PATCH', path, body=body, **kwargs)[0]
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)[0]
+
+
+class RemoteError(errors.Error):
+    """
+    Error response of the remote application.
+    The `status`, `error` and the message are taken from the response.
+    """
+
+    def __init__(self, status, message=None):
+        message = message if isinstance(message, dict) else {}
+        super(RemoteError, self).__init__(
+            message.get('error_description') or message.get('error'),
+            **(message.get('details') or {})
+        )
+        self.status = status
+        self.error = message.get('error')
+        self.description = message.get('error_description')
+        self.message = message
+
+
+#: Methods of the requests can be sent again safely
+IDEMPOTENT_METHODS = frozenset(
+    ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE')
+)
+
+
+class ConnectionPool(object):
+    """
+    Pool of keep-alive HTTP connections of a host. The idle connections are
+    reused (the last used first). The idempotent requests
+    (:py:data:`IDEMPOTENT_METHODS`) failed on a reused connection (eg.
+    closed by the server) are sent again once on a new connection, the
+    others can't be retried as they could be already processed.
+
+    :param str host: Host name
+    :param int port: Port
+    :param int maxsize: Maximum number of the idle connections
+    :param float timeout: Socket timeout in seconds
+    :param bool secure: Use HTTPS
+    """
+
+    def __init__(self, host, port=None, maxsize=10, timeout=None,
+                 secure=False):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection_class = http_client.HTTPConnection
+        if secure:
+            self.connection_class = http_client.HTTPSConnection
+        #: Number of the opened connections
+        self.created = 0
+        self._idle = queue.LifoQueue(maxsize)
+        self._lock = threading.Lock()
+
+    def request(self, method, url, body=None, headers=None):
+        """
+        Gives back the `(status, headers, data)` of the response
+        """
+        while True:
+            conn, reused = self._get()
+            try:
+                conn.request(method, url, body, headers or {})
+                res = conn.getresponse()
+                data = res.read()
+            except (http_client.HTTPException, socket.error):
+                conn.close()
+                if reused and method in IDEMPOTENT_METHODS:
+                    continue
+                raise
+            if res.will_close:
+                conn.close()
+            else:
+                self._put(conn)
+            return res.status, dict(res.getheaders()), data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _get(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+        with self._lock:
+            self.created += 1
+        return self.connection_class(
+            self.host, self.port, timeout=self.timeout
+        ), False
+
+    def _put(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+class Call(object):
+    """
+    Prepared call of an endpoint, the `result` is set when it's sent
+    """
+
+    def __init__(self, method, url, body=None, headers=None, processor=None):
+        self.method = method
+        self.url = url
+        self.body = body
+        self.headers = headers or {}
+        self.processor = processor
+        self.done = False
+        self._result = None
+        self._error = None
+
+    def resolve(self, status, content):
+        self.done = True
+        if status >= 400:
+            self._error = RemoteError(status, content)
+        elif self.processor is not None:
+            try:
+                self.processor.validate_json(content)
+            except jsonschema.exceptions.ValidationError as ex:
+                self._error = errors.ValidationError(ex.message, cause=ex)
+        self._result = content
+
+    def result(self):
+        """
+        Gives back the (validated) content or raises the error
+        """
+        if not self.done:
+            raise RuntimeError("The call isn't sent yet")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class RemoteClient(object):
+    """
+    Base class of the generated clients (check :py:func:`generate`).
+
+    :param str url: Base URL of the application
+    :param int pool_size: Maximum number of the kept-alive connections
+    :param float timeout: Socket timeout in seconds
+    :param dict headers: Default headers of the requests
+    """
+
+    #: Path of the batch endpoint (:py:data:`.conf.batch_path`) of the
+    #: application or `None`
+    batch_path = None
+
+    #: Endpoints of the application: `{name: (method, response schema)}`
+    endpoints = {}
+
+    #: Endpoints of the generated methods: `{method name: endpoint}`
+    methods = {}
+
+    #: Routing map of the endpoints
+    rules = werkzeug.routing.Map()
+
+    #: Query parameter of the field selection
+    #: (:py:data:`.conf.fields_query_name`), the projected responses aren't
+    #: validated
+    fields_name = None
+
+    def __init__(self, url, pool_size=10, timeout=None, headers=None):
+        parts = urlparse.urlsplit(url)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = headers or {}
+        self.pool = ConnectionPool(
+            parts.hostname, parts.port, maxsize=pool_size, timeout=timeout,
+            secure=parts.scheme == 'https'
+        )
+        self._adapter = self.rules.bind(parts.hostname or 'localhost')
+
+    def prepare(self, endpoint, path=None, query=None, body=None,
+                headers=None):
+        """
+        Gives back the :py:class:`Call` of the endpoint
+        """
+        method, processor = self.endpoints[endpoint]
+        if query and self.fields_name in query:
+            processor = None
+        url = self._adapter.build(endpoint, path or {}, method=method)
+        if query:
+            url += '?' + urlparse.urlencode(query, doseq=True)
+        return Call(
+            method, self.prefix + url, body,
+            dict(self.headers, **(headers or {})), processor
+        )
+
+    def call(self, endpoint, path=None, query=None, body=None, headers=None):
+        call = self.prepare(endpoint, path, query, body, headers)
+        self.send(call)
+        return call.result()
+
+    def send(self, call):
+        headers = dict(call.headers)
+        body = None
+        if call.body is not None:
+            body = json.dumps(call.body)
+            headers['Content-Type'] = 'application/json'
+        status, unused, data = self.pool.request(
+            call.method, call.url, body, headers
+        )
+        call.resolve(status, _decode(data))
+
+    def send_all(self, calls):
+        """
+        Send the calls in one request to the batch endpoint (if the
+        application has one), otherwise one by one
+        """
+        if not calls:
+            return
+        if self.batch_path is None or len(calls) == 1:
+            for call in calls:
+                self.send(call)
+            return
+        status, unused, data = self.pool.request(
+            'POST', self.prefix + self.batch_path, json.dumps([
+                {
+                    'method': call.method,
+                    'path': call.url[len(self.prefix):],
+                    'body': call.body,
+                    'headers': call.headers,
+                }
+                for call in calls
+            ]), dict(self.headers, **{'Content-Type': 'application/json'})
+        )
+        results = _decode(data)
+        if status >= 400:
+            raise RemoteError(status, results)
+        for call, result in zip(calls, results):
+            call.resolve(result['status'], result['body'])
+
+    def batch(self):
+        """
+        Gives back a :py:class:`Batch` of this client
+        """
+        return Batch(self)
+
+    def close(self):
+        self.pool.close()
+
+
+class Batch(object):
+    """
+    Collects the calls of the endpoints and sends them at once:
+
+    .. code:: python
+
+        with client.batch() as batch:
+            first = batch.get_user(name='first')
+            second = batch.get_user(name='second')
+        first.result()
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        endpoint = self.client.methods.get(name)
+        if endpoint is None:
+            raise AttributeError(name)
+
+        def prepare(body=None, query=None, headers=None, **path):
+            call = self.client.prepare(endpoint, path, query, body, headers)
+            self.calls.append(call)
+            return call
+        return prepare
+
+    def send(self):
+        calls, self.calls = self.calls, []
+        self.client.send_all(calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+
+def generate(app, name='Client'):
+    """
+    Gives back a :py:class:`RemoteClient` class of the application, having
+    one method per endpoint (named by the endpoint, the not identifier
+    characters replaced by `_`, check :py:func:`get_method_name`). The
+    methods expect the path arguments as keyword arguments, the `body`,
+    `query` and `headers` are optional. The responses are validated by the
+    response schema (the page envelope of the paginated endpoints), except
+    the projected ones (`fields` selected).
+    The endpoints left out of the OpenAPI specification (`openapi=False`)
+    are left out of the client as well.
+    """
+    endpoints = {}
+    names = {}
+    attrs = {}
+    rules = []
+    for rule in app.rules.iter_rules():
+        opts = app.openapi.get_options(rule.endpoint)
+        if opts is None or opts.get('openapi') is False:
+            continue
+        methods = sorted(set(rule.methods or ()) - {'HEAD', 'OPTIONS'})
+        if not methods:
+            continue
+        processor = None
+        if not opts.get('content_type'):
+            processor = _get_processor(opts.get(app['option_response_name']))
+            if opts.get('paginate'):
+                processor = response.get_page_processor(processor)
+        rules.append(rule.empty())
+        if rule.endpoint in endpoints:
+            continue
+        endpoints[rule.endpoint] = (methods[0], processor)
+        method_name = get_method_name(rule.endpoint, names)
+        attrs[method_name] = _make_method(
+            rule.endpoint, method_name, opts.get('description')
+        )
+        names[method_name] = rule.endpoint
+    attrs['endpoints'] = endpoints
+    attrs['methods'] = names
+    attrs['rules'] = werkzeug.routing.Map(rules)
+    attrs['batch_path'] = app['batch_path']
+    attrs['fields_name'] = app['fields_query_name']
+    return type(str(name), (RemoteClient,), attrs)
+
+
+def get_method_name(endpoint, taken=()):
+    """
+    Gives back the name of the generated method of the endpoint. The names
+    colliding with the attributes of :py:class:`RemoteClient` (eg. `close`)
+    or with the `taken` names are suffixed by `_` until they're unique.
+    """
+    name = str(re.sub(r'\W', '_', endpoint))
+    while hasattr(RemoteClient, name) or name in taken:
+        name += '_'
+    return name
+
+
+def _make_method(endpoint, name, description=None):
+    def method(self, body=None, query=None, headers=None, **path):
+        return self.call(endpoint, path, query, body, headers)
+    method.__name__ = name
+    method.__doc__ = description
+    return method
+
+
+def _get_processor(processor):
+    if inspect.isclass(processor) and issubclass(processor, schema.Schema):
+        return processor()
+    if isinstance(processor, schema.Schema):
+        return processor
+    return None
+
+
+def _decode(data):
+    if not data:
+        return None
+    try:
+        return json.loads(data.decode('utf-8'))
+    except ValueError:
+        return data
@@ -0,0 +1,157 @@
+"""
+Compiled coercion of the query parameters.
+
+The query parameters arrive as strings (or lists of strings in case of multi
+dicts). The :py:class:`Coercer` compiled from the `query` schema of the
+endpoint converts every declared parameter to its JSON type in one pass
+(integers, numbers, booleans, enums, arrays), then validates and converts to
+python values (eg. dates) by the schema.
+The compiled coercers are cached by the schema.
+"""
+import inspect
+import json
+
+from pyrs import schema
+import six
+
+from . import lib
+
+#: Compiled coercers keyed by the query schema (class or instance)
+_coercers = lib.LRU(1024)
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+FALSE_VALUES = ('false', '0', 'no', 'off', '')
+
+
+class CoercionError(ValueError):
+    """
+    Raised if any of the parameters cannot be converted.
+    The `errors` is a dictionary of parameter names and messages.
+    """
+
+    def __init__(self, errors):
+        super(CoercionError, self).__init__(errors)
+        self.errors = errors
+
+
+def get_coercer(query_schema):
+    """
+    Gives back the (cached) coercer of the schema class or instance
+    """
+    coercer = _coercers.get(query_schema)
+    if coercer is None:
+        coercer = Coercer(query_schema)
+        _coercers.set(query_schema, coercer)
+    return coercer
+
+
+class Coercer(object):
+    """
+    Converts the raw query parameters by the given `schema.Object`.
+    Undeclared parameters are kept as they are.
+    """
+
+    def __init__(self, query_schema):
+        if inspect.isclass(query_schema):
+            query_schema = query_schema()
+        self.schema = query_schema
+        self.fields = []
+        for field, prop in (query_schema._fields or {}).items():
+            name = prop.get('name', field)
+            self.fields.append(
+                (name, isinstance(prop, schema.Array), _compile(prop))
+            )
+
+    def __call__(self, query):
+        value = dict(
+            (k, v[0] if isinstance(v, list) and v else v)
+            for k, v in query.items()
+        )
+        problems = {}
+        for name, is_list, convert in self.fields:
+            if name not in query:
+                continue
+            if is_list:
+                raw = _get_list(query, name)
+            else:
+                raw = value[name]
+            try:
+                value[name] = convert(raw)
+            except (TypeError, ValueError) as ex:
+                problems[name] = str(ex)
+        if problems:
+            raise CoercionError(problems)
+        self.schema.validate_json(value)
+        return self.schema.to_python(value)
+
+
+def _get_list(query, name):
+    if hasattr(query, 'getlist'):
+        values = query.getlist(name)
+    else:
+        values = query[name]
+    if isinstance(values, (list, tuple)):
+        if len(values) != 1:
+            return list(values)
+        values = values[0]
+    return [v for v in values.split(',') if v] if values else []
+
+
+def _compile(prop):
+    enum = prop.get('enum')
+    if enum:
+        return _enum(enum)
+    if isinstance(prop, schema.Boolean):
+        return _boolean
+    if isinstance(prop, schema.Integer):
+        return int
+    if isinstance(prop, schema.Number):
+        return _number
+    if isinstance(prop, schema.Array):
+        return list
+    if isinstance(prop, schema.String):
+        return _string
+    return _json
+
+
+def _enum(enum):
+    by_text = dict((six.text_type(v), v) for v in enum)
+
+    def convert(value):
+        if value in enum:
+            return value
+        try:
+            return by_text[value]
+        except KeyError:
+            raise ValueError('%s is not one of %s' % (value, enum))
+    return convert
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = six.text_type(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError('%s is not a boolean' % value)
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return value
+    return float(value)
+
+
+def _string(value):
+    return value
+
+
+def _json(value):
+    if not isinstance(value, six.string_types):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
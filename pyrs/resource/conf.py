@@ -9,10 +9,158 @@ decorate = '_endpoint'
 #: Default host for the application
 host = 'localhost'
 
+#: Match the rules by the `Host` header of the requests as well, the `host`
+#: option of the endpoints is the host pattern (eg. `'<tenant>.example.com'`,
+#: the default is :py:data:`host`)
+host_matching = False
+
+#: Server name of the subdomain matching, the `subdomain` option of the
+#: endpoints is matched with the subdomain of the `Host` header (eg.
+#: `'<tenant>'`), `None` disables the subdomain matching
+server_name = None
+
+#: Maximum number of the cached adapters bound to hosts
+host_cache_size = 1024
+
 #: You can get more information in response
 #: like traceback and args of exception
 debug = False
 
+#: Headers masked when the request is stored (eg. by the profiler)
+sensitive_headers = ['Authorization', 'Cookie', 'Proxy-Authorization']
+
+#: Enable/disable the request profiler (check :py:mod:`.profiler`)
+profile = False
+
+#: Directory of the stored profiles, `None` means the temporary directory
+profile_dir = None
+
+#: Rate of the profiled requests
+profile_rate = 1.0
+
+#: Only the profile of requests slower than this (in seconds) will be stored
+profile_threshold = 0.5
+
+#: Profiling of the request can be forced by this header
+profile_header = 'X-Profile'
+
+#: The :py:data:`profile_header` forces the profiling only when its value is
+#: this secret, `None` disables the forcing
+profile_secret = None
+
+#: Path of the NDJSON file where the requests will be recorded
+#: (check :py:mod:`.replay`), `None` disables the recording
+record = None
+
+#: Rate of the recorded requests
+record_rate = 1.0
+
+#: Enable/disable the access log (check :py:mod:`.accesslog`)
+access_log = False
+
+#: Callable gets the batches of the access log records, `None` logs them
+access_log_writer = None
+
+#: Maximum number of access log records written at once
+access_log_batch_size = 100
+
+#: Maximum delay of the access log records (in seconds)
+access_log_interval = 1.0
+
+#: Maximum number of access log records waiting for the writer, the records
+#: over this limit are dropped
+access_log_queue_size = 10000
+
+#: Header of the idempotency key of `idempotent=True` endpoints
+#: (check :py:mod:`.idempotency`)
+idempotency_header = 'Idempotency-Key'
+
+#: Store of the idempotent results (check :py:mod:`.store`),
+#: `None` means an in-memory store
+idempotency_store = None
+
+#: Maximum number of results in the default in-memory store
+idempotency_store_size = 1024
+
+#: Time to live (seconds) of the results in the default in-memory store
+idempotency_ttl = 24 * 60 * 60
+
+#: Number of the worker threads of background tasks
+#: (check :py:mod:`.tasks`)
+task_workers = 4
+
+#: Maximum number of waiting background tasks, the further tasks are dropped
+task_queue_size = 1000
+
+#: Default deadline of the endpoints in seconds (can be overridden by the
+#: `timeout` option of the endpoint), `None` means no deadline
+#: (check :py:mod:`.deadline`)
+timeout = None
+
+#: Maximum number of the endpoints having deadline executed at once, the
+#: others wait for a free worker until their deadline
+timeout_workers = 16
+
+#: Maximum number of the abandoned (timed out, but still running) endpoint
+#: calls, over this the endpoints having deadline are rejected (503) until
+#: some of them finish
+timeout_abandoned = 16
+
+#: Backend of the response cache of endpoints having the `cache` option
+#: (check :py:mod:`.cache`), `None` means an in-process cache
+cache_backend = None
+
+#: Maximum number of responses in the default in-process cache
+cache_size = 1024
+
+#: Maximum number of the cached responses of the static errors
+error_cache_size = 1024
+
+#: Number of the worker processes of the application, `None` means the
+#: number of CPUs
+process_workers = None
+
+#: Modules imported by the worker processes when started, in addition to the
+#: modules of the endpoints
+process_modules = []
+
+#: Size of the chunks of the bulk request validation (check :py:mod:`.bulk`)
+bulk_chunk_size = 1000
+
+#: The bulk validation stops after this number of invalid items
+bulk_max_errors = 100
+
+#: Validate the chunks of the bulk requests on the process pool
+bulk_parallel = False
+
+#: Path of the served OpenAPI specification (check :py:mod:`.openapi`),
+#: `None` means not served
+openapi_path = None
+
+#: Title of the API in the OpenAPI specification
+openapi_title = 'API'
+
+#: Version of the API in the OpenAPI specification
+openapi_version = '1.0.0'
+
+#: Path of the batch endpoint (check :py:mod:`.batch`), `None` means not
+#: served
+batch_path = None
+
+#: Store of the sessions (check :py:mod:`.sessions`), `None` disables the
+#: session handling
+session_store = None
+
+#: Name of the cookie of the session id
+session_cookie = 'session'
+
+#: Size of the local LRU tier in front of the session store, 0 disables it
+session_local_size = 1024
+
+#: Time to live of the sessions in the local tier (in seconds), the changes
+#: made by other processes are seen after that
+session_local_ttl = 5.0
+
 body_schema_option = 'request'
 
 #: Enable/disable injecting the :py:class:`.base.App` as keyword argument
@@ -36,6 +184,31 @@ inject_cookies = False
 #: With this name the cookies will be injected
 inject_cookies_name = 'cookies'
 
+#: Name of the query parameter which selects the fields of the response
+#: (eg. `?fields=id,name`). Applied only when the `response` option of the
+#: endpoint is a `schema.Object`. `None` disables the field projection.
+fields_query_name = 'fields'
+
+#: Enable/disable injecting the requested fields (tuple or None)
+inject_fields = False
+
+#: With this name the requested fields will be injected
+inject_fields_name = 'fields'
+
+#: Enable/disable injecting the :py:class:`.tasks.Tasks` handle which
+#: schedules callables after the response is built
+inject_tasks = False
+
+#: With this name the tasks handle will be injected
+inject_tasks_name = 'tasks'
+
+#: Enable/disable injecting the :py:class:`.deadline.Deadline` of the request
+#: (`None` if the endpoint has no deadline)
+inject_deadline = False
+
+#: With this name the deadline will be injected
+inject_deadline_name = 'deadline'
+
 #: Enable/disable injecting the path arguments
 #: If a name provided the path arguments will be injected as specified
 inject_path = True
@@ -45,6 +218,30 @@ inject_path = True
 inject_query = True
 
 
+#: Name of the query parameter (and injected keyword argument) of the cursor
+#: of paginated endpoints
+paginate_cursor_name = 'cursor'
+
+#: Name of the query parameter (and injected keyword argument) of the page
+#: size of paginated endpoints
+paginate_limit_name = 'limit'
+
+#: Default page size of paginated endpoints
+paginate_limit = 20
+
+#: Maximum page size could be requested
+paginate_max_limit = 100
+
+#: Validation of the dumped responses (can be overridden by the
+#: `response_validation` option of the endpoint):
+#: `'full'` validates every response, `'sampled'` validates only the
+#: :py:data:`response_validation_rate` part of responses and logs the
+#: violations, `'off'` dumps without validation
+response_validation = 'full'
+
+#: Rate of the validated responses in `'sampled'` validation mode
+response_validation_rate = 0.01
+
 inject_request = False
 inject_request_name = 'request'
 inject_session = False
@@ -0,0 +1,216 @@
+"""
+Per-endpoint deadlines.
+
+The `timeout` option of the endpoint (or :py:data:`.conf.timeout` as default)
+gives the deadline of the request in seconds, counted from the start of the
+dispatching. When the deadline expires the
+:py:class:`.errors.GatewayTimeout` (504) will be the response:
+
+- coroutine function endpoints are cancelled (every thread runs its
+  coroutines on its own event loop, reused by the later calls),
+- other endpoints are executed on a pool of worker threads (see
+  :py:class:`Executor`) and abandoned (the thread can't be stopped, it runs
+  until the function returns, but the response isn't waiting for it).
+
+The endpoints having deadline don't run on the thread of the dispatching, so
+the thread-local state (eg. set by a middleware or the WSGI server) isn't
+visible for them, the request should carry everything they need.
+
+The :py:class:`Deadline` can be injected (`inject_deadline` option) so the
+endpoint can pass the remaining time on to the downstream calls.
+"""
+import inspect
+import threading
+
+try:
+    import asyncio
+except ImportError:  # pragma: no cover
+    asyncio = None
+from concurrent import futures
+from six.moves import queue
+
+from . import errors
+from . import lib
+
+_is_coroutine_function = getattr(
+    inspect, 'iscoroutinefunction', lambda func: False
+)
+_local = threading.local()
+
+
+class Deadline(object):
+    """
+    :param float timeout: Seconds until the deadline
+    :param float started: Start of the measuring (:py:data:`.lib.timer`)
+    """
+
+    def __init__(self, timeout, started=None):
+        self.timeout = timeout
+        if started is None:
+            started = lib.timer()
+        self.expires = started + timeout
+
+    def remaining(self):
+        """
+        Gives back the remaining seconds (0 if already expired)
+        """
+        return max(0.0, self.expires - lib.timer())
+
+    @property
+    def expired(self):
+        return self.expires <= lib.timer()
+
+
+def call(func, kwargs, deadline=None, executor=None):
+    """
+    Call the endpoint `func(**kwargs)` within the deadline (on the executor
+    if given). Raises :py:class:`.errors.GatewayTimeout` if the deadline
+    expires.
+    """
+    if _is_coroutine_function(func):
+        return _call_coroutine(func, kwargs, deadline)
+    if deadline is None:
+        if executor is None:
+            return func(**kwargs)
+        return executor.submit(func, **kwargs).result()
+    if deadline.expired:
+        raise errors.GatewayTimeout()
+    if isinstance(executor, Executor):
+        return executor.call(func, kwargs, deadline)
+    future = executor.submit(func, **kwargs)
+    try:
+        return future.result(deadline.remaining())
+    except futures.TimeoutError:
+        future.cancel()
+        raise errors.GatewayTimeout()
+
+
+class Executor(object):
+    """
+    Executes the endpoints having deadline on a pool of worker threads.
+
+    At most `workers` calls run at once, the others wait for a free worker
+    until their deadline. The worker threads are started on demand and
+    reused. A timed out call is abandoned: its worker leaves the pool when
+    the call returns and a new worker replaces it, so the abandoned calls
+    don't starve the new requests, but at most `abandoned` of them may run,
+    over this the calls are rejected by
+    :py:class:`.errors.ServiceUnavailable` until some of them finish.
+
+    :param int workers: Maximum number of the running calls
+    :param int abandoned: Maximum number of the abandoned calls,
+                          `None` means the same as `workers`
+    """
+
+    def __init__(self, workers, abandoned=None):
+        self.workers = workers
+        if abandoned is None:
+            abandoned = workers
+        self.limit = abandoned
+        #: Number of the running (or queued) calls, except the abandoned ones
+        self.running = 0
+        #: Number of the worker threads of the pool
+        self.threads = 0
+        self._abandoned = set()
+        self._tasks = queue.Queue()
+        self._condition = threading.Condition(threading.Lock())
+
+    @property
+    def abandoned(self):
+        """
+        Number of the abandoned calls still running
+        """
+        return len(self._abandoned)
+
+    def call(self, func, kwargs, deadline):
+        """
+        Call the `func(**kwargs)` on a worker thread within the deadline
+        """
+        future = futures.Future()
+        with self._condition:
+            if len(self._abandoned) >= self.limit:
+                raise errors.ServiceUnavailable()
+            while self.running >= self.workers:
+                remaining = deadline.remaining()
+                if not remaining:
+                    raise errors.GatewayTimeout()
+                self._condition.wait(remaining)
+            self.running += 1
+            if self.threads < self.running:
+                self._start()
+            self._tasks.put((future, func, kwargs))
+        try:
+            return future.result(deadline.remaining())
+        except futures.TimeoutError:
+            with self._condition:
+                if future.cancel():
+                    # Not started yet
+                    self.running -= 1
+                    self._condition.notify()
+                    raise errors.GatewayTimeout()
+                if future.done():
+                    return future.result()
+                self._abandoned.add(future)
+                self.running -= 1
+                self.threads -= 1
+                self._condition.notify()
+            raise errors.GatewayTimeout()
+
+    def shutdown(self, wait=True):
+        """
+        Stop the idle workers, wait for the running (not abandoned) calls if
+        `wait`
+        """
+        with self._condition:
+            for unused in range(self.threads):
+                self._tasks.put(None)
+            self.threads = 0
+            while wait and self.running:
+                self._condition.wait()
+
+    def _start(self):
+        thread = threading.Thread(target=self._work)
+        thread.daemon = True
+        thread.start()
+        self.threads += 1
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future, func, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(**kwargs))
+            except BaseException as ex:
+                future.set_exception(ex)
+            with self._condition:
+                self._condition.notify_all()
+                if future in self._abandoned:
+                    # Already replaced in the pool
+                    self._abandoned.discard(future)
+                    return
+                self.running -= 1
+
+
+def _get_event_loop():
+    """
+    Gives back the event loop of the current thread
+    """
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = _local.loop = asyncio.new_event_loop()
+    return loop
+
+
+def _call_coroutine(func, kwargs, deadline):
+    loop = _get_event_loop()
+    try:
+        coroutine = func(**kwargs)
+        if deadline is not None:
+            coroutine = asyncio.wait_for(coroutine, deadline.remaining())
+        return loop.run_until_complete(coroutine)
+    except asyncio.TimeoutError:
+        raise errors.GatewayTimeout()
@@ -65,6 +65,23 @@ class Error(Exception):
         """
         return self.status
 
+    def is_static(self):
+        """
+        Gives back `True` if the response of the error doesn't depend on the
+        context: the error has no arguments and details, has no own `schema`,
+        also the `get_message`, `get_details`, `get_headers` and `get_status`
+        are not overridden. The responses of static errors will be cached.
+        """
+        if self.args or self.details or self.schema is not None:
+            return False
+        cls = type(self)
+        for name in ('get_message', 'get_details', 'get_headers',
+                     'get_status'):
+            if six.get_unbound_function(getattr(cls, name)) is not \
+                    six.get_unbound_function(getattr(Error, name)):
+                return False
+        return True
+
     def get_message(self, debug=False):
         """
         Should give back a dictionary which will be threated the response body.
@@ -121,6 +138,71 @@ class ClientError(Error):
     status = 400
 
 
+class BadRequest(ClientError):
+    """
+    The request is malformed (eg. invalid pagination cursor).
+    """
+    error = 'bad_request'
+
+
+class Unauthorized(ClientError):
+    """
+    The request has no (or has invalid) credentials.
+    """
+    status = 401
+    error = 'unauthorized'
+    headers = {'WWW-Authenticate': 'Bearer'}
+
+
+class NotFound(ClientError):
+    """
+    The requested path doesn't match to any endpoint.
+    """
+    status = 404
+    error = 'not_found'
+
+
+class MethodNotAllowed(ClientError):
+    """
+    The requested path exists but not with the requested method.
+    The allowed methods will be given back in the `Allow` header.
+    """
+    status = 405
+    error = 'method_not_allowed'
+
+    def __init__(self, *args, **details):
+        allow = details.pop('allow', None)
+        super(MethodNotAllowed, self).__init__(*args, **details)
+        if allow:
+            self.headers = {'Allow': ', '.join(sorted(allow))}
+
+
+class UnprocessableEntity(ClientError):
+    """
+    The request is well-formed, but it can't be processed (eg. the
+    idempotency key was used by a different request).
+    """
+    status = 422
+    error = 'unprocessable_entity'
+
+
+class ServiceUnavailable(Error):
+    """
+    The application can't take the request now (eg. too many abandoned
+    endpoint calls are still running).
+    """
+    status = 503
+    error = 'service_unavailable'
+
+
+class GatewayTimeout(Error):
+    """
+    The endpoint couldn't finish before its deadline.
+    """
+    status = 504
+    error = 'gateway_timeout'
+
+
 class ValidationError(Error):
     status = 500
     error = 'validation_error'
@@ -153,19 +235,68 @@ class ErrorSchema(schema.Object):
     message = schema.String()
     details = DetailsSchema()
 
-    def dump(self, ex):
-        msg = ex.get_message(self['debug'])
-        return super(ErrorSchema, self).dump(msg)
+    def to_json(self, value):
+        if isinstance(value, Error):
+            value = value.get_message(self['debug'])
+        return super(ErrorSchema, self).to_json(value)
+
+
+#: Build function of the error responses
+_build = response.make_build('schema', returns='content')
 
 
 class ErrorResponse(response.Response):
+    """
+    Response of the errors. The responses of the static errors (check
+    :py:meth:`Error.is_static`) are cached by the application
+    (:py:attr:`.base.App.error_cache`).
+    """
 
     def setup(self):
         if not isinstance(self.content, Error):
             self.content = Error.wrap(self.content)
+        self.page = None
+        self.validation = self.opts.get(
+            'response_validation', self.app['response_validation']
+        )
         self.status = self.content.get_status()
-        self.headers = self.content.get_headers()
+        self.headers = dict(self.content.get_headers())
         if self.content.schema:
             self.processor = self.content.schema(debug=self.app['debug'])
         else:
             self.processor = ErrorSchema(debug=self.app['debug'])
+        self._build = _build
+        self.cache = getattr(self.app, 'error_cache', None)
+        self.cache_key = None
+        if self.cache is not None:
+            self.cache_key = self.get_cache_key()
+
+    def is_raw(self, content):
+        """
+        The errors are always dumped by the error schema, even if the
+        endpoint has the `content_type` option
+        """
+        return False
+
+    def get_cache_key(self):
+        """
+        Gives back the key of the cached response or `None` if the response
+        shouldn't be cached.
+        """
+        if self.app['debug'] or not self.content.is_static():
+            return None
+        return (
+            type(self.content), self.content.error, type(self.processor),
+            self.validation, self.status,
+            tuple(sorted(self.headers.items())),
+        )
+
+    def build(self):
+        if self.cache_key is None:
+            return super(ErrorResponse, self).build()
+        cached = self.cache.get(self.cache_key)
+        if cached is None:
+            cached = super(ErrorResponse, self).build()
+            self.cache.set(self.cache_key, cached)
+        content, status, headers = cached
+        return (content, status, headers.copy())
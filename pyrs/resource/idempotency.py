@@ -0,0 +1,119 @@
+"""
+Idempotent execution of endpoints.
+
+The endpoints with `idempotent=True` option are executed only once for the
+same :py:data:`.conf.idempotency_header` value of the same caller (the key
+is scoped by the endpoint and the authenticated identity, check
+:py:func:`make_key`), the local calls (eg. the batch calls) as well. The
+built `(content, status, headers)` is stored (see :py:mod:`.store`) with
+the fingerprint of the request, the retries are answered from the store,
+but a different request reusing the key is answered by `422`
+(:py:class:`.errors.UnprocessableEntity`).
+
+Concurrent duplicates (in the same process) wait for the running execution.
+Server errors (5xx) are not stored, so they can be retried: the waiting
+duplicates are executed one at a time. The raw and partial responses
+(check :py:func:`.response.is_storable`) aren't stored either.
+"""
+import hashlib
+import json
+import threading
+
+from . import errors
+from . import lib
+from . import response
+
+
+def make_key(endpoint, key, identity=None, local=False):
+    """
+    Gives back the stored key of the idempotency key, the results of the
+    `local` requests (not encoded) are stored separately
+    """
+    key = '%s:%s:%s' % (endpoint, identity or '', key)
+    if local:
+        return 'local|' + key
+    return key
+
+
+def fingerprint(*parts):
+    """
+    Gives back the hash of the request parts (eg. path, query and body)
+    """
+    return hashlib.sha256(json.dumps(
+        parts, sort_keys=True, default=repr
+    ).encode('utf-8')).hexdigest()
+
+
+class Idempotency(object):
+    """
+    :param store: Store of the results (check :py:mod:`.store`)
+    :param float timeout: Maximum waiting time (seconds) for the concurrent
+                          execution, `None` waits until it's finished
+    """
+
+    def __init__(self, store, timeout=None):
+        self.store = store
+        self.timeout = timeout
+        self._running = set()
+        self._condition = threading.Condition(threading.Lock())
+
+    def run(self, key, func, *args, **kwargs):
+        """
+        Gives back the stored result of the key or the result of the
+        `func(*args, **kwargs)` which will be stored. The `fingerprint`
+        keyword argument identifies the request, the stored result of a
+        different fingerprint raises :py:class:`.errors.UnprocessableEntity`.
+        """
+        fingerprint = kwargs.pop('fingerprint', None)
+        result = self.get(key, fingerprint)
+        if result is not None:
+            return result
+        running = self._acquire(key)
+        try:
+            result = self.get(key, fingerprint)
+            if result is not None:
+                return result
+            result = func(*args, **kwargs)
+            if result[1] < 500 and response.is_storable(result):
+                self.store.set(
+                    key, (fingerprint, response.copy_result(result))
+                )
+            return result
+        finally:
+            if running:
+                with self._condition:
+                    self._running.discard(key)
+                    self._condition.notify_all()
+
+    def get(self, key, fingerprint=None):
+        """
+        Gives back the stored result of the key or `None`
+        """
+        stored = self.store.get(key)
+        if stored is None:
+            return None
+        stored_fingerprint, result = stored
+        if fingerprint is not None and stored_fingerprint != fingerprint:
+            raise errors.UnprocessableEntity(
+                "The idempotency key was used by a different request"
+            )
+        return response.copy_result(result)
+
+    def _acquire(self, key):
+        """
+        Wait until the key isn't executed by others (or the timeout
+        expires), gives back `True` if the key is acquired
+        """
+        expires = None
+        if self.timeout is not None:
+            expires = lib.timer() + self.timeout
+        with self._condition:
+            while key in self._running:
+                remaining = None
+                if expires is not None:
+                    remaining = expires - lib.timer()
+                    if remaining <= 0:
+                        return False
+                self._condition.wait(remaining)
+            self._running.add(key)
+            return True
@@ -1,11 +1,22 @@
+import collections
+import datetime
+import importlib
 import inspect
+import json
 import logging
+import threading
+import time
 import traceback
 import sys
 
+from concurrent import futures
+import isodate
 
 from . import conf
 
+#: Clock used for measuring durations
+timer = getattr(time, 'perf_counter', time.time)
+
 
 def get_logger(obj):
     return logging.getLogger(get_fqname(obj))
@@ -37,6 +48,38 @@ def get_resource_members(resource):
     ]
 
 
+def import_modules(names):
+    """
+    Import the modules (eg. in the started worker processes)
+    """
+    for name in names:
+        importlib.import_module(name)
+
+
+class ProcessPoolExecutor(futures.ProcessPoolExecutor):
+    """
+    Process pool imports the `modules` in the worker before the calls: on
+    the first call of every worker (not when the worker starts), later the
+    imported modules are only looked up. Doesn't use the `initializer`
+    (Python 3.7+), so it works with the older versions and the `futures`
+    backport as well.
+    """
+
+    def __init__(self, max_workers=None, modules=()):
+        super(ProcessPoolExecutor, self).__init__(max_workers)
+        self.modules = tuple(modules)
+
+    def submit(self, fn, *args, **kwargs):
+        return super(ProcessPoolExecutor, self).submit(
+            _call_with_modules, self.modules, fn, args, kwargs
+        )
+
+
+def _call_with_modules(modules, func, args, kwargs):
+    import_modules(modules)
+    return func(*args, **kwargs)
+
+
 def get_config(update=None):
     config = {}
     for k in dir(conf):
@@ -46,6 +89,58 @@ def get_config(update=None):
     return config
 
 
+def dumps(value):
+    """
+    Encode the JSON compatible value (result of the `schema.to_json`) the same
+    way as the schema dump does, but without validation.
+    """
+    return json.dumps(value, default=_json_default)
+
+
+def _json_default(obj):
+    """
+    Encode the date and time values as the schema dump does
+    """
+    if isinstance(obj, datetime.datetime):
+        return isodate.datetime_isoformat(obj)
+    if isinstance(obj, datetime.date):
+        return isodate.date_isoformat(obj)
+    if isinstance(obj, datetime.time):
+        return isodate.time_isoformat(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    raise TypeError(obj)
+
+
+def sanitise_headers(headers, sensitive=None):
+    """
+    Gives back a copy of headers where the values of sensitive headers
+    (:py:data:`.conf.sensitive_headers` by default) are masked.
+    """
+    if sensitive is None:
+        sensitive = conf.sensitive_headers
+    sensitive = set(name.lower() for name in sensitive)
+    return dict(
+        (k, '***' if k.lower() in sensitive else v)
+        for k, v in (headers or {}).items()
+    )
+
+
+def get_header(headers, name, default=None):
+    """
+    Case insensitive lookup of the header
+    """
+    if not headers:
+        return default
+    if name in headers:
+        return headers[name]
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return default
+
+
 def get_traceback():
     unused, unused, exc_traceback = sys.exc_info()
     return parse_traceback(exc_traceback)
@@ -57,3 +152,83 @@ def parse_traceback(trace):
         rows.append("%s:%s %s() %s" % (row[0], row[1], row[2], row[3]))
     rows.reverse()
     return rows
+
+
+class LRU(object):
+    """
+    Thread safe, size bounded mapping. When the size limit reached the least
+    recently used item will be evicted.
+
+    :param int maxsize: Maximum number of stored items
+    :param float ttl: Optional time to live of the items in seconds
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires <= timer():
+                return default
+            self._data[key] = (value, expires)
+            return value
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = timer() + self.ttl
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            value, expires = self._data.pop(key, (default, None))
+            if expires is not None and expires <= timer():
+                return default
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        missing = object()
+        return self.get(key, missing) is not missing
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Trace(object):
+    """
+    Collects information about a dispatched request, the matched endpoint,
+    the response status and the duration of the dispatching phases.
+    """
+
+    def __init__(self):
+        self.endpoint = None
+        self.status = None
+        self.timings = collections.OrderedDict()
+        self.started = self._last = timer()
+
+    def lap(self, phase):
+        """
+        Record the duration of the phase (time since the previous lap)
+        """
+        now = timer()
+        self.timings[phase] = now - self._last
+        self._last = now
+
+    @property
+    def elapsed(self):
+        return self._last - self.started
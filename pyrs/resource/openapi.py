@@ -0,0 +1,213 @@
+"""
+OpenAPI (3.0) specification of the application.
+
+The specification is generated from the routing rules and the options of the
+endpoints: the path arguments, the `query` schema (as query parameters), the
+`request` schema (as request body) and the `response` schema. It's generated
+lazily, on the first use and kept serialised until the routing changes
+(:py:meth:`.base.App.add_rule`, :py:meth:`.base.App.remove`,
+:py:meth:`.base.App.mount`), so serving it costs only a lookup.
+
+When :py:data:`.conf.openapi_path` is set the specification is served on that
+path with `ETag` (the conditional requests are answered by `304`).
+Endpoints with `openapi=False` option are left out of the specification.
+"""
+import hashlib
+import inspect
+import json
+import re
+import threading
+
+from pyrs import schema
+
+from . import lib
+from . import resource
+from . import response
+
+_methods = ('get', 'put', 'post', 'delete', 'patch')
+
+#: Variable parts of the rules: `<converter(arguments):name>`
+_variable = re.compile(r'''
+    <
+    (?:
+        (?P<converter>[a-zA-Z_][a-zA-Z0-9_]*)
+        (?:\((?P<arguments>.*?)\))?
+        \:
+    )?
+    (?P<variable>[a-zA-Z_][a-zA-Z0-9_]*)
+    >
+''', re.VERBOSE)
+
+_types = {
+    'int': {'type': 'integer'},
+    'float': {'type': 'number'},
+    'uuid': {'type': 'string', 'format': 'uuid'},
+}
+
+
+class OpenAPI(object):
+    """
+    Lazily generated, cached specification of the application
+
+    :param app: The application (:py:class:`.base.App`)
+    :param str title: Title of the API
+    :param str version: Version of the API
+    """
+
+    def __init__(self, app, title='API', version='1.0.0'):
+        self.app = app
+        self.title = title
+        self.version = version
+        self._version = None
+        self._cached = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Gives back the serialised specification and its ETag
+        """
+        version = self.app.routing_version
+        cached = self._cached
+        if cached is not None and self._version == version:
+            return cached
+        with self._lock:
+            if self._cached is None or self._version != version:
+                body = json.dumps(
+                    self.build(self.app.rules), sort_keys=True, default=repr
+                ).encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                self._cached = (body, etag)
+                self._version = version
+            return self._cached
+
+    def build(self, rules=None):
+        """
+        Gives back the specification of the rules as dictionary
+        """
+        if rules is None:
+            rules = self.app.rules
+        paths = {}
+        for rule in rules.iter_rules():
+            opts = self.get_options(rule.endpoint)
+            if opts is None or opts.get('openapi') is False:
+                continue
+            path, parameters = convert_rule(rule)
+            item = paths.setdefault(path, {})
+            for method in sorted(rule.methods or ()):
+                if method.lower() not in _methods:
+                    continue
+                item[method.lower()] = self.build_operation(
+                    rule.endpoint, opts, parameters
+                )
+        return {
+            'openapi': '3.0.0',
+            'info': {'title': self.title, 'version': self.version},
+            'paths': paths,
+        }
+
+    def build_operation(self, endpoint, opts, parameters):
+        operation = {
+            'operationId': endpoint,
+            'parameters': list(parameters),
+            'responses': {},
+        }
+        doc = opts.get('description')
+        if doc:
+            operation['description'] = doc
+        query = get_schema(opts.get(self.app['query_schema_option']))
+        if query:
+            required = query.get('required', ())
+            for name, prop in query.get('properties', {}).items():
+                operation['parameters'].append({
+                    'name': name,
+                    'in': 'query',
+                    'required': name in required,
+                    'schema': prop,
+                })
+        body = get_schema(opts.get(self.app['body_schema_option']))
+        if body:
+            operation['requestBody'] = {
+                'required': True,
+                'content': {'application/json': {'schema': body}},
+            }
+        result = {'description': 'Successful response'}
+        content_type = opts.get('content_type')
+        output = opts.get(self.app['option_response_name'])
+        if opts.get('paginate'):
+            output = response.get_page_processor(get_processor(output))
+        output = get_schema(output)
+        if content_type:
+            result['content'] = {content_type: {}}
+        elif output:
+            result['content'] = {'application/json': {'schema': output}}
+        status = opts.get(self.app['option_status_name'], 200)
+        operation['responses'][str(status)] = result
+        return operation
+
+    def get_options(self, endpoint):
+        """
+        Gives back the options of the endpoint (the mounted ones as well)
+        or `None` if it's already removed
+        """
+        app, name = self.app.mounts.get(endpoint, (self.app, endpoint))
+        func = app.functions.get(name)
+        if func is None:
+            return None
+        opts = dict(lib.get_options(func))
+        if 'description' not in opts and inspect.getdoc(func):
+            opts['description'] = inspect.getdoc(func)
+        return opts
+
+
+def convert_rule(rule):
+    """
+    Gives back the OpenAPI path template and the path parameters of the
+    werkzeug rule
+    """
+    parameters = []
+
+    def convert(match):
+        converter, variable = match.group('converter', 'variable')
+        parameters.append({
+            'name': variable,
+            'in': 'path',
+            'required': True,
+            'schema': dict(_types.get(converter, {'type': 'string'})),
+        })
+        return '{%s}' % variable
+    return _variable.sub(convert, rule.rule), parameters
+
+
+def get_processor(processor):
+    """
+    Gives back the instance of the schema processor (class or instance)
+    """
+    if inspect.isclass(processor) and issubclass(processor, schema.Schema):
+        return processor()
+    return processor
+
+
+def get_schema(processor):
+    """
+    Gives back the JSON schema of the schema processor or `None`
+    """
+    processor = get_processor(processor)
+    if isinstance(processor, schema.Schema):
+        return processor.get_schema()
+    return None
+
+
+@resource.GET(
+    name='openapi', openapi=False, content_type='application/json',
+    inject_app='app', inject_request='request', inject_query=False,
+    inject_body=False
+)
+def spec(app, request):
+    """
+    Serves the OpenAPI specification of the application
+    """
+    body, etag = app.openapi.get()
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if lib.get_header(request.headers, 'If-None-Match') == etag:
+        return (b'', 304, headers)
+    return (body, 200, headers)
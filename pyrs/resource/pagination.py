@@ -0,0 +1,149 @@
+"""
+Cursor based pagination for list endpoints.
+
+An endpoint decorated with the `paginate=True` option receives the `cursor`
+and `limit` keyword arguments (taken out of the query) and can give back:
+
+- any iterable (even a lazy one), in this case the cursor is the offset of
+  the first item, only `limit` (+1 for look-ahead) items will be consumed,
+- a callable page fetcher `fetch(cursor, limit)` which should give back an
+  `(items, next_cursor)` tuple, where `next_cursor` should be JSON
+  serialisable or `None` if there is no more page.
+
+The response will be an envelope `{'items': [...], 'next': cursor}` where the
+next cursor is opaque for the client. The `response` schema of the endpoint
+describes the items (check :py:func:`page_schema`), the field selection is
+applied on the items.
+
+Malformed cursors are answered by `400` (:py:class:`.errors.BadRequest`).
+"""
+import base64
+import itertools
+import json
+
+from pyrs import schema
+
+from . import lib
+
+#: Page schemas keyed by the item schema
+_pages = lib.LRU(256)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ItemsSchema(schema.Array):
+    """
+    Array of the items described by the `item` schema
+    """
+
+    def __init__(self, item=None, **attrs):
+        super(ItemsSchema, self).__init__(**attrs)
+        self.item = item
+
+    def make_schema(self):
+        result = super(ItemsSchema, self).make_schema()
+        if self.item is not None:
+            result['items'] = self.item.get_schema()
+        return result
+
+    def to_json(self, value):
+        if value is None or self.item is None:
+            return value
+        return [self.item.to_json(item) for item in value]
+
+
+class PageSchema(schema.Object):
+    """
+    Default schema of the paged envelope
+    """
+    items = ItemsSchema(required=True)
+    next = schema.String(null=True)
+
+
+def page_schema(item=None):
+    """
+    Gives back the schema of the paged envelope where the items are
+    described by the `item` schema (class or instance). The page schemas
+    are cached by the item schema.
+    """
+    if item is None:
+        return PageSchema()
+    page = _pages.get(item)
+    if page is not None:
+        return page
+    page = type('Page', (PageSchema,), {
+        '__doc__': PageSchema.__doc__,
+        'items': ItemsSchema(
+            item() if isinstance(item, type) else item, required=True
+        ),
+    })()
+    _pages.set(item, page)
+    return page
+
+
+def encode_cursor(value):
+    """
+    Gives back the opaque representation of the cursor value
+    """
+    if value is None:
+        return None
+    raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Gives back the original value of the opaque cursor.
+    Raises :py:class:`InvalidCursor` if the cursor is malformed (or it's a
+    negative offset).
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(
+            str(cursor) + '=' * (-len(cursor) % 4)
+        )
+        value = json.loads(raw.decode('utf-8'))
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor: %s" % cursor)
+    if _is_offset(value) and value < 0:
+        raise InvalidCursor("Invalid cursor: %s" % cursor)
+    return value
+
+
+def parse_limit(value, default, maximum):
+    """
+    Gives back the validated page size. Raises `ValueError` if the value is
+    not a positive integer or greater than the maximum.
+    """
+    if value is None:
+        return default
+    limit = int(value)
+    if limit < 1 or limit > maximum:
+        raise ValueError("Limit should be between 1 and %s" % maximum)
+    return limit
+
+
+def paginate(content, cursor, limit):
+    """
+    Gives back the paged envelope of the content (iterable or page fetcher).
+    """
+    if callable(content):
+        items, next_cursor = content(cursor, limit)
+        items = list(items)
+    else:
+        offset = cursor or 0
+        if not _is_offset(offset) or offset < 0:
+            raise InvalidCursor("Invalid cursor: %s" % cursor)
+        items = list(itertools.islice(content, offset, offset + limit + 1))
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = offset + limit
+    return {'items': items, 'next': encode_cursor(next_cursor)}
+
+
+def _is_offset(value):
+    return isinstance(value, int) and not isinstance(value, bool)
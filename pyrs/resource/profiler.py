@@ -0,0 +1,132 @@
+"""
+Opt-in profiling of the dispatched requests.
+
+When the :py:data:`.conf.profile` enabled, the sampled requests
+(:py:data:`.conf.profile_rate`) are executed under `cProfile`. The profile of
+the requests slower than :py:data:`.conf.profile_threshold` will be stored in
+:py:data:`.conf.profile_dir`. Requests having the
+:py:data:`.conf.profile_header` header with the value of
+:py:data:`.conf.profile_secret` are always profiled and stored (the header is
+ignored when there is no secret).
+
+Every stored profile has two files with the same base name: the `.prof` file
+is a `pstats` dump, the `.json` file contains the endpoint name, the phase
+timings and the request, where the :py:data:`.conf.sensitive_headers` are
+masked.
+
+Only one request is profiled at a time (since Python 3.12 the profilers of
+the process can't be active at once), the concurrent requests are executed
+without profiling.
+"""
+import cProfile
+import hmac
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from . import lib
+
+#: Held by the profiled request of the process
+_lock = threading.Lock()
+
+
+class Profiler(object):
+    """
+    :param str directory: Where the profiles will be stored
+    :param float rate: Rate of profiled requests
+    :param float threshold: Minimum duration (seconds) of stored requests
+    :param str header: Header which forces the profiling
+    :param str secret: Value of the header which forces the profiling,
+                       `None` disables the forcing
+    :param list sensitive: Masked headers, `None` means
+                           :py:data:`.conf.sensitive_headers`
+    """
+
+    def __init__(self, directory=None, rate=1.0, threshold=0.5, header=None,
+                 secret=None, sensitive=None):
+        self.directory = directory or tempfile.gettempdir()
+        self.rate = rate
+        self.threshold = threshold
+        self.header = header
+        self.secret = secret
+        self.sensitive = sensitive
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            directory=config['profile_dir'],
+            rate=config['profile_rate'],
+            threshold=config['profile_threshold'],
+            header=config['profile_header'],
+            secret=config['profile_secret'],
+            sensitive=config['sensitive_headers'],
+        )
+
+    def is_forced(self, headers):
+        if not self.header or not self.secret:
+            return False
+        value = lib.get_header(headers, self.header)
+        if value is None:
+            return False
+        return hmac.compare_digest(str(value), str(self.secret))
+
+    def run(self, trace, request, func, *args, **kwargs):
+        """
+        Call the `func(*args, **kwargs)`, profile and store if necessary.
+        The `request` is a dictionary (`path`, `method`, `query`, `headers`)
+        describes the dispatched request.
+        """
+        forced = self.is_forced(request.get('headers'))
+        if not forced and random.random() >= self.rate:
+            return func(*args, **kwargs)
+        if not _lock.acquire(False):
+            return func(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiling tool is active (Python 3.12+)
+                return func(*args, **kwargs)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profile.disable()
+        finally:
+            _lock.release()
+        if forced or trace.elapsed >= self.threshold:
+            request = dict(request)
+            request['headers'] = lib.sanitise_headers(
+                request.get('headers'), self.sensitive
+            )
+            self.save(profile, trace, request)
+        return result
+
+    def save(self, profile, trace, request):
+        """
+        Store the profile and the information about the request.
+        Gives back the base path of the stored files.
+        """
+        name = '%s-%s-%s' % (
+            time.strftime('%Y%m%d%H%M%S'),
+            (trace.endpoint or 'unmatched').replace('#', '.'),
+            os.getpid(),
+        )
+        base = os.path.join(self.directory, name)
+        suffix = 0
+        while os.path.exists(base + '.prof'):
+            suffix += 1
+            base = os.path.join(self.directory, '%s-%s' % (name, suffix))
+        profile.dump_stats(base + '.prof')
+        with open(base + '.json', 'w') as f:
+            json.dump({
+                'endpoint': trace.endpoint,
+                'status': trace.status,
+                'elapsed': trace.elapsed,
+                'timings': trace.timings,
+                'request': request,
+            }, f, indent=2, default=repr)
+        return base
@@ -0,0 +1,262 @@
+"""
+Record and replay the traffic of an application.
+
+When :py:data:`.conf.record` is set (path of an NDJSON file) the
+:py:meth:`.base.App.dispatch` writes the sampled requests
+(:py:data:`.conf.record_rate`) into the file, one JSON document per line
+with the `path`, `method`, `query`, `body`, `headers`, `endpoint`, `status`,
+`latency` and `time` of the request. The :py:data:`.conf.sensitive_headers`
+are masked. The lines are written by a background thread (check
+:py:mod:`.accesslog`), so the requests don't wait for the disk.
+
+The recording can be fed back by :py:func:`replay` (or from command line:
+`python -m pyrs.resource.replay recording.ndjson package.module:app`) through
+an :py:class:`.base.App` in-process or through any WSGI application.
+"""
+import argparse
+import collections
+import importlib
+import json
+import random
+import threading
+import time
+
+from six.moves import queue
+import werkzeug.test
+
+from . import accesslog
+from . import lib
+
+
+class Recorder(accesslog.AccessLog):
+    """
+    Writes the sampled requests into an NDJSON file.
+
+    :param str path: Path of the recording (opened for append)
+    :param float rate: Rate of the recorded requests
+    :param list sensitive: Masked headers, `None` means
+                           :py:data:`.conf.sensitive_headers`
+    :param int queue_size: Maximum number of waiting records
+    """
+
+    def __init__(self, path, rate=1.0, sensitive=None, queue_size=10000):
+        super(Recorder, self).__init__(queue_size=queue_size)
+        self.path = path
+        self.rate = rate
+        self.sensitive = sensitive
+        self._file = open(path, 'a')
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['record'], rate=config['record_rate'],
+            sensitive=config['sensitive_headers'],
+        )
+
+    def record(self, trace, path, method, query, body, headers):
+        """
+        Queue the request if it's sampled, gives back `False` if it's
+        dropped (never blocks)
+        """
+        if random.random() >= self.rate:
+            return False
+        return self.put(json.dumps({
+            'time': time.time() - trace.elapsed,
+            'path': path,
+            'method': method,
+            'query': query,
+            'body': body,
+            'headers': lib.sanitise_headers(headers, self.sensitive),
+            'endpoint': trace.endpoint,
+            'status': trace.status,
+            'latency': trace.elapsed,
+        }, default=repr))
+
+    def write(self, records):
+        self._file.write(''.join(line + '\n' for line in records))
+        self._file.flush()
+
+    def close(self):
+        """
+        Close the file after the queued records are written
+        """
+        super(Recorder, self).close()
+        self._file.close()
+
+
+def load(path):
+    """
+    Gives back the recorded requests of the NDJSON file
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Report(object):
+    """
+    Result of the replay: throughput and latency distribution per endpoint,
+    the number of failed requests per endpoint and exception type
+    """
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.statuses = collections.defaultdict(collections.Counter)
+        self.errors = collections.defaultdict(collections.Counter)
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, status, latency):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+
+    def add_error(self, endpoint, ex):
+        with self._lock:
+            self.errors[endpoint][type(ex).__name__] += 1
+
+    @property
+    def failed(self):
+        return sum(sum(values.values()) for values in self.errors.values())
+
+    @property
+    def total(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def throughput(self):
+        if not self.duration:
+            return 0.0
+        return self.total / self.duration
+
+    def percentiles(self, endpoint, points=(50, 90, 99, 100)):
+        values = sorted(self.latencies[endpoint])
+        return collections.OrderedDict(
+            (p, values[min(len(values) - 1, int(len(values) * p / 100.0))])
+            for p in points
+        )
+
+    def format(self):
+        rows = [
+            'requests: %s, errors: %s, duration: %.3fs, '
+            'throughput: %.1f req/s' % (
+                self.total, self.failed, self.duration, self.throughput
+            )
+        ]
+        for endpoint in sorted(self.latencies, key=str):
+            latency = ', '.join(
+                'p%s=%.2fms' % (p, value * 1000)
+                for p, value in self.percentiles(endpoint).items()
+            )
+            rows.append('%s: count=%s %s statuses=%s' % (
+                endpoint, len(self.latencies[endpoint]), latency,
+                dict(self.statuses[endpoint])
+            ))
+        for endpoint in sorted(self.errors, key=str):
+            rows.append('%s: errors=%s' % (
+                endpoint, dict(self.errors[endpoint])
+            ))
+        return '\n'.join(rows)
+
+
+def replay(target, records, concurrency=1, rate=None):
+    """
+    Feed back the recorded requests and gives back a :py:class:`Report`.
+
+    :param target: :py:class:`.base.App` (dispatched in-process) or a WSGI
+                   application
+    :param records: Recorded requests or the path of the recording
+    :param int concurrency: Number of concurrent workers
+    :param float rate: Multiplier of the original pace of requests,
+                       `None` means as fast as possible
+    """
+    if not isinstance(records, (list, tuple)):
+        records = load(records)
+    if hasattr(target, 'dispatch'):
+        send = _dispatcher(target)
+    else:
+        send = _wsgi_sender(target)
+    report = Report()
+    tasks = queue.Queue()
+    first = min(r.get('time', 0) for r in records) if records else 0
+    for record in records:
+        tasks.put(record)
+
+    started = lib.timer()
+
+    def worker():
+        while True:
+            try:
+                record = tasks.get_nowait()
+            except queue.Empty:
+                return
+            if rate:
+                delay = (record.get('time', first) - first) / rate
+                wait = started + delay - lib.timer()
+                if wait > 0:
+                    time.sleep(wait)
+            begin = lib.timer()
+            try:
+                endpoint, status = send(record)
+            except Exception as ex:
+                report.add_error(record.get('endpoint'), ex)
+                continue
+            report.add(endpoint, status, lib.timer() - begin)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.duration = lib.timer() - started
+    return report
+
+
+def _dispatcher(app):
+    def send(record):
+        trace = lib.Trace()
+        content, status, headers = app._dispatch(
+            trace, record['path'], record['method'], record.get('query'),
+            record.get('body'), record.get('headers'), None, None
+        )
+        return trace.endpoint, status
+    return send
+
+
+def _wsgi_sender(wsgi):
+    def send(record):
+        environ = werkzeug.test.EnvironBuilder(
+            path=record['path'], method=record['method'],
+            query_string=record.get('query'), headers=record.get('headers'),
+            json=record.get('body'),
+        ).get_environ()
+        app_iter, status, headers = werkzeug.test.run_wsgi_app(
+            wsgi, environ, buffered=True
+        )
+        return record.get('endpoint'), int(status.split()[0])
+    return send
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Replay a recorded traffic through an application'
+    )
+    parser.add_argument('recording', help='Path of the NDJSON recording')
+    parser.add_argument(
+        'target', help='App or WSGI application, eg. package.module:app'
+    )
+    parser.add_argument('-c', '--concurrency', type=int, default=1)
+    parser.add_argument(
+        '-r', '--rate', type=float, default=None,
+        help='Multiplier of the original pace (default: no pacing)'
+    )
+    args = parser.parse_args(argv)
+    module, name = args.target.split(':')
+    target = getattr(importlib.import_module(module), name)
+    report = replay(
+        target, args.recording, concurrency=args.concurrency, rate=args.rate
+    )
+    print(report.format())
+
+
+if __name__ == '__main__':
+    main()
@@ -11,49 +11,131 @@ import inspect
 from pyrs import schema
 import jsonschema
 
+from . import bulk
+from . import coercion
 from . import lib
 from . import errors
+from . import pagination
+from . import response
+from . import tasks
 
 
 class Request(object):
 
     def __init__(
         self, opts, app=None, path=None, query=None, body=None, headers=None,
-        auth=None, cookies=None, session=None
+        auth=None, cookies=None, session=None, deadline=None, local=False
     ):
         self.app = app or lib.get_config()
         self.auth = auth
         self.body = body or {}
         self.cookies = cookies
+        self.deadline = deadline
         self.headers = headers or {}
+        #: Dispatched by the local client (check :py:mod:`.client`)
+        self.local = local
         self.opts = opts
         self.path = path or {}
         self.query = query or {}
         self.session = session
 
+        self._setup_fields()
+        self._setup_page()
         self._setup_injects()
 
     def build(self):
         kwargs = {}
         kwargs.update(self._inject(
             self._inject_body, self.body,
-            self.opts.get(self.app['body_schema_option'], None)
+            self.opts.get(self.app['body_schema_option'], None),
+            self._parse_bulk if self.opts.get('bulk') else None
         ))
         kwargs.update(self._inject(self._inject_path, self.path))
         kwargs.update(self._inject(
             self._inject_query, self.query,
-            self.opts.get(self.app['query_schema_option'], None)
+            self.opts.get(self.app['query_schema_option'], None),
+            self._parse_query
         ))
         kwargs.update(self._inject(self._inject_app, self.app))
         kwargs.update(self._inject(self._inject_auth, self.auth))
         kwargs.update(self._inject(self._inject_cookies, self.cookies))
         kwargs.update(self._inject(self._inject_request, self))
         kwargs.update(self._inject(self._inject_session, self.session))
+        kwargs.update(self._inject(self._inject_fields, self.fields))
+        kwargs.update(self._inject(self._inject_tasks, self.tasks))
+        kwargs.update(self._inject(self._inject_deadline, self.deadline))
+        if self.page is not None:
+            kwargs[self.app['paginate_cursor_name']] = self.page[0]
+            kwargs[self.app['paginate_limit_name']] = self.page[1]
         return kwargs
 
     def __getitem__(self, name):
         return self.headers[name]
 
+    def _setup_fields(self):
+        """
+        Take out the field selection from the query if the response of the
+        endpoint can be projected. The :py:attr:`fields` will be the tuple of
+        the selected field names or `None`.
+        """
+        self.fields = None
+        name = self.app['fields_query_name']
+        processor = self.opts.get(self.app['option_response_name'])
+        if not name or name not in self.query:
+            return
+        if not response.is_projectable(processor):
+            return
+        value = self._pop_query(name)
+        try:
+            self.fields = response.parse_fields(processor, value) or None
+        except ValueError as ex:
+            raise errors.InputValidationError(cause=ex)
+
+    def _setup_page(self):
+        """
+        Take out the cursor and limit from the query of paginated endpoints.
+        The :py:attr:`page` will be the `(cursor, limit)` tuple or `None`.
+        """
+        self.page = None
+        if not self.opts.get('paginate'):
+            return
+        cursor = self._pop_single_query(self.app['paginate_cursor_name'])
+        limit = self._pop_single_query(self.app['paginate_limit_name'])
+        try:
+            cursor = pagination.decode_cursor(cursor)
+        except pagination.InvalidCursor as ex:
+            raise errors.BadRequest(str(ex), cause=ex)
+        try:
+            self.page = (
+                cursor,
+                pagination.parse_limit(
+                    limit, self.app['paginate_limit'],
+                    self.app['paginate_max_limit']
+                )
+            )
+        except (TypeError, ValueError) as ex:
+            raise errors.InputValidationError(cause=ex)
+
+    def _pop_single_query(self, name):
+        """
+        Take out the query parameter expected at most once (the repeated
+        parameters are lists)
+        """
+        value = self._pop_query(name)
+        if isinstance(value, (list, tuple)):
+            raise errors.InputValidationError(
+                "The %s query parameter is repeated" % name
+            )
+        return value
+
+    def _pop_query(self, name):
+        if name not in self.query:
+            return None
+        query = dict(self.query)
+        value = query.pop(name)
+        self.query = query
+        return value
+
     def _setup_injects(self):
         self._inject_body = self._get_inject('inject_body', False)
         self._inject_path = self._get_inject('inject_path', False)
@@ -64,6 +146,10 @@ class Request(object):
         self._inject_cookies = self._get_inject('inject_cookies', True)
         self._inject_request = self._get_inject('inject_request', True)
         self._inject_session = self._get_inject('inject_session', True)
+        self._inject_fields = self._get_inject('inject_fields', True)
+        self._inject_tasks = self._get_inject('inject_tasks', True)
+        self.tasks = tasks.Tasks() if self._inject_tasks else None
+        self._inject_deadline = self._get_inject('inject_deadline', True)
 
     def _get_inject(self, name, force_kwargs=False):
         inject = self.opts.get(
@@ -73,9 +159,9 @@ class Request(object):
             inject = self.app[name+'_name']
         return inject
 
-    def _inject(self, inject, value, opt=None):
+    def _inject(self, inject, value, opt=None, parse=None):
         if inject:
-            value = self._parse_value(value, opt)
+            value = (parse or self._parse_value)(value, opt)
             if inject is True:
                 return value
             else:
@@ -96,3 +182,46 @@ class Request(object):
             except jsonschema.exceptions.ValidationError as ex:
                 raise errors.InputValidationError(cause=ex)
         return value
+
+    def _parse_bulk(self, value, opt):
+        """Parse the array body of the bulk endpoints.
+        The items are loaded by the schema in chunks, check :py:mod:`.bulk`
+        """
+        if not value:
+            return []
+        if not isinstance(value, list):
+            raise errors.InputValidationError("Array expected")
+        if not (inspect.isclass(opt) and issubclass(opt, schema.Object) or
+                isinstance(opt, schema.Object)):
+            return value
+        executor = None
+        if self.opts.get('bulk_parallel', self.app['bulk_parallel']):
+            executor = self.app.process_executor
+        return bulk.load(
+            opt, value,
+            chunk_size=self.opts.get(
+                'bulk_chunk_size', self.app['bulk_chunk_size']
+            ),
+            max_errors=self.opts.get(
+                'bulk_max_errors', self.app['bulk_max_errors']
+            ),
+            executor=executor
+        )
+
+    def _parse_query(self, value, opt):
+        """Parse the query based on options.
+        If the option is `schema.Object` (instance or subclass), the query
+        parameters will be converted by the compiled coercer of the schema.
+        Otherwise the same as the :py:meth:`_parse_value`
+        """
+        if inspect.isclass(opt) and issubclass(opt, schema.Object) or \
+                isinstance(opt, schema.Object):
+            try:
+                return coercion.get_coercer(opt)(value)
+            except coercion.CoercionError as ex:
+                raise errors.InputValidationError(
+                    cause=ex, parameters=ex.errors
+                )
+            except jsonschema.exceptions.ValidationError as ex:
+                raise errors.InputValidationError(cause=ex)
+        return self._parse_value(value, opt)
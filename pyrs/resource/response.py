@@ -1,50 +1,472 @@
+import collections
+import copy
 import inspect
+import io
+import mmap
+import os
+import random
 
 from pyrs import schema
+import jsonschema
+import six
+import werkzeug.http
 
 from . import lib
+from . import pagination
+
+#: Projected schemas keyed by `(processor, fields)`
+_projections = lib.LRU(256)
+
+
+class Builder(object):
+    """
+    Response settings of an endpoint resolved once, when the endpoint is
+    added to the application (check :py:attr:`.base.App.builders`): the
+    processor instance (so its validator is compiled once), the default
+    status, the headers and the validation mode. The `build` (and the
+    `local_build`) is the build function of the responses specialised to the
+    endpoint (check :py:func:`make_build`).
+    """
+
+    def __init__(self, app, opts):
+        self.opts = opts
+        processor = opts.get(app['option_response_name'])
+        if inspect.isclass(processor):
+            processor = processor()
+        self.processor = processor
+        self.page_processor = None
+        if opts.get('paginate'):
+            self.page_processor = get_page_processor(processor)
+        self.status = opts.get(
+            app['option_status_name'], app['option_status']
+        )
+        self.headers = dict(opts.get(app['option_headers_name'], {}))
+        self.validation = opts.get(
+            'response_validation', app['response_validation']
+        )
+        self.raw = 'content_type' in opts
+        kind = get_kind(
+            self.page_processor or processor, self.raw
+        )
+        page = bool(opts.get('paginate'))
+        returns = opts.get('returns')
+        self.build = make_build(kind, page, returns=returns)
+        self.local_build = make_build(kind, page, True, returns)
 
 
 class Response(object):
     """Generic response class"""
 
-    def __init__(self, content, app=None, opts=None, request=None):
+    def __init__(self, content, app=None, opts=None, request=None,
+                 builder=None):
         self.content = content
         self.app = app or lib.get_config()
         self.opts = opts or {}
         self.request = request
+        self.builder = builder
         self.setup()
 
     def setup(self):
-        self.processor = self.opts.get(
-            self.app['option_response_name']
-        )
-        if inspect.isclass(self.processor):
-            self.processor = self.processor()
-        self.status = self.opts.get(
-            self.app['option_status_name'], self.app['option_status']
+        builder = self.builder
+        if builder is None:
+            builder = self.builder = Builder(self.app, self.opts)
+        self.processor = builder.processor
+        self.status = builder.status
+        self.headers = dict(builder.headers)
+        self.validation = builder.validation
+        self.page = None
+        self._build = builder.build
+        request = self.request
+        if request is None:
+            return
+        if request.local:
+            self._build = builder.local_build
+        self.page = request.page
+        if request.fields:
+            self.processor = project(self.processor, request.fields)
+        if self.page is not None:
+            if request.fields or builder.page_processor is None:
+                self.processor = get_page_processor(self.processor)
+            else:
+                self.processor = builder.page_processor
+
+    def build(self):
+        """
+        Gives back the `(content, status, headers)` of the response
+        """
+        return self._build(self, self.content, self.status, self.headers)
+
+    def is_raw(self, content):
+        """
+        Gives back `True` if the content should be passed to the server
+        untouched: buffers (`memoryview`, `bytearray`, `mmap`), files or any
+        content of endpoints having the `content_type` option.
+        """
+        if self.builder is not None and self.builder.raw:
+            return True
+        return isinstance(content, RAW_TYPES) or hasattr(content, 'read')
+
+    def build_raw(self, content, status, headers):
+        """
+        Gives back the raw content (or :py:class:`FileRange` of files)
+        without copying. Single byte range requests (`Range` header) are
+        answered by `206 Partial Content` (or `416` if not satisfiable).
+        """
+        headers.setdefault(
+            'Content-Type',
+            self.opts.get('content_type', 'application/octet-stream')
         )
-        self.headers = self.opts.get(
-            self.app['option_headers_name'], {}
+        headers['Accept-Ranges'] = 'bytes'
+        if isinstance(content, six.text_type):
+            content = content.encode('utf-8')
+        if hasattr(content, 'read'):
+            content = FileRange(content)
+        if isinstance(content, memoryview) and hasattr(content, 'cast'):
+            content = content.cast('B')
+        length = len(content)
+        header = lib.get_header(
+            getattr(self.request, 'headers', None), 'Range'
         )
+        ranges = werkzeug.http.parse_range_header(header) if header else None
+        if ranges is not None and 200 <= status < 300:
+            window = ranges.range_for_length(length)
+            if window is None:
+                headers['Content-Range'] = 'bytes */%s' % length
+                headers['Content-Length'] = '0'
+                return (b'', 416, headers)
+            start, stop = window
+            if isinstance(content, FileRange):
+                content = content.slice(start, stop)
+            else:
+                content = memoryview(content)[start:stop]
+            headers['Content-Range'] = 'bytes %s-%s/%s' % (
+                start, stop - 1, length
+            )
+            status = 206
+            length = stop - start
+        headers['Content-Length'] = str(length)
+        return (content, status, headers)
 
-    def build(self):
-        status = self.status
-        headers = self.headers.copy()
-        content = self.content
+    def dump(self, content):
+        """
+        Dump the content by the schema processor. The validation depends on
+        the :py:data:`.conf.response_validation` mode, except the schemas
+        overriding the `dump` which are dumped by their own `dump`.
+        """
+        if overrides_dump(self.processor):
+            return self.processor.dump(content)
+        return lib.dumps(self.convert(content))
+
+    def convert(self, content):
+        """
+        Gives back the JSON compatible value of the content (not encoded)
+        validated by the :py:data:`.conf.response_validation` mode
+        """
+        value = self.processor.to_json(content)
+        if self.validation == 'full':
+            self.processor.validate_json(value)
+        elif self.validation == 'sampled' and \
+                random.random() < self.app['response_validation_rate']:
+            try:
+                self.processor.validate_json(value)
+            except jsonschema.exceptions.ValidationError as ex:
+                lib.get_logger(self).warning(
+                    "Invalid response of %s: %s",
+                    self.opts.get('name'), ex.message
+                )
+        return value
+
+
+class FileRange(object):
+    """
+    Part of an open file, starts from the current position of the file
+    (or from the `offset`). Has `fileno`, so the servers can send it by
+    `sendfile` (the file is positioned to the start of the range).
+
+    :param file: Open file (binary mode)
+    :param int offset: Start position, default is the current position
+    :param int length: Length of the range, default is until the end of file
+    """
+
+    def __init__(self, file, offset=None, length=None):
+        self.file = file
+        if offset is None:
+            offset = file.tell()
+        if length is None:
+            length = _get_size(file) - offset
+        self.offset = offset
+        self.length = length
+        self._remaining = length
+        file.seek(offset)
+
+    def slice(self, start, stop):
+        return FileRange(self.file, self.offset + start, stop - start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self.file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        while True:
+            data = self.read(io.DEFAULT_BUFFER_SIZE)
+            if not data:
+                return
+            yield data
+
+    def __len__(self):
+        return self.length
+
+    def close(self):
+        self.file.close()
+
+
+#: Content types passed to the server untouched
+RAW_TYPES = (memoryview, bytearray, mmap.mmap, FileRange)
+
+
+def copy_result(result):
+    """
+    Gives back a copy of the built `(content, status, headers)`, the content
+    of the local requests (JSON compatible value) is copied as well
+    """
+    content, status, headers = result
+    return (copy.deepcopy(content), status, dict(headers))
+
+
+def is_storable(result):
+    """
+    Gives back `True` if the built `(content, status, headers)` can be
+    stored and given back later (by the response cache or the idempotency
+    store): the raw contents (buffers and open files) are consumed by the
+    server and the partial (range) responses depend on the `Range` header.
+    """
+    content, status, headers = result
+    if status == 206 or 'Content-Range' in headers:
+        return False
+    return not (isinstance(content, RAW_TYPES) or hasattr(content, 'read'))
+
+
+def _get_size(file):
+    try:
+        return os.fstat(file.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        position = file.tell()
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(position)
+        return size
+
+
+class Projection(object):
+    """
+    Mixin of the projected schemas, drops the values of the not selected
+    fields before dumping.
+    """
+
+    def to_json(self, value):
+        if isinstance(value, dict):
+            value = dict(
+                (k, v) for k, v in value.items() if k in self._fields
+            )
+        return super(Projection, self).to_json(value)
+
+
+def overrides_dump(processor):
+    """
+    Gives back `True` if the schema processor has its own `dump`
+    """
+    return six.get_unbound_function(type(processor).dump) is not \
+        six.get_unbound_function(schema.Schema.dump)
+
+
+def get_kind(processor, raw=False):
+    """
+    Gives back the kind of the response processing: `'raw'`, `'schema'`,
+    `'callable'` or `'plain'`
+    """
+    if raw:
+        return 'raw'
+    if isinstance(processor, schema.Schema):
+        return 'schema'
+    if callable(processor):
+        return 'callable'
+    return 'plain'
+
+
+def make_build(kind, page=False, local=False, returns=None):
+    """
+    Gives back the `build(response, content, status, headers)` function of
+    the responses, composed only of the steps apply to the endpoint:
+
+    - the return value is interpreted by :py:func:`unpack` (the `returns`
+      option of the endpoint: `'content'` means it's never a tuple, `'tuple'`
+      means it's always a tuple, by default the tuples are unpacked),
+    - the content is paged (:py:func:`.pagination.paginate`),
+    - the content is processed by the `kind`
+      (check :py:func:`get_kind`), the schema processed content of `local`
+      requests is converted but not encoded.
+    """
+    build = _outputs[kind]
+    if kind == 'schema' and local:
+        build = _convert
+    if page:
+        build = _paged(build)
+    if returns == 'tuple':
+        build = _unpacked(build)
+    elif returns != 'content':
+        build = _unpacked_tuple(build)
+    return build
+
+
+def _raw(response, content, status, headers):
+    return response.build_raw(content, status, headers)
+
+
+def _dump(response, content, status, headers):
+    headers['Content-Type'] = 'application/json'
+    return (response.dump(content), status, headers)
+
+
+def _convert(response, content, status, headers):
+    return (response.convert(content), status, headers)
+
+
+def _call(response, content, status, headers):
+    if response.is_raw(content):
+        return response.build_raw(content, status, headers)
+    return response.processor(content, status, headers)
+
+
+def _plain(response, content, status, headers):
+    if response.is_raw(content):
+        return response.build_raw(content, status, headers)
+    return (content, status, headers)
+
+
+_outputs = {
+    'raw': _raw,
+    'schema': _dump,
+    'callable': _call,
+    'plain': _plain,
+}
+
+
+def _paged(build):
+    def paged(response, content, status, headers):
+        if response.page is not None:
+            content = pagination.paginate(content, *response.page)
+        return build(response, content, status, headers)
+    return paged
+
+
+def _unpacked(build):
+    def unpacked(response, content, status, headers):
+        content, status = unpack(content, status, headers)
+        return build(response, content, status, headers)
+    return unpacked
+
+
+def _unpacked_tuple(build):
+    def unpacked(response, content, status, headers):
         if isinstance(content, tuple):
-            if len(content) == 3:
-                content, status, headers_update = content
-                headers.update(headers_update)
-            if len(content) == 2 and isinstance(content[1], int):
-                content, status = content
-            if len(content) == 2 and isinstance(content[1], dict):
-                content, headers_update = content
-                headers.update(headers_update)
-        if isinstance(self.processor, schema.Schema):
-            headers['Content-Type'] = 'application/json'
-            content = self.processor.dump(content)
-            return (content, status, headers)
-        if callable(self.processor):
-            return self.processor(content, status, headers)
-        return (content, status, headers)
+            content, status = unpack(content, status, headers)
+        return build(response, content, status, headers)
+    return unpacked
+
+
+def get_page_processor(processor):
+    """
+    Gives back the processor of the paged envelope, the schema processors
+    describe the items (check :py:func:`.pagination.page_schema`)
+    """
+    if processor is None or isinstance(processor, schema.Schema):
+        return pagination.page_schema(processor)
+    return processor
+
+
+def unpack(content, status, headers):
+    """
+    Interpret the `(content, status, headers)`, `(content, status)` and
+    `(content, headers)` return values of the endpoints, the headers are
+    updated in place. Gives back the content and the status.
+    """
+    if len(content) == 3:
+        content, status, update = content
+        headers.update(update)
+    elif len(content) == 2:
+        if isinstance(content[1], int):
+            content, status = content
+        elif isinstance(content[1], dict):
+            content, update = content
+            headers.update(update)
+    return content, status
+
+
+def is_projectable(processor):
+    """
+    Gives back `True` if the fields of the processor can be selected,
+    it means the processor is a `schema.Object` (class or instance) with
+    declared fields.
+    """
+    if inspect.isclass(processor):
+        return issubclass(processor, schema.Object) and \
+            processor._fields is not None
+    return isinstance(processor, schema.Object) and \
+        processor._fields is not None
+
+
+def parse_fields(processor, value):
+    """
+    Parse the comma separated field selection (eg. `id,name`) and gives back
+    the names of selected fields of the processor in declaration order.
+    The fields can be referred by their declared name.
+    Raises `ValueError` if an unknown field is requested.
+    """
+    if isinstance(value, (list, tuple)):
+        value = ','.join(value)
+    requested = set(f.strip() for f in value.split(',') if f.strip())
+    by_name = {}
+    for field, prop in processor._fields.items():
+        by_name[prop.get('name', field)] = field
+    unknown = requested - set(by_name)
+    if unknown:
+        raise ValueError(
+            "Unknown fields: %s" % ', '.join(sorted(unknown))
+        )
+    requested = set(by_name[name] for name in requested)
+    return tuple(f for f in processor._fields if f in requested)
+
+
+def project(processor, fields):
+    """
+    Gives back the projection of the processor contains only the given
+    fields. Class gives back class, instance gives back instance.
+    The projections are cached by the processor and the fields.
+    """
+    key = (processor, fields)
+    projected = _projections.get(key)
+    if projected is not None:
+        return projected
+    if inspect.isclass(processor):
+        cls = processor
+    else:
+        cls = processor.__class__
+    projected = type(
+        cls.__name__, (Projection, cls), {'__doc__': cls.__doc__}
+    )
+    projected._fields = collections.OrderedDict(
+        (f, cls._fields[f]) for f in fields
+    )
+    if not inspect.isclass(processor):
+        projected = projected(**processor._attrs)
+    _projections.set(key, projected)
+    return projected
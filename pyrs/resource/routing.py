@@ -0,0 +1,60 @@
+"""
+Copy-on-write maintenance of the werkzeug routing `Map`.
+
+The `Map` doesn't support removing rules and it re-sorts (or re-compiles)
+every rule on the next match after a rule added. The functions of this
+module never modify the given map, they give back a new map built from the
+(public) rules of the given one and prepared for matching (`Map.update`),
+so it can be swapped atomically while the in-flight requests are still
+matched on the previous one.
+
+Every change rebuilds the map, it costs O(n log n) for n rules (the sorting
+or compiling of werkzeug), not O(log n) of an in-place insert. The routing
+is changed rarely after the first request (until that the rules are added
+in place, check :py:meth:`.base.App.add_rule`) and the matching isn't
+affected.
+"""
+import werkzeug.routing
+
+#: Options of the `Map` copied to the new map (the ones supported by the
+#: installed werkzeug)
+_OPTIONS = (
+    'default_subdomain', 'strict_slashes', 'merge_slashes',
+    'redirect_defaults', 'converters', 'sort_parameters', 'sort_key',
+    'host_matching',
+)
+
+
+def add_rule(rules, rule):
+    """
+    Gives back a copy of the `rules` map extended by the rule (or rule
+    factory).
+    """
+    result = _copy(rules, rules.iter_rules())
+    result.add(rule)
+    result.update()
+    return result
+
+
+def remove_endpoint(rules, endpoint):
+    """
+    Gives back a copy of the `rules` map without the rules of the endpoint.
+    Raises `KeyError` if the endpoint doesn't exist.
+    """
+    items = list(rules.iter_rules())
+    kept = [item for item in items if item.endpoint != endpoint]
+    if len(kept) == len(items):
+        raise KeyError(endpoint)
+    result = _copy(rules, kept)
+    result.update()
+    return result
+
+
+def _copy(rules, items):
+    result = werkzeug.routing.Map(**dict(
+        (name, getattr(rules, name)) for name in _OPTIONS
+        if hasattr(rules, name)
+    ))
+    for item in items:
+        result.add(item.empty())
+    return result
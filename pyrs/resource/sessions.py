@@ -0,0 +1,110 @@
+"""
+Lazy loaded sessions.
+
+When :py:data:`.conf.session_store` is set (any store of :py:mod:`.store`)
+the :py:meth:`.base.App.dispatch` creates a :py:class:`Session` for the
+requests (unless the caller passes its own session). The session id is
+taken from the :py:data:`.conf.session_cookie` cookie. The session is loaded
+from the store only when the endpoint accesses it first time (so the
+endpoints don't use the session don't pay for it), and it's written back
+only if it was modified. A new session gets a random id, sent back in the
+`Set-Cookie` header, an emptied session is deleted from the store. The ids
+unknown by the store are dropped, a random id is generated instead (so the
+session id can't be chosen by the client).
+
+The shared stores (eg. :py:class:`.store.SQLiteStore`) are fronted by a
+local LRU tier (:py:data:`.conf.session_local_size`), see
+:py:class:`.store.TieredStore`.
+"""
+import binascii
+import os
+
+from six.moves import collections_abc
+import werkzeug.http
+
+
+def new_key():
+    """
+    Gives back a new random session id
+    """
+    return binascii.hexlify(os.urandom(16)).decode('ascii')
+
+
+class Session(collections_abc.MutableMapping):
+    """
+    Dictionary like proxy of the stored session.
+
+    :param store: Store of the sessions (check :py:mod:`.store`)
+    :param str key: Session id, `None` means new session
+    """
+
+    def __init__(self, store, key=None):
+        self.store = store
+        self.key = key
+        #: `True` if the session was changed since loaded
+        self.modified = False
+        self._data = None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            stored = None
+            if self.key is not None:
+                stored = self.store.get(self.key)
+                if stored is None:
+                    # Unknown (eg. expired or forged) id, never reused
+                    self.key = None
+            self._data = dict(stored or {})
+        return self._data
+
+    def save(self):
+        """
+        Write back the modified session, gives back `True` if the session id
+        changed (new or deleted session).
+        """
+        if not self.modified:
+            return False
+        self.modified = False
+        key = self.key
+        if self._data:
+            if self.key is None:
+                self.key = new_key()
+            self.store.set(self.key, dict(self._data))
+        elif self.key is not None:
+            self.store.delete(self.key)
+            self.key = None
+        return self.key != key
+
+    def get_cookie(self, name):
+        """
+        Gives back the `Set-Cookie` header value of the session id
+        """
+        if self.key is None:
+            return werkzeug.http.dump_cookie(
+                name, '', max_age=0, expires=0, httponly=True
+            )
+        return werkzeug.http.dump_cookie(name, self.key, httponly=True)
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def __setitem__(self, name, value):
+        self.data[name] = value
+        self.modified = True
+
+    def __delitem__(self, name):
+        del self.data[name]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return '<Session %s%s>' % (self.key, '' if self.loaded else ' lazy')
@@ -0,0 +1,187 @@
+"""
+Simple key-value stores used by the framework (eg. idempotent results,
+sessions).
+
+Every store has the same interface: `get(key, default=None)`,
+`set(key, value)` and `delete(key)`. The keys are strings, the values can be
+anything picklable.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+
+import six
+
+from . import lib
+
+_missing = object()
+_replace = getattr(os, 'replace', os.rename)
+
+
+class MemoryStore(object):
+    """
+    In-process store, the least recently used items are evicted.
+
+    :param int maxsize: Maximum number of stored items
+    :param float ttl: Optional time to live of items in seconds
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self._data = lib.LRU(maxsize, ttl=ttl)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        self._data.set(key, value)
+
+    def delete(self, key):
+        self._data.pop(key)
+
+
+class SQLiteStore(object):
+    """
+    Store backed by an SQLite database, can be shared between processes.
+
+    :param str path: Path of the database file
+    :param str table: Name of the table (created if doesn't exist)
+    :param float ttl: Optional time to live of items in seconds
+    """
+
+    def __init__(self, path, table='pyrs_store', ttl=None):
+        self.table = table
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS %s '
+                '(key TEXT PRIMARY KEY, value BLOB, expires REAL)' % table
+            )
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value, expires FROM %s WHERE key = ?' % self.table,
+                (key,)
+            ).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            return default
+        return pickle.loads(bytes(value))
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.time() + self.ttl
+        value = sqlite3.Binary(
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        )
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO %s (key, value, expires) '
+                'VALUES (?, ?, ?)' % self.table,
+                (key, value, expires)
+            )
+
+    def delete(self, key):
+        with self._lock, self._db:
+            self._db.execute(
+                'DELETE FROM %s WHERE key = ?' % self.table, (key,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class FileStore(object):
+    """
+    Store keeps every item in a separate file of the directory, can be
+    shared between processes (the files are replaced atomically).
+
+    :param str directory: Directory of the files (created if doesn't exist)
+    :param float ttl: Optional time to live of items in seconds
+    """
+
+    def __init__(self, directory, ttl=None):
+        self.directory = directory
+        self.ttl = ttl
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get(self, key, default=None):
+        try:
+            with open(self._path(key), 'rb') as f:
+                value, expires = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return default
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            return default
+        return value
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.time() + self.ttl
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((value, expires), f, pickle.HIGHEST_PROTOCOL)
+            _replace(path, self._path(key))
+        except Exception:
+            os.unlink(path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _path(self, key):
+        if isinstance(key, six.text_type):
+            key = key.encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+
+class TieredStore(object):
+    """
+    Local in-process LRU tier in front of a (shared) store. The reads are
+    answered by the local tier if possible, the writes go through both of
+    them. Changes made by other processes are seen when the local item
+    expires (`ttl`).
+
+    :param store: The backing store
+    :param int maxsize: Maximum number of locally stored items
+    :param float ttl: Time to live of the local items in seconds
+    """
+
+    def __init__(self, store, maxsize=1024, ttl=None):
+        self.store = store
+        self._local = lib.LRU(maxsize, ttl=ttl)
+
+    def get(self, key, default=None):
+        value = self._local.get(key, _missing)
+        if value is _missing:
+            value = self.store.get(key, _missing)
+            if value is _missing:
+                return default
+            self._local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.store.set(key, value)
+        self._local.set(key, value)
+
+    def delete(self, key):
+        self._local.pop(key)
+        self.store.delete(key)
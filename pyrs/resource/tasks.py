@@ -0,0 +1,108 @@
+"""
+Background tasks executed after the response is built.
+
+The endpoint can get the :py:class:`Tasks` handle injected (enable by the
+`inject_tasks` option) and schedule callables on it. When the response is
+successfully built the scheduled tasks are submitted to the bounded
+:py:class:`TaskPool` of the application, so the response doesn't wait for
+them. Failures are logged, tasks over the queue limit are dropped (and
+counted). The pool is drained by :py:meth:`.base.App.close`.
+"""
+import threading
+
+from six.moves import queue
+
+from . import lib
+
+
+class Tasks(object):
+    """
+    Tasks scheduled by the endpoint during the request
+    """
+
+    def __init__(self):
+        self._tasks = []
+
+    def add(self, func, *args, **kwargs):
+        """
+        Schedule the `func(*args, **kwargs)` after the response
+        """
+        self._tasks.append((func, args, kwargs))
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def __len__(self):
+        return len(self._tasks)
+
+
+class TaskPool(object):
+    """
+    Bounded pool of worker threads. The threads are started on the first
+    submitted task.
+
+    :param int workers: Number of worker threads
+    :param int queue_size: Maximum number of waiting tasks
+    """
+
+    def __init__(self, workers=4, queue_size=1000):
+        self.workers = workers
+        #: Number of the tasks dropped because the queue was full
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue the task, gives back `False` if it's dropped (never blocks)
+        """
+        self._start()
+        try:
+            self._queue.put_nowait((func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            lib.get_logger(self).warning(
+                "Task queue is full, %s dropped", lib.get_fqname(func)
+            )
+            return False
+        return True
+
+    def submit_all(self, tasks):
+        for func, args, kwargs in tasks:
+            self.submit(func, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers after the queued tasks are executed
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for unused in threads:
+            self._queue.put((None, None, None))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _start(self):
+        if self._threads:
+            return
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            if func is None:
+                return
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                lib.get_logger(self).exception(
+                    "Task %s failed", lib.get_fqname(func)
+                )
@@ -0,0 +1,105 @@
+import json
+import threading
+import unittest
+
+from testfixtures import LogCapture
+
+from .. import accesslog
+from .. import base
+from .. import lib
+from .. import resource
+
+
+class TestAccessLog(unittest.TestCase):
+
+    def make_trace(self):
+        trace = lib.Trace()
+        trace.endpoint = 'func'
+        trace.lap('match')
+        trace.status = 200
+        return trace
+
+    def test_batched(self):
+        batches = []
+        log = accesslog.AccessLog(batches.append, batch_size=2, interval=10)
+
+        for unused in range(5):
+            self.assertTrue(log.log(self.make_trace(), '/path', 'GET', 0, 3))
+        log.close()
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        record = batches[0][0]
+        self.assertEqual(record['endpoint'], 'func')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(list(record['timings']), ['match'])
+        self.assertEqual(record['response_size'], 3)
+
+    def test_logged_by_default(self):
+        log = accesslog.AccessLog()
+
+        with LogCapture() as logs:
+            log.log(self.make_trace(), '/path', 'GET')
+            log.close()
+
+        self.assertEqual(len(logs.records), 1)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/path')
+        self.assertEqual(record['method'], 'GET')
+
+    def test_dropped_when_full(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def write(batch):
+            started.set()
+            release.wait()
+
+        log = accesslog.AccessLog(write, batch_size=1, queue_size=1)
+        log.log(self.make_trace(), '/path', 'GET')
+        started.wait()
+        self.assertTrue(log.log(self.make_trace(), '/path', 'GET'))
+        self.assertFalse(log.log(self.make_trace(), '/path', 'GET'))
+        release.set()
+        log.close()
+
+        self.assertEqual(log.dropped, 1)
+
+    def test_writer_failure_logged(self):
+        def write(batch):
+            raise ValueError('failed')
+
+        log = accesslog.AccessLog(write)
+        with LogCapture() as logs:
+            log.log(self.make_trace(), '/path', 'GET')
+            log.close()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsInstance(logs.records[0].exc_info[1], ValueError)
+
+    def test_request_size(self):
+        self.assertEqual(
+            accesslog.get_request_size(None, {'content-length': '12'}), 12
+        )
+        self.assertEqual(accesslog.get_request_size(b'body', {}), 4)
+        self.assertIsNone(accesslog.get_request_size({'a': 1}, {}))
+
+
+class TestAppAccessLog(unittest.TestCase):
+
+    def test_dispatch_logged(self):
+        records = []
+
+        @resource.GET
+        def func():
+            return 'hello'
+
+        app = base.App(access_log=True, access_log_writer=records.extend)
+        app.add('/path', func)
+        app.dispatch('/path', 'GET')
+        app.close()
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['endpoint'], 'func')
+        self.assertEqual(records[0]['status'], 200)
+        self.assertEqual(records[0]['response_size'], 5)
+        self.assertIn('response', records[0]['timings'])
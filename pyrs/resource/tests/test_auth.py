@@ -0,0 +1,189 @@
+import json
+import time
+import unittest
+
+import mock
+
+from .. import auth
+from .. import base
+from .. import errors
+from .. import hooks
+from .. import resource
+
+
+class TestHMACVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.verifier = auth.HMACVerifier(b'secret')
+
+    def test_sign_and_verify(self):
+        token = self.verifier.sign({'sub': 'user'})
+
+        self.assertEqual(self.verifier.verify(token), {'sub': 'user'})
+
+    def test_invalid_signature(self):
+        token = auth.HMACVerifier(b'other').sign({'sub': 'user'})
+
+        with self.assertRaises(auth.InvalidToken):
+            self.verifier.verify(token)
+
+    def test_malformed(self):
+        for token in ('', 'abc', 'a.b.c', 'a.b.c.d'):
+            with self.assertRaises(auth.InvalidToken):
+                self.verifier.verify(token)
+
+    def test_algorithm(self):
+        token = auth.HMACVerifier(b'secret', 'HS512').sign({'sub': 'user'})
+
+        with self.assertRaises(auth.InvalidToken):
+            self.verifier.verify(token)
+
+    def test_expired(self):
+        token = self.verifier.sign({'sub': 'user', 'exp': time.time() - 1})
+
+        with self.assertRaises(auth.InvalidToken):
+            self.verifier.verify(token)
+
+
+class TestBearerAuth(unittest.TestCase):
+
+    def setUp(self):
+        self.verifier = mock.Mock(wraps=auth.HMACVerifier(b'secret'))
+        self.token = self.verifier.sign({'sub': 'user'})
+
+        @resource.GET(inject_auth='claims')
+        def whoami(claims):
+            return claims and claims['sub']
+
+        @resource.GET(auth_required=True)
+        def private():
+            return 'private'
+
+        self.app = base.App(hooks=[auth.BearerAuth(self.verifier)])
+        self.app.add('/whoami', whoami)
+        self.app.add('/private', private)
+
+    def get(self, path, token=None):
+        headers = {}
+        if token is not None:
+            headers['Authorization'] = 'Bearer ' + token
+        return self.app.dispatch(path, 'GET', headers=headers)
+
+    def test_authenticated(self):
+        content, status, unused = self.get('/whoami', self.token)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(content, 'user')
+
+    def test_anonymous(self):
+        content, status, unused = self.get('/whoami')
+
+        self.assertEqual(status, 200)
+        self.assertIsNone(content)
+
+    def test_required(self):
+        content, status, headers = self.get('/private')
+
+        self.assertEqual(status, 401)
+        self.assertEqual(json.loads(content)['error'], 'unauthorized')
+        self.assertEqual(headers['WWW-Authenticate'], 'Bearer')
+
+    def test_invalid_token(self):
+        unused, status, unused = self.get('/whoami', self.token + 'x')
+
+        self.assertEqual(status, 401)
+
+    def test_claims_cached(self):
+        self.get('/whoami', self.token)
+        self.get('/whoami', self.token)
+
+        self.assertEqual(self.verifier.verify.call_count, 1)
+
+    def test_expired_claims_not_cached(self):
+        hook = auth.BearerAuth(self.verifier)
+        token = self.verifier.sign({'sub': 'user', 'exp': time.time() + 0.01})
+        hook.verify(token)
+        time.sleep(0.02)
+
+        with self.assertRaises(errors.Unauthorized):
+            hook.verify(token)
+
+
+class TestHooks(unittest.TestCase):
+
+    def test_request_hook_result(self):
+        class Hook(hooks.Hook):
+            def request(self, request):
+                return 'from hook'
+
+        @resource.GET
+        def func():
+            raise AssertionError('should not be called')
+
+        app = base.App(hooks=[Hook])
+        app.add('/path', func)
+
+        self.assertEqual(app.dispatch('/path', 'GET')[0], 'from hook')
+
+
+class TestAuthBeforeShortcuts(unittest.TestCase):
+
+    def setUp(self):
+        self.verifier = auth.HMACVerifier(b'secret')
+        calls = []
+
+        @resource.GET(cache=60, auth_required=True, inject_auth='claims')
+        def profile(claims):
+            calls.append(claims['sub'])
+            return claims['sub']
+
+        @resource.POST(idempotent=True, inject_auth='claims')
+        def create(claims):
+            calls.append(claims)
+            return claims and claims['sub']
+
+        self.calls = calls
+        self.app = base.App(hooks=[auth.BearerAuth(self.verifier)])
+        self.app.add('/profile', profile)
+        self.app.add('/create', create)
+
+    def headers(self, sub=None, **headers):
+        if sub is not None:
+            headers['Authorization'] = 'Bearer ' + self.verifier.sign(
+                {'sub': sub}
+            )
+        return headers
+
+    def test_cached_response_requires_auth(self):
+        self.app.dispatch('/profile', 'GET', headers=self.headers('alice'))
+
+        content, status, unused = self.app.dispatch('/profile', 'GET')
+
+        self.assertEqual(status, 401)
+
+    def test_cached_per_identity(self):
+        alice = self.app.dispatch(
+            '/profile', 'GET', headers=self.headers('alice')
+        )
+        bob = self.app.dispatch('/profile', 'GET', headers=self.headers('bob'))
+        again = self.app.dispatch(
+            '/profile', 'GET', headers=self.headers('alice')
+        )
+
+        self.assertEqual(alice[0], 'alice')
+        self.assertEqual(bob[0], 'bob')
+        self.assertEqual(again[0], 'alice')
+        self.assertEqual(self.calls, ['alice', 'bob'])
+
+    def test_idempotency_key_per_identity(self):
+        first = self.app.dispatch(
+            '/create', 'POST',
+            headers=self.headers('alice', **{'Idempotency-Key': 'abc'})
+        )
+        anonymous = self.app.dispatch(
+            '/create', 'POST', headers={'Idempotency-Key': 'abc'}
+        )
+
+        self.assertEqual(first[0], 'alice')
+        self.assertIsNone(anonymous[0])
+        self.assertEqual(len(self.calls), 2)
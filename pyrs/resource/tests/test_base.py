@@ -1,14 +1,32 @@
 import json
+import os
+import sys
 import unittest
 
 from pyrs import schema
 import werkzeug
 
 from .. import base
+from .. import errors
 from .. import lib
+from .. import pagination
 from .. import resource
 
 
+@resource.GET(executor='process')
+def get_pid():
+    return os.getpid()
+
+
+@resource.GET(executor='process')
+def fail_in_process():
+    raise errors.ClientError('failed')
+
+
+def is_imported(name):
+    return name in sys.modules
+
+
 class TestConfiguration(unittest.TestCase):
 
     def test_default_configs(self):
@@ -84,6 +102,27 @@ class TestRules(unittest.TestCase):
         self.assertSetEqual(rule.methods, {'GET', 'HEAD'})
         self.assertEqual(rule.endpoint, 'func')
 
+    def test_extended_in_place_until_dispatched(self):
+        @resource.GET
+        def first():
+            return 'first'
+
+        @resource.GET
+        def second():
+            return 'second'
+
+        rules = self.app.rules
+        self.app.add('/first', first)
+
+        self.assertIs(self.app.rules, rules)
+        self.assertEqual(self.app.dispatch('/first', 'GET')[0], 'first')
+
+        self.app.add('/second', second)
+
+        self.assertIsNot(self.app.rules, rules)
+        self.assertEqual(self.app.dispatch('/second', 'GET')[0], 'second')
+        self.assertEqual(self.app.dispatch('/first', 'GET')[0], 'first')
+
     def test_add_function_with_prefix(self):
         @resource.GET
         def func(self):
@@ -173,3 +212,389 @@ class TestDispatch(unittest.TestCase):
         )
         self.assertEqual(status, 200)
         self.assertEqual(headers, {'Content-Type': 'application/json'})
+
+    def test_dispatch_not_found(self):
+        content, status, headers = self.app.dispatch('/other', 'GET')
+
+        self.assertEqual(json.loads(content), {'error': 'not_found'})
+        self.assertEqual(status, 404)
+
+    def test_dispatch_method_not_allowed(self):
+        content, status, headers = self.app.dispatch('/path/', 'DELETE')
+
+        self.assertEqual(
+            json.loads(content), {'error': 'method_not_allowed'}
+        )
+        self.assertEqual(status, 405)
+        self.assertEqual(headers['Allow'], 'POST')
+
+    def test_handlers_overridden(self):
+        handled = []
+
+        class MyApp(base.App):
+
+            def handle_client_exceptions(
+                self, ex, path_info, method, opts=None, req=None
+            ):
+                handled.append('client')
+                return super(MyApp, self).handle_client_exceptions(
+                    ex, path_info, method, opts, req
+                )
+
+            def handle_exception(self, ex, opts, req):
+                handled.append('endpoint')
+                return super(MyApp, self).handle_exception(ex, opts, req)
+
+        @resource.GET
+        def fail():
+            raise ValueError()
+
+        app = MyApp()
+        app.add('/fail', fail)
+
+        self.assertEqual(app.dispatch('/other', 'GET')[1], 404)
+        self.assertEqual(app.dispatch('/fail', 'GET')[1], 500)
+        self.assertEqual(handled, ['client', 'endpoint'])
+        with self.assertRaises(ValueError):
+            app.dispatch('/fail', 'GET', local=True)
+
+
+class TestMount(unittest.TestCase):
+
+    def setUp(self):
+        class Resource(object):
+            _name = 'Resource'
+
+            @resource.GET(path='/<name>', inject_app=True)
+            def func(self, name, app):
+                if name == 'missing':
+                    raise KeyError(name)
+                return app['special_config']
+
+        class Users(base.App):
+            config = {'special_config': 'users'}
+            resources = [('/users', Resource)]
+
+            def transform_exception(self, ex):
+                if isinstance(ex, KeyError):
+                    return errors.NotFound(cause=ex)
+                return ex
+
+        self.users = Users()
+        self.app = base.App(special_config='parent')
+        self.app.mount('/api', self.users, name='users')
+
+    def test_rules_merged(self):
+        self.assertTrue(
+            self.app.rules.is_endpoint_expecting(
+                'users:Resource#func', 'name'
+            )
+        )
+
+    def test_executed_by_mounted_app(self):
+        content, status, headers = self.app.dispatch(
+            '/api/users/admin', 'GET'
+        )
+
+        self.assertEqual(content, 'users')
+        self.assertEqual(status, 200)
+
+    def test_mounted_error_handling(self):
+        content, status, headers = self.app.dispatch(
+            '/api/users/missing', 'GET'
+        )
+
+        self.assertEqual(status, 404)
+
+    def test_nested_mount(self):
+        gateway = base.App()
+        gateway.mount('/v1', self.app, name='v1')
+
+        content, status, headers = gateway.dispatch(
+            '/v1/api/users/admin', 'GET'
+        )
+
+        self.assertEqual(content, 'users')
+        self.assertEqual(
+            gateway.mounts['v1:users:Resource#func'],
+            (self.users, 'Resource#func')
+        )
+
+    def test_duplicate_name(self):
+        with self.assertRaises(ValueError):
+            self.app.mount('/other', self.users.__class__(), name='users')
+
+    def test_default_name_collision(self):
+        self.app.mount('/first', self.users)
+
+        with self.assertRaises(ValueError):
+            self.app.mount('/second', self.users.__class__())
+
+    def test_rule_options_kept(self):
+        app = base.App()
+        app.add_rule(werkzeug.routing.Rule(
+            '/page/', endpoint='page', defaults={'number': 1},
+            strict_slashes=False
+        ))
+        self.app.mount('/pages', app, name='pages')
+
+        rule = list(self.app.rules.iter_rules('pages:page'))[0]
+
+        self.assertEqual(rule.defaults, {'number': 1})
+        self.assertFalse(rule.strict_slashes)
+
+
+class TestRemove(unittest.TestCase):
+
+    def setUp(self):
+        class Resource(object):
+            _name = 'Resource'
+
+            @resource.GET
+            def func(self):
+                return 'func'
+
+            @resource.GET(path='/other')
+            def other(self):
+                return 'other'
+
+        self.app = base.App()
+        self.app.add('/path', Resource)
+
+    def test_remove(self):
+        self.app.remove('Resource#other')
+
+        content, status, headers = self.app.dispatch('/path/other', 'GET')
+        self.assertEqual(status, 404)
+        self.assertNotIn('Resource#other', self.app.functions)
+        self.assertEqual(self.app.dispatch('/path/', 'GET')[0], 'func')
+
+    def test_builder_removed(self):
+        self.assertIn('Resource#other', self.app.builders)
+        self.app.remove('Resource#other')
+
+        self.assertNotIn('Resource#other', self.app.builders)
+
+    def test_remove_unknown(self):
+        with self.assertRaises(ValueError):
+            self.app.remove('Resource#unknown')
+
+    def test_add_after_remove(self):
+        self.app.remove('Resource#other')
+
+        @resource.GET
+        def other():
+            return 'again'
+
+        self.app.add('/path/other', other)
+
+        self.assertEqual(self.app.dispatch('/path/other', 'GET')[0], 'again')
+
+    def test_removed_while_in_flight(self):
+        adapter = self.app.adapter
+        self.app.remove('Resource#other')
+
+        self.assertEqual(adapter.match('/path/other')[0], 'Resource#other')
+        content, status, headers = self.app.execute(
+            lib.Trace(), 'Resource#other', {}, '/path/other', 'GET'
+        )
+        self.assertEqual(status, 404)
+
+
+class TestProcessExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.app = base.App(process_workers=1)
+        self.app.add('/pid', get_pid)
+        self.app.add('/fail', fail_in_process)
+
+    def tearDown(self):
+        self.app.close()
+
+    def test_executed_in_process(self):
+        content, status, unused = self.app.dispatch('/pid', 'GET')
+
+        self.assertEqual(status, 200)
+        self.assertNotEqual(content, os.getpid())
+
+    def test_error_raised_in_process(self):
+        unused, status, unused = self.app.dispatch('/fail', 'GET')
+
+        self.assertEqual(status, 400)
+
+    def test_modules(self):
+        self.assertEqual(self.app.get_modules(), [__name__])
+
+    @unittest.skipIf('colorsys' in sys.modules, 'Imported by the tests')
+    def test_modules_imported_in_worker(self):
+        executor = lib.ProcessPoolExecutor(1, ['colorsys'])
+        self.addCleanup(executor.shutdown)
+        control = lib.ProcessPoolExecutor(1)
+        self.addCleanup(control.shutdown)
+
+        self.assertTrue(executor.submit(is_imported, 'colorsys').result())
+        self.assertFalse(control.submit(is_imported, 'colorsys').result())
+
+
+class TestExceptionMap(unittest.TestCase):
+
+    def setUp(self):
+        class MyApp(base.App):
+            exception_map = {LookupError: errors.NotFound}
+
+        @resource.GET
+        def func(name):
+            raise {'key': KeyError, 'value': ValueError}[name]('failed')
+
+        self.app = MyApp(exception_map={ValueError: errors.ClientError})
+        self.app.add('/<name>', func)
+
+    def test_mro_lookup(self):
+        ex = KeyError('missing')
+        error = self.app.transform_exception(ex)
+
+        self.assertIsInstance(error, errors.NotFound)
+        self.assertIs(error.cause, ex)
+        self.assertIs(self.app._exception_targets[KeyError], errors.NotFound)
+
+    def test_not_mapped(self):
+        ex = TypeError()
+
+        self.assertIs(self.app.transform_exception(ex), ex)
+        self.assertIsNone(self.app._exception_targets[TypeError])
+
+    def test_map_exception(self):
+        self.app.transform_exception(TypeError())
+        self.app.map_exception(TypeError, errors.ClientError)
+
+        self.assertIsInstance(
+            self.app.transform_exception(TypeError()), errors.ClientError
+        )
+
+    def test_mapped_responses(self):
+        self.assertEqual(self.app.dispatch('/key', 'GET')[1], 404)
+        self.assertEqual(self.app.dispatch('/value', 'GET')[1], 400)
+
+    def test_mapped_error_static(self):
+        self.assertTrue(self.app.transform_exception(KeyError()).is_static())
+
+    def test_merged_along_mro(self):
+        class SubApp(self.app.__class__):
+            exception_map = {TypeError: errors.ClientError}
+
+        app = SubApp()
+
+        self.assertIs(app.exception_map[TypeError], errors.ClientError)
+        self.assertIs(app.exception_map[LookupError], errors.NotFound)
+        self.assertIs(
+            app.exception_map[pagination.InvalidCursor], errors.BadRequest
+        )
+
+    def test_inherited_mapping_disabled(self):
+        class SubApp(self.app.__class__):
+            exception_map = {LookupError: None}
+
+        ex = KeyError()
+
+        self.assertIs(SubApp().transform_exception(ex), ex)
+
+    def test_errors_mapped_by_exact_type(self):
+        self.app.map_exception(Exception, errors.ClientError)
+        ex = errors.NotFound()
+
+        self.assertIs(self.app.transform_exception(ex), ex)
+
+        self.app.map_exception(errors.NotFound, errors.BadRequest)
+
+        self.assertIsInstance(
+            self.app.transform_exception(ex), errors.BadRequest
+        )
+
+
+class TestHostRouting(unittest.TestCase):
+
+    def setUp(self):
+        @resource.GET(host='<tenant>.example.com')
+        def tenant(tenant):
+            return tenant
+
+        @resource.GET(host='admin.example.com')
+        def admin():
+            return 'admin'
+
+        @resource.GET
+        def default():
+            return 'default'
+
+        self.app = base.App(host_matching=True, host='example.com')
+        self.app.add('/', tenant)
+        self.app.add('/', admin)
+        self.app.add('/default', default)
+
+    def get(self, path, host):
+        return self.app.dispatch(path, 'GET', headers={'Host': host})
+
+    def test_host_matching(self):
+        self.assertEqual(self.get('/', 'acme.example.com')[0], 'acme')
+        self.assertEqual(self.get('/', 'admin.example.com:8080')[0], 'admin')
+        self.assertEqual(self.get('/default', 'example.com')[0], 'default')
+        self.assertEqual(self.get('/', 'other.com')[1], 404)
+
+    def test_adapter_cached(self):
+        adapter = self.app.get_adapter('acme.example.com')
+
+        self.assertIs(self.app.get_adapter('ACME.example.com'), adapter)
+        self.assertEqual(adapter.server_name, 'acme.example.com')
+
+    def test_cache_invalidated(self):
+        adapter = self.app.get_adapter('acme.example.com')
+
+        self.app.remove('tenant')
+
+        self.assertIsNot(self.app.get_adapter('acme.example.com'), adapter)
+        self.assertEqual(self.get('/', 'acme.example.com')[1], 404)
+
+    def test_mounted(self):
+        parent = base.App(host_matching=True, host='example.com')
+        parent.mount('/api', self.app, name='api')
+
+        self.assertEqual(
+            parent.dispatch(
+                '/api/', 'GET', headers={'Host': 'acme.example.com'}
+            )[0],
+            'acme'
+        )
+
+    def test_mount_setup_differs(self):
+        with self.assertRaises(ValueError):
+            base.App().mount('/api', self.app)
+        with self.assertRaises(ValueError):
+            base.App(server_name='example.com').mount('/api', base.App())
+
+
+class TestSubdomainRouting(unittest.TestCase):
+
+    def setUp(self):
+        @resource.GET(subdomain='<tenant>')
+        def tenant(tenant):
+            return tenant
+
+        @resource.GET
+        def main():
+            return 'main'
+
+        self.app = base.App(server_name='example.com')
+        self.app.add('/', tenant)
+        self.app.add('/main', main)
+
+    def get(self, path, host):
+        return self.app.dispatch(path, 'GET', headers={'Host': host})
+
+    def test_subdomain(self):
+        self.assertEqual(self.get('/', 'acme.example.com')[0], 'acme')
+        self.assertEqual(self.get('/main', 'example.com')[0], 'main')
+        self.assertEqual(self.get('/main', 'acme.example.com')[1], 404)
+        self.assertEqual(self.get('/', 'acme.other.com')[1], 404)
+
+    def test_without_host_header(self):
+        self.assertEqual(self.app.dispatch('/main', 'GET')[0], 'main')
@@ -0,0 +1,98 @@
+import json
+import unittest
+
+from pyrs import schema
+
+from .. import base
+from .. import bulk
+from .. import errors
+from .. import resource
+
+
+class ItemSchema(schema.Object):
+    name = schema.String(required=True)
+
+
+class TestBulk(unittest.TestCase):
+
+    def make_items(self, count, invalid=()):
+        return [
+            {'name': 1 if i in invalid else 'item%s' % i}
+            for i in range(count)
+        ]
+
+    def test_load(self):
+        items = bulk.load(ItemSchema, self.make_items(5), chunk_size=2)
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(items[4], {'name': 'item4'})
+
+    def test_failing_indexes(self):
+        with self.assertRaises(errors.InputValidationError) as ctx:
+            bulk.load(ItemSchema, self.make_items(5, (1, 3)), chunk_size=2)
+
+        self.assertEqual(
+            [item['index'] for item in ctx.exception.details['items']], [1, 3]
+        )
+
+    def test_stops_early(self):
+        items = self.make_items(10, range(10))
+
+        with self.assertRaises(errors.InputValidationError) as ctx:
+            bulk.load(ItemSchema(), items, chunk_size=3, max_errors=2)
+
+        self.assertEqual(len(ctx.exception.details['items']), 2)
+
+    def test_process_pool(self):
+        app = base.App(process_workers=2)
+        try:
+            with self.assertRaises(errors.InputValidationError) as ctx:
+                bulk.load(
+                    ItemSchema(), self.make_items(10, (7,)), chunk_size=3,
+                    executor=app.process_executor
+                )
+            items = bulk.load(
+                ItemSchema(), self.make_items(10), chunk_size=3,
+                executor=app.process_executor
+            )
+        finally:
+            app.close()
+
+        self.assertEqual(ctx.exception.details['items'][0]['index'], 7)
+        self.assertEqual(len(items), 10)
+
+
+class TestBulkEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        @resource.POST(request=ItemSchema, bulk=True, inject_body='items')
+        def upsert(items):
+            return len(items)
+
+        self.app = base.App(bulk_chunk_size=2)
+        self.app.add('/items', upsert)
+
+    def test_valid(self):
+        content, status, unused = self.app.dispatch(
+            '/items', 'POST', body=[{'name': 'a'}, {'name': 'b'}]
+        )
+
+        self.assertEqual(status, 201)
+        self.assertEqual(content, 2)
+
+    def test_invalid(self):
+        content, status, unused = self.app.dispatch(
+            '/items', 'POST', body=[{'name': 'a'}, {}]
+        )
+
+        self.assertEqual(status, 400)
+        self.assertEqual(
+            json.loads(content)['details']['items'][0]['index'], 1
+        )
+
+    def test_not_array(self):
+        unused, status, unused = self.app.dispatch(
+            '/items', 'POST', body={'name': 'a'}
+        )
+
+        self.assertEqual(status, 400)
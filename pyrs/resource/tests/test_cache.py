@@ -0,0 +1,202 @@
+import io
+import os
+import unittest
+
+from .. import base
+from .. import cache
+from .. import resource
+
+
+class CacheTestMixin(object):
+
+    def test_get_set(self):
+        self.cache.set('key', ('content', 200, {}), 10)
+
+        self.assertEqual(self.cache.get('key'), ('content', 200, {}))
+        self.assertEqual(self.cache.get('other', 'default'), 'default')
+
+    def test_expired(self):
+        self.cache.set('key', 'value', -1)
+
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_replace(self):
+        self.cache.set('key', 'value', 10)
+        self.cache.set('key', 'other', 10)
+
+        self.assertEqual(self.cache.get('key'), 'other')
+
+
+class TestMemoryCache(CacheTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.MemoryCache(maxsize=2)
+
+    def test_eviction(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key, 10)
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('c'), 'c')
+
+
+class TestSharedMemoryCache(CacheTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.SharedMemoryCache(
+            sets=2, ways=2, slot_size=256, locks=2
+        )
+
+    def test_too_big(self):
+        self.assertFalse(self.cache.set('key', 'x' * 1000, 10))
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_least_recently_used_evicted(self):
+        keys = ['key%s' % i for i in range(20)]
+        bucket = self.cache._bucket(self.cache._digest(keys[0])[0])
+        same = [
+            k for k in keys
+            if self.cache._bucket(self.cache._digest(k)[0]) == bucket
+        ][:3]
+        self.cache.set(same[0], 0, 10)
+        self.cache.set(same[1], 1, 10)
+        self.cache.get(same[0])
+        self.cache.set(same[2], 2, 10)
+
+        self.assertEqual(self.cache.get(same[0]), 0)
+        self.assertIsNone(self.cache.get(same[1]))
+        self.assertEqual(self.cache.get(same[2]), 2)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'Requires fork')
+    def test_shared_between_processes(self):
+        pid = os.fork()
+        if pid == 0:
+            self.cache.set('key', 'from child', 10)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(self.cache.get('key'), 'from child')
+
+
+class TestCachedEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        calls = []
+
+        class Resource(object):
+
+            @resource.GET(path='/<name>', cache=60)
+            def func(self, name, **query):
+                calls.append(name)
+                return name, {'X-Test': 'test'}
+
+        self.calls = calls
+        self.app = base.App()
+        self.app.add('/path', Resource)
+
+    def test_cached(self):
+        first = self.app.dispatch('/path/a', 'GET', query={'q': '1'})
+        second = self.app.dispatch('/path/a', 'GET', query={'q': '1'})
+        self.app.dispatch('/path/a', 'GET', query={'q': '2'})
+        self.app.dispatch('/path/b', 'GET', query={'q': '1'})
+
+        self.assertEqual(first, ('a', 200, {'X-Test': 'test'}))
+        self.assertEqual(second, first)
+        self.assertIsNot(second[2], first[2])
+        self.assertEqual(self.calls, ['a', 'a', 'b'])
+
+    def test_local_cached_separately(self):
+        local = self.app.client()
+        first = local.get('/path/a')
+        second = local.get('/path/a')
+        self.app.dispatch('/path/a', 'GET')
+
+        self.assertEqual(first, 'a')
+        self.assertEqual(second, 'a')
+        self.assertEqual(self.calls, ['a', 'a'])
+
+    def test_local_result_copied(self):
+        @resource.GET(cache=60)
+        def config():
+            self.calls.append('config')
+            return {'a': [1]}
+
+        self.app.add('/config', config)
+        local = self.app.client()
+        local.get('/config')['a'].append(2)
+
+        self.assertEqual(local.get('/config'), {'a': [1]})
+        self.assertEqual(self.calls, ['config'])
+
+    def test_make_key(self):
+        self.assertEqual(
+            cache.make_key('func', {'name': 'a'}, {'b': '2', 'a': '1'}),
+            'func|name=a|a=1&b=2||'
+        )
+        self.assertEqual(
+            cache.make_key('func', local=True), 'func|||||local'
+        )
+
+    def test_make_key_escaped(self):
+        self.assertNotEqual(
+            cache.make_key('func', None, {'a': '1&b=2'}),
+            cache.make_key('func', None, {'a': '1', 'b': '2'})
+        )
+        self.assertNotEqual(
+            cache.make_key('func', None, {'a': ['1', '2']}),
+            cache.make_key('func', None, {'a': '1,2'})
+        )
+        self.assertNotEqual(
+            cache.make_key('func', None, None, 'a|b'),
+            cache.make_key('func', None, None, 'a', {'Vary': 'b'}, ['Vary'])
+        )
+
+    def test_vary(self):
+        @resource.GET(cache=60, headers={'Vary': 'Accept-Language'},
+                      inject_request='request')
+        def greet(request):
+            self.calls.append(request.headers)
+            return request.headers.get('Accept-Language')
+
+        self.app.add('/greet', greet)
+        english = self.app.dispatch(
+            '/greet', 'GET', headers={'Accept-Language': 'en'}
+        )
+        german = self.app.dispatch(
+            '/greet', 'GET', headers={'Accept-Language': 'de'}
+        )
+        self.app.dispatch('/greet', 'GET', headers={'Accept-Language': 'en'})
+
+        self.assertEqual(english[0], 'en')
+        self.assertEqual(german[0], 'de')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_raw_not_cached(self):
+        @resource.GET(cache=60)
+        def download():
+            self.calls.append('download')
+            return io.BytesIO(b'abcdef')
+
+        self.app.add('/download', download)
+        first = self.app.dispatch('/download', 'GET')
+        second = self.app.dispatch('/download', 'GET')
+
+        self.assertEqual(first[0].read(), b'abcdef')
+        self.assertEqual(second[0].read(), b'abcdef')
+        self.assertEqual(self.calls, ['download', 'download'])
+
+    def test_partial_not_cached(self):
+        @resource.GET(cache=60, content_type='text/plain')
+        def text():
+            self.calls.append('text')
+            return b'abcdef'
+
+        self.app.add('/text', text)
+        partial = self.app.dispatch(
+            '/text', 'GET', headers={'Range': 'bytes=0-1'}
+        )
+        full = self.app.dispatch('/text', 'GET')
+
+        self.assertEqual(partial[1], 206)
+        self.assertEqual(bytes(full[0]), b'abcdef')
+        self.assertEqual(full[1], 200)
@@ -0,0 +1,324 @@
+import datetime
+import threading
+import unittest
+
+import mock
+from pyrs import schema
+import jsonschema
+from werkzeug import serving
+
+from .. import base
+from .. import client
+from .. import errors
+from .. import hooks
+from .. import resource
+from .. import response
+from .. import wsgi
+
+
+class UserSchema(schema.Object):
+    name = schema.String(required=True)
+    created = schema.Date()
+
+
+class TestLocalClient(unittest.TestCase):
+
+    def setUp(self):
+        @resource.GET(response=UserSchema)
+        def get_user(name):
+            if name == 'missing':
+                raise errors.NotFound('No such user')
+            return {'name': name, 'created': datetime.date(2020, 1, 2)}
+
+        @resource.GET(response=UserSchema)
+        def invalid_user(name):
+            return {'created': datetime.date(2020, 1, 2)}
+
+        @resource.GET
+        def plain():
+            return {'plain': True}
+
+        self.app = base.App()
+        self.app.add('/user/<name>', get_user)
+        self.app.add('/invalid/<name>', invalid_user)
+        self.app.add('/plain', plain)
+        self.client = self.app.client()
+
+    def test_get(self):
+        self.assertEqual(
+            self.client.get('/user/admin'),
+            {'name': 'admin', 'created': '2020-01-02'}
+        )
+
+    def test_request(self):
+        content, status, headers = self.client.request('GET', '/plain')
+
+        self.assertEqual(content, {'plain': True})
+        self.assertEqual(status, 200)
+
+    def test_original_error(self):
+        with self.assertRaises(errors.NotFound) as ctx:
+            self.client.get('/user/missing')
+
+        self.assertEqual(ctx.exception.args, ('No such user',))
+
+    def test_routing_error(self):
+        with self.assertRaises(errors.NotFound):
+            self.client.get('/unknown')
+        with self.assertRaises(errors.MethodNotAllowed):
+            self.client.post('/plain')
+
+    def test_response_validated(self):
+        with self.assertRaises(jsonschema.exceptions.ValidationError):
+            self.client.get('/invalid/admin')
+
+    def test_error_transformed(self):
+        @resource.GET
+        def lookup():
+            raise KeyError('missing')
+
+        self.app.map_exception(KeyError, errors.NotFound)
+        self.app.add('/lookup', lookup)
+
+        with self.assertRaises(errors.NotFound) as ctx:
+            self.client.get('/lookup')
+
+        self.assertIsInstance(ctx.exception.cause, KeyError)
+
+    def test_exception_hook(self):
+        class Hook(hooks.Hook):
+            def exception(self, request, exception):
+                return response.Response('handled', request=request)
+
+        app = base.App(hooks=[Hook])
+        app.add('/user/<name>', self.app.functions['get_user'])
+
+        self.assertEqual(app.client().get('/user/missing'), 'handled')
+
+    def test_raised_request_logged(self):
+        self.app.recorder = mock.Mock()
+        self.app.access_log = mock.Mock()
+
+        with self.assertRaises(errors.NotFound):
+            self.client.get('/user/missing')
+
+        trace = self.app.recorder.record.call_args[0][0]
+        self.assertEqual(trace.status, 404)
+        self.assertTrue(self.app.access_log.log.called)
+
+
+class Handler(serving.WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args):
+        pass
+
+
+class TestRemoteClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        @resource.GET(response=UserSchema)
+        def get_user(name):
+            """Gives back the user"""
+            if name == 'missing':
+                raise errors.NotFound('No such user')
+            return {'name': name}
+
+        @resource.GET(response=UserSchema, response_validation='off')
+        def invalid_user(name):
+            return {'created': datetime.date(2020, 1, 2)}
+
+        @resource.POST(inject_body='body', inject_query='query', status=200)
+        def echo(body, query):
+            return {'body': body, 'query': query}
+
+        @resource.GET(response=UserSchema, paginate=True)
+        def list_users(cursor, limit):
+            return ({'name': name} for name in ('a', 'b', 'c'))
+
+        @resource.POST(status=200)
+        def close():
+            return {'closed': True}
+
+        class Users(object):
+
+            @resource.GET(path='/<name>')
+            def get_user(self, name):
+                return {'name': name}
+
+        cls.app = base.App(batch_path='/_batch')
+        cls.app.add('/users', Users)
+        cls.app.add('/user/<name>', get_user)
+        cls.app.add('/invalid/<name>', invalid_user)
+        cls.app.add('/echo', echo)
+        cls.app.add('/list', list_users)
+        cls.app.add('/close', close)
+        cls.server = serving.make_server(
+            '127.0.0.1', 0, wsgi.Application(cls.app), threaded=True,
+            request_handler=Handler
+        )
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.Client = client.generate(self.app)
+        self.client = self.Client(
+            'http://127.0.0.1:%s' % self.server.server_port
+        )
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_generated_methods(self):
+        self.assertEqual(self.Client.get_user.__doc__, 'Gives back the user')
+        self.assertNotIn('batch', self.Client.endpoints)
+        self.assertEqual(self.Client.batch_path, '/_batch')
+
+    def test_call(self):
+        self.assertEqual(self.client.get_user(name='admin'), {'name': 'admin'})
+        self.assertEqual(
+            self.client.echo(body={'a': 1}, query={'b': '2'}),
+            {'body': {'a': 1}, 'query': {'b': '2'}}
+        )
+
+    def test_paginated(self):
+        page = self.client.list_users(query={'limit': '2'})
+
+        self.assertEqual(page['items'], [{'name': 'a'}, {'name': 'b'}])
+        self.assertIsNotNone(page['next'])
+
+    def test_projection_not_validated(self):
+        self.assertEqual(
+            self.client.get_user(name='admin', query={'fields': 'created'}),
+            {}
+        )
+
+    def test_reserved_method_names(self):
+        self.assertEqual(self.Client.methods['close_'], 'close')
+        self.assertEqual(self.client.close_(), {'closed': True})
+
+        self.client.close()
+
+        self.assertTrue(self.client.pool._idle.empty())
+
+    def test_method_names_unique(self):
+        self.assertEqual(client.get_method_name('a.b'), 'a_b')
+        self.assertEqual(client.get_method_name('a.b', {'a_b'}), 'a_b_')
+        self.assertEqual(client.get_method_name('send'), 'send_')
+
+    def test_remote_error(self):
+        with self.assertRaises(client.RemoteError) as ctx:
+            self.client.get_user(name='missing')
+
+        self.assertEqual(ctx.exception.status, 404)
+        self.assertEqual(ctx.exception.error, 'not_found')
+
+    def test_response_validated(self):
+        with self.assertRaises(errors.ValidationError):
+            self.client.invalid_user(name='admin')
+
+    def test_batch(self):
+        with mock.patch.object(
+            self.client.pool, 'request', wraps=self.client.pool.request
+        ) as request:
+            with self.client.batch() as batch:
+                first = batch.get_user(name='first')
+                missing = batch.get_user(name='missing')
+                echo = batch.echo(body={'a': 1})
+
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(first.result(), {'name': 'first'})
+        self.assertEqual(echo.result(), {'body': {'a': 1}, 'query': {}})
+        with self.assertRaises(client.RemoteError):
+            missing.result()
+
+    def test_batch_class_endpoint(self):
+        method = [
+            name for name in self.Client.methods if name.endswith('get_user')
+            and name != 'get_user'
+        ][0]
+        with self.client.batch() as batch:
+            first = getattr(batch, method)(name='first')
+            second = batch.get_user(name='second')
+
+        self.assertEqual(first.result(), {'name': 'first'})
+        self.assertEqual(second.result(), {'name': 'second'})
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = client.ConnectionPool('localhost')
+        self.broken = mock.Mock()
+        self.broken.request.side_effect = client.http_client.BadStatusLine('')
+        self.pool._put(self.broken)
+        self.conn = mock.Mock()
+        self.conn.getresponse.return_value.status = 200
+        self.conn.getresponse.return_value.read.return_value = b'{}'
+        self.conn.getresponse.return_value.getheaders.return_value = []
+        self.pool.connection_class = mock.Mock(return_value=self.conn)
+
+    def test_idempotent_retried(self):
+        status, unused, data = self.pool.request('GET', '/path')
+
+        self.assertEqual(status, 200)
+        self.assertTrue(self.broken.close.called)
+
+    def test_connection_reused(self):
+        self.pool._idle.get_nowait()
+        self.conn.getresponse.return_value.will_close = False
+        for unused in range(3):
+            self.pool.request('GET', '/path')
+
+        self.assertEqual(self.pool.created, 1)
+        self.assertEqual(self.conn.request.call_count, 3)
+
+    def test_not_idempotent_not_retried(self):
+        with self.assertRaises(client.http_client.HTTPException):
+            self.pool.request('POST', '/path')
+
+        self.assertFalse(self.conn.request.called)
+
+
+class TestBatchEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        @resource.GET
+        def ping():
+            return 'pong'
+
+        self.app = base.App(batch_path='/_batch')
+        self.app.add('/ping', ping)
+
+    def test_dispatched_once(self):
+        with mock.patch.object(
+            self.app, '_dispatch', wraps=self.app._dispatch
+        ) as dispatch:
+            content, status, unused = self.app.dispatch(
+                '/_batch', 'POST', body=[
+                    {'method': 'GET', 'path': '/ping'},
+                    {'method': 'GET', 'path': '/unknown'},
+                ]
+            )
+
+        self.assertEqual(dispatch.call_count, 1)
+        self.assertEqual(status, 200)
+        self.assertEqual(content[0], {'status': 200, 'headers': {},
+                                      'body': 'pong'})
+        self.assertEqual(content[1]['status'], 404)
+
+    def test_nested_batch_rejected(self):
+        content, status, unused = self.app.dispatch(
+            '/_batch', 'POST', body=[
+                {'method': 'POST', 'path': '/_batch', 'body': []},
+            ]
+        )
+
+        self.assertEqual(content[0]['status'], 400)
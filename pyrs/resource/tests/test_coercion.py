@@ -0,0 +1,92 @@
+import datetime
+import unittest
+
+from pyrs import schema
+import werkzeug
+
+from .. import coercion
+from .. import errors
+from .. import request
+
+
+class Query(schema.Object):
+    limit = schema.Integer()
+    ratio = schema.Number()
+    active = schema.Boolean()
+    order = schema.String(enum=['asc', 'desc'])
+    level = schema.Enum(enum=[1, 2, 3])
+    tags = schema.Array()
+    since = schema.Date()
+    search = schema.String(name='q')
+
+
+class TestCoercer(unittest.TestCase):
+
+    def test_convert(self):
+        coercer = coercion.Coercer(Query)
+
+        value = coercer({
+            'limit': '5', 'ratio': '0.5', 'active': 'yes', 'order': 'asc',
+            'level': '2', 'tags': 'a,b', 'since': '2015-08-16', 'q': '12',
+            'other': 'kept',
+        })
+
+        self.assertEqual(value, {
+            'limit': 5, 'ratio': 0.5, 'active': True, 'order': 'asc',
+            'level': 2, 'tags': ['a', 'b'], 'search': '12', 'other': 'kept',
+            'since': datetime.date(2015, 8, 16),
+        })
+
+    def test_multi_dict(self):
+        coercer = coercion.Coercer(Query)
+
+        value = coercer(werkzeug.datastructures.MultiDict([
+            ('tags', 'a'), ('tags', 'b'), ('limit', '1'), ('limit', '2')
+        ]))
+
+        self.assertEqual(value, {'tags': ['a', 'b'], 'limit': 1})
+
+    def test_errors(self):
+        coercer = coercion.Coercer(Query)
+
+        with self.assertRaises(coercion.CoercionError) as ctx:
+            coercer({'limit': 'many', 'active': 'maybe', 'level': '5'})
+
+        self.assertEqual(
+            sorted(ctx.exception.errors), ['active', 'level', 'limit']
+        )
+
+    def test_cached(self):
+        self.assertIs(
+            coercion.get_coercer(Query), coercion.get_coercer(Query)
+        )
+
+
+class TestRequestQuery(unittest.TestCase):
+
+    def test_query_coerced(self):
+        req = request.Request(
+            opts=dict(query=Query), query={'limit': '5', 'active': 'false'}
+        )
+
+        self.assertEqual(req.build(), {'limit': 5, 'active': False})
+
+    def test_invalid_query(self):
+        req = request.Request(
+            opts=dict(query=Query), query={'limit': 'x', 'ratio': 'y'}
+        )
+
+        with self.assertRaises(errors.InputValidationError) as ctx:
+            req.build()
+
+        self.assertEqual(
+            sorted(ctx.exception.details['parameters']), ['limit', 'ratio']
+        )
+
+    def test_schema_violation(self):
+        req = request.Request(
+            opts=dict(query=Query), query={'since': 'yesterday'}
+        )
+
+        with self.assertRaises(errors.InputValidationError):
+            req.build()
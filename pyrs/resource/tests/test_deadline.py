@@ -0,0 +1,216 @@
+import json
+import sys
+import threading
+import time
+import unittest
+
+from .. import base
+from .. import deadline
+from .. import errors
+from .. import resource
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_remaining(self):
+        limit = deadline.Deadline(10)
+
+        self.assertFalse(limit.expired)
+        self.assertTrue(9 < limit.remaining() <= 10)
+
+    def test_expired(self):
+        limit = deadline.Deadline(-1)
+
+        self.assertTrue(limit.expired)
+        self.assertEqual(limit.remaining(), 0)
+
+    def test_call_without_deadline(self):
+        self.assertEqual(deadline.call(lambda value: value, {'value': 1}), 1)
+
+    def test_call_expired(self):
+        called = []
+
+        with self.assertRaises(errors.GatewayTimeout):
+            deadline.call(called.append, {}, deadline.Deadline(-1))
+        self.assertEqual(called, [])
+
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.executor = deadline.Executor(1, abandoned=1)
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_call(self):
+        result = self.executor.call(
+            lambda value: value, {'value': 1}, deadline.Deadline(1)
+        )
+
+        self.assertEqual(result, 1)
+        self.assertEqual(self.executor.running, 0)
+
+    def test_threads_reused(self):
+        executor = deadline.Executor(2)
+        self.addCleanup(executor.shutdown)
+        idents = set(
+            executor.call(threading.current_thread, {}, deadline.Deadline(1))
+            for _ in range(5)
+        )
+
+        self.assertEqual(len(idents), 1)
+        self.assertEqual(executor.threads, 1)
+
+    def test_exception(self):
+        def func():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.executor.call(func, {}, deadline.Deadline(1))
+        self.assertEqual(self.executor.running, 0)
+
+    def test_abandoned_gives_back_the_worker(self):
+        with self.assertRaises(errors.GatewayTimeout):
+            self.executor.call(
+                self.release.wait, {'timeout': 5}, deadline.Deadline(0.05)
+            )
+        self.assertEqual(self.executor.running, 0)
+        self.assertEqual(self.executor.abandoned, 1)
+        self.assertEqual(self.executor.threads, 0)
+
+        with self.assertRaises(errors.ServiceUnavailable):
+            self.executor.call(lambda: 1, {}, deadline.Deadline(1))
+
+        self.release.set()
+        for _ in range(100):
+            if not self.executor.abandoned:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.executor.abandoned, 0)
+        self.assertEqual(
+            self.executor.call(lambda: 1, {}, deadline.Deadline(1)), 1
+        )
+
+    def test_abandoned_worker_replaced(self):
+        executor = deadline.Executor(1, abandoned=2)
+        with self.assertRaises(errors.GatewayTimeout):
+            executor.call(
+                self.release.wait, {'timeout': 5}, deadline.Deadline(0.05)
+            )
+
+        current = executor.call(
+            threading.current_thread, {}, deadline.Deadline(1)
+        )
+
+        self.assertEqual(executor.abandoned, 1)
+        self.assertEqual(executor.threads, 1)
+        self.assertIs(
+            executor.call(threading.current_thread, {}, deadline.Deadline(1)),
+            current
+        )
+        executor.shutdown()
+
+    def test_waits_for_worker_until_deadline(self):
+        executor = deadline.Executor(1, abandoned=2)
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            return self.release.wait(5)
+
+        thread = threading.Thread(
+            target=executor.call, args=(slow, {}, deadline.Deadline(5))
+        )
+        thread.start()
+        started.wait()
+
+        with self.assertRaises(errors.GatewayTimeout):
+            executor.call(lambda: 1, {}, deadline.Deadline(0.05))
+        self.assertEqual(executor.abandoned, 0)
+        self.release.set()
+        thread.join()
+
+
+class TestTimeout(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        release = self.release
+
+        class Resource(object):
+
+            @resource.GET(path='/slow', timeout=0.05)
+            def slow(self):
+                release.wait(5)
+                return 'slow'
+
+            @resource.GET(path='/fast', inject_deadline=True)
+            def fast(self, deadline):
+                return deadline.remaining()
+
+        self.app = base.App(timeout=10)
+        self.app.add('/path', Resource)
+
+    def tearDown(self):
+        self.release.set()
+        self.app.close()
+
+    def test_abandoned(self):
+        started = time.time()
+        content, status, headers = self.app.dispatch('/path/slow', 'GET')
+
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(status, 504)
+        self.assertEqual(json.loads(content), {'error': 'gateway_timeout'})
+
+    def test_default_deadline_injected(self):
+        content, status, headers = self.app.dispatch('/path/fast', 'GET')
+
+        self.assertEqual(status, 200)
+        self.assertTrue(9 < content <= 10)
+
+
+@unittest.skipIf(
+    sys.version_info < (3, 5), 'Coroutine functions require Python 3.5'
+)
+class TestCoroutineTimeout(unittest.TestCase):
+
+    def setUp(self):
+        namespace = {}
+        exec('\n'.join([
+            'import asyncio',
+            'cancelled = []',
+            'async def slow():',
+            '    try:',
+            '        await asyncio.sleep(5)',
+            '    except asyncio.CancelledError:',
+            '        cancelled.append(True)',
+            '        raise',
+            'async def fast():',
+            '    return "fast"',
+        ]), namespace)
+        self.namespace = namespace
+        self.app = base.App()
+        self.app.add('/slow', resource.GET(namespace['slow'], timeout=0.05))
+        self.app.add('/fast', resource.GET(namespace['fast']))
+
+    def test_cancelled(self):
+        content, status, headers = self.app.dispatch('/slow', 'GET')
+
+        self.assertEqual(status, 504)
+        self.assertEqual(self.namespace['cancelled'], [True])
+
+    def test_without_deadline(self):
+        content, status, headers = self.app.dispatch('/fast', 'GET')
+
+        self.assertEqual(content, 'fast')
+
+    def test_event_loop_reused(self):
+        self.app.dispatch('/fast', 'GET')
+        loop = deadline._get_event_loop()
+        self.app.dispatch('/fast', 'GET')
+
+        self.assertIs(deadline._get_event_loop(), loop)
+        self.assertFalse(loop.is_closed())
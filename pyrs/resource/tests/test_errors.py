@@ -1,7 +1,9 @@
 import json
 import unittest
 
+from .. import base
 from .. import errors
+from .. import resource
 
 
 class TestError(unittest.TestCase):
@@ -21,6 +23,95 @@ class TestError(unittest.TestCase):
 
         self.assertEqual(ex.args, ('Error message',))
 
+    def test_static(self):
+        self.assertTrue(errors.NotFound().is_static())
+        self.assertFalse(errors.NotFound('message').is_static())
+        self.assertFalse(errors.NotFound(key='value').is_static())
+
+    def test_static_overridden_message(self):
+        class Special(errors.Error):
+            def get_message(self, debug=False):
+                return {'error': 'special'}
+
+        self.assertFalse(Special().is_static())
+
+    def test_static_overridden_details(self):
+        class Special(errors.Error):
+            def get_details(self, debug=False):
+                return {'key': 'value'}
+
+        class Schema(errors.ErrorSchema):
+            pass
+
+        class Custom(errors.Error):
+            schema = Schema
+
+        self.assertFalse(Special().is_static())
+        self.assertFalse(Custom().is_static())
+
+    def test_method_not_allowed(self):
+        ex = errors.MethodNotAllowed(allow=['POST', 'GET'])
+
+        self.assertEqual(ex.get_headers(), {'Allow': 'GET, POST'})
+        self.assertEqual(ex.get_status(), 405)
+
+
+class TestErrorResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.app = base.App()
+
+    def test_static_cached(self):
+        first = errors.ErrorResponse(errors.NotFound(), self.app).build()
+        second = errors.ErrorResponse(errors.NotFound(), self.app).build()
+
+        self.assertEqual(first, second)
+        self.assertIs(first[0], second[0])
+        self.assertIsNot(first[2], second[2])
+        self.assertEqual(json.loads(first[0]), {'error': 'not_found'})
+
+    def test_cached_per_app(self):
+        first = errors.ErrorResponse(errors.NotFound(), self.app).build()
+        other = errors.ErrorResponse(errors.NotFound(), base.App()).build()
+
+        self.assertEqual(first, other)
+        self.assertIsNot(first[0], other[0])
+
+    def test_not_static_not_cached(self):
+        first = errors.ErrorResponse(
+            errors.NotFound('message'), self.app
+        ).build()
+        second = errors.ErrorResponse(
+            errors.NotFound('message'), self.app
+        ).build()
+
+        self.assertEqual(first, second)
+        self.assertIsNot(first[0], second[0])
+
+    def test_headers_in_cache_key(self):
+        get = errors.ErrorResponse(
+            errors.MethodNotAllowed(allow=['GET']), self.app
+        ).build()
+        post = errors.ErrorResponse(
+            errors.MethodNotAllowed(allow=['POST']), self.app
+        ).build()
+
+        self.assertEqual(get[2]['Allow'], 'GET')
+        self.assertEqual(post[2]['Allow'], 'POST')
+
+    def test_raw_endpoint_error(self):
+        @resource.GET(content_type='text/plain')
+        def text():
+            raise errors.NotFound()
+
+        app = base.App()
+        app.add('/text', text)
+        content, status, headers = app.dispatch('/text', 'GET')
+
+        self.assertEqual(status, 404)
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(content), {'error': 'not_found'})
+
 
 class TestSchema(unittest.TestCase):
 
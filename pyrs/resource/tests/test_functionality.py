@@ -26,6 +26,10 @@ class TestBasicCases(unittest.TestCase):
             def get_users(self):
                 return app_users
 
+            @resource.GET(path='/paged', paginate=True)
+            def get_users_paged(self, cursor, limit):
+                return iter(app_users)
+
             @resource.GET(path='/<name>', response=UserSchema)
             def get_user_by_name(self, name):
                 for user in self.get_users():
@@ -33,6 +37,13 @@ class TestBasicCases(unittest.TestCase):
                         # Workaround of pyrs-schema issue #14
                         return user.copy()
 
+            @resource.GET(
+                path='/<name>/fields', response=UserSchema,
+                inject_fields=True
+            )
+            def get_user_fields(self, name, fields):
+                return {'id': 1, 'name': name, 'email': ','.join(fields)}
+
             @resource.POST(request=UserSchema, inject_body='body')
             def create_user(self, body):
                 body['id'] = 12
@@ -50,11 +61,61 @@ class TestBasicCases(unittest.TestCase):
         content, status, headers = self.app.dispatch('/user/', 'GET')
         self.assertEqual(content, self.app_users)
 
+    def test_get_users_paged(self):
+
+        content, status, headers = self.app.dispatch(
+            '/user/paged', 'GET', query={'limit': '1'}
+        )
+        content = json.loads(content)
+        self.assertEqual(content['items'], self.app_users[:1])
+
+        content, status, headers = self.app.dispatch(
+            '/user/paged', 'GET',
+            query={'limit': '1', 'cursor': content['next']}
+        )
+        self.assertEqual(
+            json.loads(content), {'items': self.app_users[1:], 'next': None}
+        )
+
+    def test_get_users_paged_invalid_limit(self):
+
+        content, status, headers = self.app.dispatch(
+            '/user/paged', 'GET', query={'limit': '1000'}
+        )
+        self.assertEqual(status, 400)
+
     def test_get_user_by_name(self):
 
         content, status, headers = self.app.dispatch('/user/admin', 'GET')
         self.assertEqual(json.loads(content), self.app_users[0])
 
+    def test_get_user_by_name_selected_fields(self):
+
+        content, status, headers = self.app.dispatch(
+            '/user/admin', 'GET', query={'fields': 'name,id'}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(content), {'id': 1, 'name': 'admin'})
+
+    def test_get_user_by_name_unknown_field(self):
+
+        content, status, headers = self.app.dispatch(
+            '/user/admin', 'GET', query={'fields': 'name,password'}
+        )
+        self.assertEqual(status, 400)
+        self.assertEqual(
+            json.loads(content), {'error': 'invalid_request_format'}
+        )
+
+    def test_selected_fields_injected(self):
+
+        content, status, headers = self.app.dispatch(
+            '/user/admin/fields', 'GET', query={'fields': 'email, name'}
+        )
+        self.assertEqual(
+            json.loads(content), {'name': 'admin', 'email': 'name,email'}
+        )
+
     def test_get_user_by_name_invalid_response(self):
 
         content, status, headers = self.app.dispatch('/user/invalid', 'GET')
@@ -0,0 +1,184 @@
+import io
+import json
+import threading
+import unittest
+
+from .. import base
+from .. import errors
+from .. import idempotency
+from .. import resource
+from .. import store
+
+
+class TestIdempotency(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.guard = idempotency.Idempotency(store.MemoryStore())
+
+    def func(self, status=201):
+        self.calls.append(status)
+        return ('content', status, {})
+
+    def test_executed_once(self):
+        first = self.guard.run('key', self.func)
+        second = self.guard.run('key', self.func)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, [201])
+
+    def test_server_error_not_stored(self):
+        self.guard.run('key', self.func, 500)
+        self.guard.run('key', self.func, 500)
+
+        self.assertEqual(self.calls, [500, 500])
+
+    def test_concurrent_duplicates_wait(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait()
+            return self.func()
+
+        results = []
+        first = threading.Thread(
+            target=lambda: results.append(self.guard.run('key', slow))
+        )
+        first.start()
+        started.wait()
+        second = threading.Thread(
+            target=lambda: results.append(self.guard.run('key', self.func))
+        )
+        second.start()
+        release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(self.calls, [201])
+        self.assertEqual(len(results), 2)
+
+    def test_raw_not_stored(self):
+        self.guard.run('key', lambda: (io.BytesIO(b'data'), 201, {}))
+        self.guard.run('key', self.func)
+
+        self.assertEqual(self.calls, [201])
+
+    def test_fingerprint_mismatch(self):
+        self.guard.run('key', self.func, fingerprint='a')
+
+        self.assertEqual(
+            self.guard.run('key', self.func, fingerprint='a'),
+            ('content', 201, {})
+        )
+        with self.assertRaises(errors.UnprocessableEntity):
+            self.guard.run('key', self.func, fingerprint='b')
+        self.assertEqual(self.calls, [201])
+
+    def test_waiters_released_one_at_a_time(self):
+        started = threading.Event()
+        release = threading.Event()
+        running = []
+        overlapped = []
+
+        def failing():
+            started.set()
+            release.wait()
+            return self.func(500)
+
+        def retry():
+            overlapped.append(bool(running))
+            running.append(True)
+            try:
+                return self.func(500)
+            finally:
+                running.pop()
+
+        first = threading.Thread(target=self.guard.run, args=('key', failing))
+        first.start()
+        started.wait()
+        waiters = [
+            threading.Thread(target=self.guard.run, args=('key', retry))
+            for _ in range(3)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        release.set()
+        first.join()
+        for waiter in waiters:
+            waiter.join()
+
+        self.assertEqual(self.calls, [500] * 4)
+        self.assertEqual(overlapped, [False] * 3)
+
+    def test_make_key(self):
+        self.assertEqual(idempotency.make_key('func', 'abc'), 'func::abc')
+        self.assertEqual(
+            idempotency.make_key('func', 'abc', 'sub:1'), 'func:sub:1:abc'
+        )
+
+
+class TestIdempotentEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        calls = []
+
+        class Resource(object):
+
+            @resource.POST(idempotent=True, inject_body='body')
+            def create(self, body):
+                calls.append(body)
+                return {'id': len(calls)}
+
+        self.calls = calls
+        self.app = base.App(batch_path='/_batch')
+        self.app.add('/path', Resource)
+
+    def test_retry_answered_from_store(self):
+        headers = {'idempotency-key': 'abc'}
+        first = self.app.dispatch('/path/', 'POST', body={}, headers=headers)
+        second = self.app.dispatch('/path/', 'POST', body={}, headers=headers)
+
+        self.assertEqual(first, ({'id': 1}, 201, {}))
+        self.assertEqual(second, first)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_key_reused_by_different_body(self):
+        headers = {'idempotency-key': 'abc'}
+        self.app.dispatch('/path/', 'POST', body={}, headers=headers)
+        content, status, _ = self.app.dispatch(
+            '/path/', 'POST', body={'name': 'other'}, headers=headers
+        )
+
+        self.assertEqual(status, 422)
+        self.assertEqual(
+            json.loads(content)['error'], 'unprocessable_entity'
+        )
+        self.assertEqual(len(self.calls), 1)
+
+    def test_batch_calls(self):
+        call = {
+            'method': 'POST', 'path': '/path/', 'body': {},
+            'headers': {'Idempotency-Key': 'abc'},
+        }
+        first = self.app.dispatch('/_batch', 'POST', body=[call])[0]
+        second = self.app.dispatch('/_batch', 'POST', body=[call])[0]
+
+        self.assertEqual(first[0]['body'], {'id': 1})
+        self.assertEqual(second, first)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_local_client(self):
+        local = self.app.client(headers={'idempotency-key': 'abc'})
+        first = local.post('/path/', body={})
+        first['id'] = 'changed'
+
+        self.assertEqual(local.post('/path/', body={}), {'id': 1})
+        self.assertEqual(len(self.calls), 1)
+
+    def test_without_key(self):
+        self.app.dispatch('/path/', 'POST', body={})
+        self.app.dispatch('/path/', 'POST', body={})
+
+        self.assertEqual(len(self.calls), 2)
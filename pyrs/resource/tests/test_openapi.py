@@ -0,0 +1,109 @@
+import json
+import unittest
+
+from pyrs import schema
+import werkzeug.routing
+
+from .. import base
+from .. import openapi
+from .. import resource
+
+
+class UserSchema(schema.Object):
+    name = schema.String(required=True)
+
+
+class QuerySchema(schema.Object):
+    active = schema.Boolean()
+
+
+class TestOpenAPI(unittest.TestCase):
+
+    def setUp(self):
+        @resource.GET(response=UserSchema)
+        def get_user(user_id):
+            """Gives back the user"""
+
+        @resource.GET(query=QuerySchema)
+        def list_users(active=None):
+            pass
+
+        @resource.POST(request=UserSchema, response=UserSchema)
+        def create_user(**kwargs):
+            pass
+
+        self.app = base.App(openapi_path='/openapi.json')
+        self.app.add('/users/<int:user_id>', get_user)
+        self.app.add('/users', list_users)
+        self.app.add('/users', create_user)
+
+    def test_build(self):
+        spec = self.app.openapi.build()
+
+        self.assertEqual(spec['openapi'], '3.0.0')
+        self.assertEqual(sorted(spec['paths']), ['/users', '/users/{user_id}'])
+        get_user = spec['paths']['/users/{user_id}']['get']
+        self.assertEqual(get_user['operationId'], 'get_user')
+        self.assertEqual(get_user['description'], 'Gives back the user')
+        self.assertEqual(get_user['parameters'], [{
+            'name': 'user_id', 'in': 'path', 'required': True,
+            'schema': {'type': 'integer'},
+        }])
+        self.assertEqual(
+            get_user['responses']['200']['content']['application/json'],
+            {'schema': UserSchema().get_schema()}
+        )
+        list_users = spec['paths']['/users']['get']
+        self.assertEqual(list_users['parameters'][0]['name'], 'active')
+        self.assertEqual(list_users['parameters'][0]['in'], 'query')
+        create_user = spec['paths']['/users']['post']
+        self.assertIn('requestBody', create_user)
+        self.assertIn('201', create_user['responses'])
+
+    def test_cached_until_routing_changes(self):
+        body, etag = self.app.openapi.get()
+
+        self.assertIs(self.app.openapi.get()[0], body)
+        self.app.remove('get_user')
+        changed, changed_etag = self.app.openapi.get()
+        self.assertNotEqual(changed_etag, etag)
+        self.assertNotIn('/users/{user_id}', json.loads(changed.decode()))
+
+    def test_served(self):
+        content, status, headers = self.app.dispatch('/openapi.json', 'GET')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        spec = json.loads(bytes(content).decode('utf-8'))
+        self.assertNotIn('/openapi.json', spec['paths'])
+        self.assertEqual(headers['ETag'], self.app.openapi.get()[1])
+
+    def test_not_modified(self):
+        etag = self.app.openapi.get()[1]
+        content, status, unused = self.app.dispatch(
+            '/openapi.json', 'GET', headers={'If-None-Match': etag}
+        )
+
+        self.assertEqual(status, 304)
+        self.assertEqual(content, b'')
+
+    def test_convert_rule(self):
+        rule = list(self.app.rules.iter_rules('get_user'))[0]
+
+        path, parameters = openapi.convert_rule(rule)
+
+        self.assertEqual(path, '/users/{user_id}')
+        self.assertEqual(len(parameters), 1)
+
+    def test_convert_rule_converters(self):
+        rule = werkzeug.routing.Rule(
+            '/files/<string(length=2):code>/<float:size>/<name>'
+        )
+
+        path, parameters = openapi.convert_rule(rule)
+
+        self.assertEqual(path, '/files/{code}/{size}/{name}')
+        self.assertEqual(
+            [(p['name'], p['schema']['type']) for p in parameters],
+            [('code', 'string'), ('size', 'number'), ('name', 'string')]
+        )
@@ -0,0 +1,144 @@
+import json
+import unittest
+
+from pyrs import schema
+
+from .. import base
+from .. import pagination
+from .. import resource
+
+
+class TestCursor(unittest.TestCase):
+
+    def test_encode_decode(self):
+        cursor = pagination.encode_cursor({'id': 12})
+
+        self.assertNotIn('=', cursor)
+        self.assertEqual(pagination.decode_cursor(cursor), {'id': 12})
+
+    def test_empty(self):
+        self.assertIsNone(pagination.encode_cursor(None))
+        self.assertIsNone(pagination.decode_cursor(''))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            pagination.decode_cursor('@@not-a-cursor')
+
+    def test_negative_offset(self):
+        with self.assertRaises(pagination.InvalidCursor):
+            pagination.decode_cursor(pagination.encode_cursor(-1))
+
+
+class TestLimit(unittest.TestCase):
+
+    def test_default(self):
+        self.assertEqual(pagination.parse_limit(None, 20, 100), 20)
+
+    def test_value(self):
+        self.assertEqual(pagination.parse_limit('5', 20, 100), 5)
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            pagination.parse_limit('0', 20, 100)
+        with self.assertRaises(ValueError):
+            pagination.parse_limit('101', 20, 100)
+
+
+class TestPaginate(unittest.TestCase):
+
+    def test_iterable(self):
+        consumed = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        page = pagination.paginate(items(), 10, 5)
+
+        self.assertEqual(page['items'], [10, 11, 12, 13, 14])
+        self.assertEqual(pagination.decode_cursor(page['next']), 15)
+        self.assertEqual(len(consumed), 16)
+
+    def test_iterable_last_page(self):
+        page = pagination.paginate([1, 2, 3], 1, 5)
+
+        self.assertEqual(page, {'items': [2, 3], 'next': None})
+
+    def test_fetcher(self):
+        def fetch(cursor, limit):
+            return ['a', 'b'][:limit], 'b'
+
+        page = pagination.paginate(fetch, None, 1)
+
+        self.assertEqual(page['items'], ['a'])
+        self.assertEqual(pagination.decode_cursor(page['next']), 'b')
+
+    def test_invalid_offset(self):
+        with self.assertRaises(pagination.InvalidCursor):
+            pagination.paginate([1, 2, 3], 'x', 5)
+
+
+class User(schema.Object):
+    id = schema.Integer(required=True)
+    name = schema.String(required=True)
+
+
+class TestPagedEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        users = [{'id': i, 'name': 'user%s' % i} for i in range(3)]
+
+        @resource.GET(paginate=True, response=User)
+        def get_users(cursor, limit):
+            return (dict(user) for user in users)
+
+        self.app = base.App()
+        self.app.add('/users', get_users)
+
+    def get(self, **query):
+        content, status, headers = self.app.dispatch(
+            '/users', 'GET', query=query
+        )
+        return json.loads(content), status
+
+    def test_items_validated(self):
+        content, status = self.get(limit='2')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(content['items'], [
+            {'id': 0, 'name': 'user0'}, {'id': 1, 'name': 'user1'}
+        ])
+        self.assertIsNotNone(content['next'])
+
+    def test_fields_of_items(self):
+        content, status = self.get(limit='1', fields='name')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(content['items'], [{'name': 'user0'}])
+        self.assertIsNotNone(content['next'])
+
+    def test_page_schema(self):
+        page = pagination.page_schema(User)
+
+        self.assertIs(pagination.page_schema(User), page)
+        self.assertEqual(
+            page.get_schema()['properties']['items']['items'],
+            User().get_schema()
+        )
+
+    def test_crafted_cursor(self):
+        for cursor in ('@@', pagination.encode_cursor('x'),
+                       pagination.encode_cursor(-5)):
+            content, status = self.get(cursor=cursor)
+
+            self.assertEqual(status, 400)
+            self.assertEqual(content['error'], 'bad_request')
+
+    def test_repeated_parameters(self):
+        for query in ({'limit': ['1', '2']},
+                      {'cursor': [pagination.encode_cursor(1)] * 2}):
+            content, status = self.get(**query)
+
+            self.assertEqual(status, 400)
+            self.assertNotIn('TypeError', json.dumps(content))
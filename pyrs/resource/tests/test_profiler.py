@@ -0,0 +1,145 @@
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from .. import base
+from .. import lib
+from .. import profiler
+from .. import resource
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        class Resource(object):
+            _name = 'Resource'
+
+            @resource.GET
+            def func(self):
+                return 'result'
+
+        self.resource = Resource
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_app(self, **config):
+        app = base.App(
+            profile=True, profile_dir=self.directory, **config
+        )
+        app.add('/path', self.resource)
+        return app
+
+    def get_profiles(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_disabled_by_default(self):
+        app = base.App()
+
+        self.assertIsNone(app.profiler)
+
+    def test_profile_stored(self):
+        app = self.make_app(profile_threshold=0)
+
+        result = app.dispatch(
+            '/path/', 'GET', headers={'Authorization': 'secret'}
+        )
+
+        self.assertEqual(result, ('result', 200, {}))
+        files = self.get_profiles()
+        self.assertEqual(len(files), 2)
+        info, prof = [os.path.join(self.directory, f) for f in files]
+        pstats.Stats(prof)
+        with open(info) as f:
+            info = json.load(f)
+        self.assertEqual(info['endpoint'], 'Resource#func')
+        self.assertEqual(info['status'], 200)
+        self.assertEqual(
+            list(info['timings']), ['match', 'request', 'call', 'response']
+        )
+        self.assertEqual(info['request']['path'], '/path/')
+        self.assertEqual(info['request']['headers'], {'Authorization': '***'})
+
+    def test_fast_request_not_stored(self):
+        app = self.make_app(profile_threshold=60)
+
+        app.dispatch('/path/', 'GET')
+
+        self.assertEqual(self.get_profiles(), [])
+
+    def test_forced_by_header(self):
+        app = self.make_app(
+            profile_rate=0, profile_threshold=60, profile_secret='secret'
+        )
+
+        app.dispatch('/path/', 'GET')
+        app.dispatch('/path/', 'GET', headers={'X-Profile': 'other'})
+        self.assertEqual(self.get_profiles(), [])
+
+        app.dispatch('/path/', 'GET', headers={'x-profile': 'secret'})
+        self.assertEqual(len(self.get_profiles()), 2)
+
+    def test_header_ignored_without_secret(self):
+        app = self.make_app(profile_rate=0, profile_threshold=60)
+
+        app.dispatch('/path/', 'GET', headers={'X-Profile': '1'})
+
+        self.assertEqual(self.get_profiles(), [])
+
+    def test_sensitive_headers_of_app(self):
+        app = self.make_app(
+            profile_threshold=0, sensitive_headers=['X-Token']
+        )
+
+        app.dispatch('/path/', 'GET', headers={'X-Token': 'secret'})
+
+        info = [f for f in self.get_profiles() if f.endswith('.json')][0]
+        with open(os.path.join(self.directory, info)) as f:
+            info = json.load(f)
+        self.assertEqual(info['request']['headers'], {'X-Token': '***'})
+
+    def test_concurrent_request_not_profiled(self):
+        app = self.make_app(profile_threshold=0)
+
+        with mock.patch.object(profiler, '_lock') as lock:
+            lock.acquire.return_value = False
+            result = app.dispatch('/path/', 'GET')
+
+        self.assertEqual(result, ('result', 200, {}))
+        self.assertEqual(self.get_profiles(), [])
+
+    def test_other_profiler_active(self):
+        app = self.make_app(profile_threshold=0)
+
+        with mock.patch('cProfile.Profile') as profile:
+            profile.return_value.enable.side_effect = ValueError()
+            result = app.dispatch('/path/', 'GET')
+
+        self.assertEqual(result, ('result', 200, {}))
+        self.assertEqual(self.get_profiles(), [])
+        self.assertFalse(profiler._lock.locked())
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_laps(self):
+        trace = lib.Trace()
+        trace.lap('first')
+        trace.lap('second')
+
+        self.assertEqual(list(trace.timings), ['first', 'second'])
+        self.assertAlmostEqual(trace.elapsed, sum(trace.timings.values()))
+
+    def test_sanitise_headers(self):
+        headers = lib.sanitise_headers(
+            {'cookie': 'secret', 'Host': 'example.com'}
+        )
+
+        self.assertEqual(headers, {'cookie': '***', 'Host': 'example.com'})
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import base
+from .. import replay
+from .. import resource
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'recording.ndjson')
+
+        class Resource(object):
+            _name = 'Resource'
+
+            @resource.GET
+            def func(self, **query):
+                return 'result'
+
+            @resource.POST(path='/item', inject_body='body')
+            def create(self, body):
+                return body
+
+        self.resource = Resource
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_app(self, **config):
+        app = base.App(**config)
+        app.add('/path', self.resource)
+        return app
+
+    def test_record(self):
+        app = self.make_app(record=self.path)
+
+        app.dispatch(
+            '/path/', 'GET', query={'q': 'text'},
+            headers={'Authorization': 'secret'}
+        )
+        app.dispatch('/path/item', 'POST', body={'name': 'item'})
+        app.dispatch('/other', 'GET')
+        app.recorder.close()
+
+        records = replay.load(self.path)
+        self.assertEqual(
+            [r['endpoint'] for r in records],
+            ['Resource#func', 'Resource#create', None]
+        )
+        self.assertEqual([r['status'] for r in records], [200, 201, 404])
+        self.assertEqual(records[0]['query'], {'q': 'text'})
+        self.assertEqual(records[0]['headers'], {'Authorization': '***'})
+        self.assertEqual(records[1]['body'], {'name': 'item'})
+        self.assertGreater(records[0]['latency'], 0)
+
+    def test_record_sampled(self):
+        app = self.make_app(record=self.path, record_rate=0)
+
+        app.dispatch('/path/', 'GET')
+        app.recorder.close()
+
+        self.assertEqual(replay.load(self.path), [])
+
+    def test_replay_app(self):
+        records = [
+            {'path': '/path/', 'method': 'GET', 'time': 0},
+            {'path': '/path/item', 'method': 'POST', 'body': {}, 'time': 0},
+            {'path': '/path/', 'method': 'GET', 'time': 0},
+        ]
+
+        report = replay.replay(self.make_app(), records, concurrency=2)
+
+        self.assertEqual(report.total, 3)
+        self.assertEqual(len(report.latencies['Resource#func']), 2)
+        self.assertEqual(
+            dict(report.statuses['Resource#create']), {201: 1}
+        )
+        self.assertGreater(report.throughput, 0)
+        self.assertIn('Resource#func: count=2', report.format())
+
+    def test_replay_wsgi(self):
+        received = []
+
+        def wsgi(environ, start_response):
+            received.append(
+                (environ['PATH_INFO'], environ['QUERY_STRING'])
+            )
+            start_response('204 No Content', [])
+            return []
+
+        with open(self.path, 'w') as f:
+            f.write(json.dumps({
+                'path': '/path/', 'method': 'GET', 'query': {'q': 'a'},
+                'endpoint': 'Resource#func', 'time': 10
+            }) + '\n')
+
+        report = replay.replay(wsgi, self.path, rate=1.0)
+
+        self.assertEqual(received, [('/path/', 'q=a')])
+        self.assertEqual(dict(report.statuses['Resource#func']), {204: 1})
+
+    def test_replay_errors(self):
+        def wsgi(environ, start_response):
+            if environ['PATH_INFO'] == '/fail':
+                raise RuntimeError('failed')
+            start_response('200 OK', [])
+            return []
+
+        records = [
+            {'path': '/fail', 'method': 'GET', 'endpoint': 'fail'},
+            {'path': '/path/', 'method': 'GET', 'endpoint': 'ok'},
+            {'path': '/fail', 'method': 'GET', 'endpoint': 'fail'},
+        ]
+
+        report = replay.replay(wsgi, records)
+
+        self.assertEqual(report.total, 1)
+        self.assertEqual(report.failed, 2)
+        self.assertEqual(dict(report.errors['fail']), {'RuntimeError': 2})
+        self.assertIn('errors: 2', report.format())
+        self.assertIn("fail: errors={'RuntimeError': 2}", report.format())
+
+    def test_record_sensitive_headers_of_app(self):
+        app = self.make_app(record=self.path, sensitive_headers=['X-Token'])
+
+        app.dispatch('/path/', 'GET', headers={'X-Token': 'secret'})
+        app.recorder.close()
+
+        records = replay.load(self.path)
+        self.assertEqual(records[0]['headers'], {'X-Token': '***'})
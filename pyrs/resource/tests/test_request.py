@@ -111,6 +111,27 @@ class TestBuildKwargs(unittest.TestCase):
         kwargs = req.build()
         self.assertEqual(kwargs, {'user': {'name': 'Name of user'}})
 
+    def test_injecting_fields(self):
+        class MySchema(schema.Object):
+            num = schema.Integer()
+            text = schema.String()
+
+        req = request.Request(
+            opts=dict(inject_fields=True, response=MySchema),
+            query=dict(fields='text', limit='5'),
+        )
+        kwargs = req.build()
+        self.assertEqual(kwargs, {'fields': ('text',), 'limit': '5'})
+
+    def test_fields_kept_without_projectable_response(self):
+        req = request.Request(
+            opts=dict(),
+            query=dict(fields='text'),
+        )
+        kwargs = req.build()
+        self.assertIsNone(req.fields)
+        self.assertEqual(kwargs, {'fields': 'text'})
+
 
 class TestInjection(unittest.TestCase):
 
@@ -1,7 +1,12 @@
+import datetime
+import tempfile
 import unittest
 
 from pyrs import schema
+import jsonschema
+from testfixtures import LogCapture
 
+from .. import lib
 from .. import response
 
 
@@ -30,6 +35,17 @@ class TestResponse(unittest.TestCase):
 
 class TestCustomProcessor(unittest.TestCase):
 
+    def test_overridden_dump(self):
+        class MySchema(schema.Object):
+            num = schema.Integer()
+
+            def dump(self, obj):
+                return 'custom'
+
+        res = response.Response({'num': 1}, opts={'response': MySchema})
+
+        self.assertEqual(res.build()[0], 'custom')
+
     def test_function(self):
         def proc(content, status, headers):
             return str(content), 201, {'X-Test': 'test'}
@@ -94,3 +110,253 @@ class TestBuildContent(unittest.TestCase):
                 {'Content-Type': 'application/json', 'X-Test': 'hello'}
             )
         )
+
+
+class TestValidation(unittest.TestCase):
+
+    def setUp(self):
+        class MySchema(schema.Object):
+            num = schema.Integer()
+
+        self.schema = MySchema
+
+    def make_response(self, content, mode, rate=1.0):
+        app = lib.get_config({
+            'response_validation': mode,
+            'response_validation_rate': rate,
+        })
+        return response.Response(
+            content, app=app, opts={'response': self.schema, 'name': 'func'}
+        )
+
+    def test_full(self):
+        res = self.make_response({'num': 'invalid'}, 'full')
+
+        with self.assertRaises(jsonschema.exceptions.ValidationError):
+            res.build()
+
+    def test_off(self):
+        res = self.make_response({'num': 'invalid'}, 'off')
+
+        self.assertEqual(res.build()[0], '{"num": "invalid"}')
+
+    def test_off_encodes_as_dump(self):
+        content = {
+            'num': 1,
+            'at': datetime.datetime(2020, 1, 2, 3, 4, 5),
+            'day': datetime.date(2020, 1, 2),
+            'took': datetime.timedelta(seconds=1.5),
+        }
+
+        self.assertEqual(
+            self.make_response(dict(content), 'off').build()[0],
+            self.make_response(dict(content), 'full').build()[0],
+        )
+
+    def test_sampled_logs_violation(self):
+        res = self.make_response({'num': 'invalid'}, 'sampled')
+
+        with LogCapture() as logs:
+            content, status, headers = res.build()
+
+        self.assertEqual(content, '{"num": "invalid"}')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('func', logs.records[0].getMessage())
+
+    def test_sampled_skipped(self):
+        res = self.make_response({'num': 'invalid'}, 'sampled', rate=0)
+
+        with LogCapture() as logs:
+            content, status, headers = res.build()
+
+        self.assertEqual(content, '{"num": "invalid"}')
+        self.assertEqual(len(logs.records), 0)
+
+    def test_endpoint_option(self):
+        res = response.Response(
+            {'num': 'invalid'},
+            opts={'response': self.schema, 'response_validation': 'off'}
+        )
+
+        self.assertEqual(res.build()[0], '{"num": "invalid"}')
+
+
+class TestProjection(unittest.TestCase):
+
+    def setUp(self):
+        class MySchema(schema.Object):
+            num = schema.Integer()
+            text = schema.String(name='label')
+
+        self.schema = MySchema
+
+    def test_parse_fields(self):
+        fields = response.parse_fields(self.schema, 'label, num')
+
+        self.assertEqual(fields, ('num', 'text'))
+
+    def test_parse_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            response.parse_fields(self.schema, 'num,other')
+
+    def test_projection_cached(self):
+        projected = response.project(self.schema, ('num',))
+
+        self.assertIs(projected, response.project(self.schema, ('num',)))
+        self.assertTrue(issubclass(projected, self.schema))
+        self.assertEqual(list(projected._fields), ['num'])
+
+    def test_projection_of_instance(self):
+        processor = self.schema(title='Title')
+        projected = response.project(processor, ('text',))
+
+        self.assertIsInstance(projected, self.schema)
+        self.assertEqual(projected['title'], 'Title')
+        self.assertEqual(
+            projected.dump({'num': 12, 'text': 'hello'}), '{"label": "hello"}'
+        )
+
+    def test_build_projected_content(self):
+        class Request(object):
+            fields = ('num',)
+            local = False
+            page = None
+
+        res = response.Response(
+            {'num': 12, 'text': 'hello'}, opts={'response': self.schema},
+            request=Request()
+        )
+        self.assertEqual(
+            res.build(),
+            ('{"num": 12}', 200, {'Content-Type': 'application/json'})
+        )
+
+
+class TestRawResponse(unittest.TestCase):
+
+    def build(self, content, headers=None, **opts):
+        class Request(object):
+            fields = None
+            local = False
+            page = None
+
+        request = Request()
+        request.headers = headers or {}
+        return response.Response(content, opts=opts, request=request).build()
+
+    def test_content_type_option(self):
+        content, status, headers = self.build(
+            b'raw', content_type='text/plain'
+        )
+
+        self.assertEqual(content, b'raw')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'text/plain')
+        self.assertEqual(headers['Content-Length'], '3')
+
+    def test_buffer_not_copied(self):
+        data = bytearray(b'0123456789')
+        content, status, headers = self.build(data)
+
+        self.assertIs(content, data)
+        self.assertEqual(headers['Content-Type'], 'application/octet-stream')
+
+    def test_range(self):
+        data = memoryview(b'0123456789')
+        content, status, headers = self.build(data, {'range': 'bytes=2-5'})
+
+        self.assertEqual(status, 206)
+        self.assertIsInstance(content, memoryview)
+        self.assertEqual(content.tobytes(), b'2345')
+        self.assertEqual(headers['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(headers['Content-Length'], '4')
+
+    def test_range_not_satisfiable(self):
+        content, status, headers = self.build(
+            bytearray(b'0123'), {'Range': 'bytes=10-20'}
+        )
+
+        self.assertEqual(status, 416)
+        self.assertEqual(headers['Content-Range'], 'bytes */4')
+
+    def test_file_range(self):
+        with tempfile.TemporaryFile() as file:
+            file.write(b'0123456789')
+            file.seek(0)
+            content, status, headers = self.build(file, {'Range': 'bytes=-3'})
+
+            self.assertIsInstance(content, response.FileRange)
+            self.assertEqual(content.fileno(), file.fileno())
+            self.assertEqual(content.tell(), 7)
+            self.assertEqual(b''.join(content), b'789')
+            self.assertEqual(headers['Content-Length'], '3')
+
+
+class TestBuilder(unittest.TestCase):
+
+    def setUp(self):
+        class MySchema(schema.Object):
+            num = schema.Integer()
+
+        self.schema = MySchema
+        self.builder = response.Builder(lib.get_config(), {
+            'response': MySchema, 'status': 201, 'headers': {'X-Test': 'a'}
+        })
+
+    def test_resolved_once(self):
+        first = response.Response({'num': 1}, builder=self.builder)
+        second = response.Response({'num': 2}, builder=self.builder)
+
+        self.assertIsInstance(self.builder.processor, self.schema)
+        self.assertIs(first.processor, second.processor)
+        self.assertEqual(
+            second.build(),
+            ('{"num": 2}', 201, {
+                'X-Test': 'a', 'Content-Type': 'application/json'
+            })
+        )
+
+    def test_headers_template_not_changed(self):
+        res = response.Response(
+            ({'num': 1}, {'X-Other': 'b'}), builder=self.builder
+        )
+        res.build()
+
+        self.assertEqual(self.builder.headers, {'X-Test': 'a'})
+
+    def test_headers_copied_per_response(self):
+        first = response.Response({'num': 1}, builder=self.builder)
+        second = response.Response({'num': 2}, builder=self.builder)
+        first.headers['X-Hook'] = 'b'
+
+        self.assertNotIn('X-Hook', second.build()[2])
+        self.assertEqual(self.builder.headers, {'X-Test': 'a'})
+
+    def test_returns_content(self):
+        builder = response.Builder(lib.get_config(), {'returns': 'content'})
+
+        self.assertEqual(
+            response.Response(('a', 202), builder=builder).build(),
+            (('a', 202), 200, {})
+        )
+
+    def test_returns_tuple(self):
+        builder = response.Builder(lib.get_config(), {'returns': 'tuple'})
+
+        self.assertEqual(
+            response.Response(('a', 202), builder=builder).build(),
+            ('a', 202, {})
+        )
+
+    def test_unpack(self):
+        headers = {}
+
+        self.assertEqual(
+            response.unpack(('a', 202, {'X': '1'}), 200, headers), ('a', 202)
+        )
+        self.assertEqual(headers, {'X': '1'})
+        self.assertEqual(response.unpack(('a', 204), 200, {}), ('a', 204))
+        self.assertEqual(
+            response.unpack(('a', 'b'), 200, {}), (('a', 'b'), 200)
+        )
@@ -0,0 +1,86 @@
+import unittest
+
+import werkzeug
+
+from .. import routing
+
+
+class TestRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.paths = [
+            '/<name>', '/users', '/users/<int:pk>', '/users/me', '/',
+            '/<path:rest>', '/users/<int:pk>/groups',
+        ]
+
+    def make_rules(self):
+        rules = werkzeug.routing.Map()
+        for index, path in enumerate(self.paths):
+            rules = routing.add_rule(
+                rules, werkzeug.routing.Rule(path, endpoint='e%s' % index)
+            )
+        return rules
+
+    def test_matched_as_werkzeug(self):
+        expected = werkzeug.routing.Map([
+            werkzeug.routing.Rule(path, endpoint='e%s' % index)
+            for index, path in enumerate(self.paths)
+        ]).bind('localhost')
+        adapter = self.make_rules().bind('localhost')
+
+        for path in ['/', '/a', '/users', '/users/1', '/users/me',
+                     '/users/1/groups', '/a/b/c']:
+            self.assertEqual(adapter.match(path), expected.match(path))
+
+    def test_options_kept(self):
+        rules = werkzeug.routing.Map(host_matching=True, strict_slashes=False)
+
+        extended = routing.add_rule(
+            rules, werkzeug.routing.Rule(
+                '/path', endpoint='e', host='<tenant>.example.com'
+            )
+        )
+
+        self.assertTrue(extended.host_matching)
+        self.assertFalse(extended.strict_slashes)
+        self.assertEqual(
+            extended.bind('acme.example.com').match('/path'),
+            ('e', {'tenant': 'acme'})
+        )
+
+    def test_copy_on_write(self):
+        rules = self.make_rules()
+        adapter = rules.bind('localhost')
+
+        extended = routing.add_rule(
+            rules, werkzeug.routing.Rule('/other', endpoint='other')
+        )
+
+        self.assertEqual(len(list(rules.iter_rules())), len(self.paths))
+        self.assertEqual(
+            len(list(extended.iter_rules())), len(self.paths) + 1
+        )
+        self.assertEqual(adapter.match('/other'), ('e0', {'name': 'other'}))
+        self.assertEqual(
+            extended.bind('localhost').match('/other'), ('other', {})
+        )
+
+    def test_remove(self):
+        rules = self.make_rules()
+
+        removed = routing.remove_endpoint(rules, 'e1')
+
+        self.assertEqual(
+            removed.bind('localhost').match('/users'),
+            ('e0', {'name': 'users'})
+        )
+        self.assertEqual(
+            rules.bind('localhost').match('/users'), ('e1', {})
+        )
+        self.assertNotIn(
+            'e1', [rule.endpoint for rule in removed.iter_rules()]
+        )
+
+    def test_remove_unknown(self):
+        with self.assertRaises(KeyError):
+            routing.remove_endpoint(self.make_rules(), 'unknown')
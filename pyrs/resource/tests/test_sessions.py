@@ -0,0 +1,119 @@
+import unittest
+
+import mock
+
+from .. import base
+from .. import resource
+from .. import sessions
+from .. import store
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.store = store.MemoryStore()
+        self.store.set('key', {'user': 'test'})
+
+    def test_lazy(self):
+        backend = mock.Mock(wraps=self.store)
+        session = sessions.Session(backend, 'key')
+
+        self.assertFalse(session.loaded)
+        self.assertFalse(backend.get.called)
+        self.assertEqual(session['user'], 'test')
+        self.assertTrue(session.loaded)
+        backend.get.assert_called_once_with('key')
+
+    def test_not_saved_if_not_modified(self):
+        backend = mock.Mock(wraps=self.store)
+        session = sessions.Session(backend, 'key')
+        session.get('user')
+
+        self.assertFalse(session.save())
+        self.assertFalse(backend.set.called)
+
+    def test_saved_if_modified(self):
+        session = sessions.Session(self.store, 'key')
+        session['role'] = 'admin'
+
+        self.assertFalse(session.save())
+        self.assertEqual(
+            self.store.get('key'), {'user': 'test', 'role': 'admin'}
+        )
+
+    def test_new_session(self):
+        session = sessions.Session(self.store)
+        session['user'] = 'other'
+
+        self.assertTrue(session.save())
+        self.assertEqual(self.store.get(session.key), {'user': 'other'})
+        self.assertIn(session.key, session.get_cookie('session'))
+
+    def test_unknown_key_replaced(self):
+        session = sessions.Session(self.store, 'forged')
+        session['user'] = 'other'
+
+        self.assertTrue(session.save())
+        self.assertNotEqual(session.key, 'forged')
+        self.assertIsNone(self.store.get('forged'))
+        self.assertEqual(self.store.get(session.key), {'user': 'other'})
+        self.assertIn(session.key, session.get_cookie('session'))
+
+    def test_emptied_session_deleted(self):
+        session = sessions.Session(self.store, 'key')
+        session.clear()
+
+        self.assertTrue(session.save())
+        self.assertIsNone(session.key)
+        self.assertIsNone(self.store.get('key'))
+        self.assertIn('Max-Age=0', session.get_cookie('session'))
+
+
+class TestAppSession(unittest.TestCase):
+
+    def setUp(self):
+        @resource.POST(inject_session=True)
+        def login(session):
+            session['user'] = 'test'
+
+        @resource.GET(inject_session=True)
+        def whoami(session):
+            return session.get('user')
+
+        @resource.GET
+        def ping():
+            return 'pong'
+
+        self.store = mock.Mock(wraps=store.MemoryStore())
+        self.app = base.App(session_store=self.store, session_local_size=0)
+        self.app.add('/login', login)
+        self.app.add('/whoami', whoami)
+        self.app.add('/ping', ping)
+
+    def test_session(self):
+        unused, unused, headers = self.app.dispatch('/login', 'POST')
+        key = headers['Set-Cookie'].split(';')[0].split('=')[1]
+        content, unused, headers = self.app.dispatch(
+            '/whoami', 'GET', cookies={'session': key}
+        )
+
+        self.assertEqual(content, 'test')
+        self.assertNotIn('Set-Cookie', headers)
+
+    def test_forged_id_not_used(self):
+        unused, unused, headers = self.app.dispatch(
+            '/login', 'POST', cookies={'session': 'forged'}
+        )
+
+        self.assertNotIn('forged', headers['Set-Cookie'])
+        self.assertIsNone(self.store.get('forged'))
+
+    def test_not_loaded_if_not_used(self):
+        self.app.dispatch('/ping', 'GET', cookies={'session': 'key'})
+
+        self.assertFalse(self.store.get.called)
+
+    def test_local_tier(self):
+        app = base.App(session_store=self.store)
+
+        self.assertIsInstance(app.session_store, store.TieredStore)
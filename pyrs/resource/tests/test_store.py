@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from .. import lib
+from .. import store
+
+
+class TestLRU(unittest.TestCase):
+
+    def test_eviction(self):
+        cache = lib.LRU(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        cache = lib.LRU(2, ttl=0.01)
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+
+
+class StoreTestMixin(object):
+
+    def test_get_set(self):
+        self.store.set('key', ('content', 200, {'X-Test': 'test'}))
+
+        self.assertEqual(
+            self.store.get('key'), ('content', 200, {'X-Test': 'test'})
+        )
+        self.assertEqual(self.store.get('other', 'default'), 'default')
+
+    def test_delete(self):
+        self.store.set('key', 'value')
+        self.store.delete('key')
+
+        self.assertIsNone(self.store.get('key'))
+
+
+class TestMemoryStore(StoreTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.store = store.MemoryStore()
+
+
+class TestSQLiteStore(StoreTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'store.db')
+        self.store = store.SQLiteStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_shared(self):
+        self.store.set('key', 'value')
+
+        other = store.SQLiteStore(self.path)
+        self.assertEqual(other.get('key'), 'value')
+        other.close()
+
+    def test_ttl(self):
+        expiring = store.SQLiteStore(self.path, table='expiring', ttl=-1)
+        expiring.set('key', 'value')
+
+        self.assertIsNone(expiring.get('key'))
+        expiring.close()
+
+
+class TestFileStore(StoreTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = store.FileStore(os.path.join(self.directory, 'files'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ttl(self):
+        expiring = store.FileStore(self.store.directory, ttl=-1)
+        expiring.set('key', 'value')
+
+        self.assertIsNone(expiring.get('key'))
+        self.assertEqual(os.listdir(self.store.directory), [])
+
+
+class TestTieredStore(StoreTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.backend = store.MemoryStore()
+        self.store = store.TieredStore(self.backend, 2)
+
+    def test_local_tier(self):
+        self.backend.set('key', 'value')
+
+        self.assertEqual(self.store.get('key'), 'value')
+        self.backend.delete('key')
+        self.assertEqual(self.store.get('key'), 'value')
+
+    def test_local_tier_expires(self):
+        tiered = store.TieredStore(self.backend, 2, ttl=0.01)
+        tiered.set('key', 'value')
+        self.backend.set('key', 'changed')
+        time.sleep(0.02)
+
+        self.assertEqual(tiered.get('key'), 'changed')
@@ -0,0 +1,89 @@
+import threading
+import unittest
+
+from testfixtures import LogCapture
+
+from .. import base
+from .. import resource
+from .. import tasks
+
+
+class TestTaskPool(unittest.TestCase):
+
+    def test_submit(self):
+        pool = tasks.TaskPool(workers=2)
+        done = []
+
+        for i in range(5):
+            self.assertTrue(pool.submit(done.append, i))
+        pool.shutdown()
+
+        self.assertEqual(sorted(done), [0, 1, 2, 3, 4])
+
+    def test_failure_logged(self):
+        pool = tasks.TaskPool(workers=1)
+
+        def fail():
+            raise ValueError('failed')
+
+        with LogCapture() as logs:
+            pool.submit(fail)
+            pool.shutdown()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsInstance(logs.records[0].exc_info[1], ValueError)
+
+    def test_dropped_when_full(self):
+        pool = tasks.TaskPool(workers=1, queue_size=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        with LogCapture():
+            pool.submit(block)
+            started.wait()
+            self.assertTrue(pool.submit(block))
+            self.assertFalse(pool.submit(block))
+        release.set()
+        pool.shutdown()
+
+        self.assertEqual(pool.dropped, 1)
+
+
+class TestScheduledTasks(unittest.TestCase):
+
+    def setUp(self):
+        done = []
+
+        class Resource(object):
+
+            @resource.GET(inject_tasks=True)
+            def func(self, tasks):
+                tasks.add(done.append, 'task')
+                return 'result'
+
+            @resource.GET(path='/fail', inject_tasks=True)
+            def fail(self, tasks):
+                tasks.add(done.append, 'task')
+                raise ValueError()
+
+        self.done = done
+        self.app = base.App()
+        self.app.add('/path', Resource)
+
+    def test_executed_after_response(self):
+        content, status, headers = self.app.dispatch('/path/', 'GET')
+        self.app.close()
+
+        self.assertEqual(content, 'result')
+        self.assertEqual(self.done, ['task'])
+
+    def test_not_executed_on_error(self):
+        content, status, headers = self.app.dispatch('/path/fail', 'GET')
+        self.app.close()
+
+        self.assertEqual(status, 500)
+        self.assertEqual(self.done, [])
@@ -0,0 +1,67 @@
+import json
+import tempfile
+import unittest
+
+from werkzeug import test
+from werkzeug import wrappers
+
+from .. import base
+from .. import resource
+from .. import wsgi
+
+
+class TestApplication(unittest.TestCase):
+
+    def setUp(self):
+        self.file = tempfile.TemporaryFile()
+        self.file.write(b'0123456789')
+        self.file.seek(0)
+
+        @resource.GET
+        def download():
+            return self.file
+
+        @resource.POST(inject_body='body', inject_query='query')
+        def echo(body, query):
+            return {'body': body, 'query': query}
+
+        self.app = base.App()
+        self.app.add('/download', download)
+        self.app.add('/echo', echo)
+        self.client = test.Client(
+            wsgi.Application(self.app), wrappers.Response
+        )
+
+    def tearDown(self):
+        self.file.close()
+
+    def test_file_response(self):
+        res = self.client.get('/download', headers={'Range': 'bytes=3-4'})
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res.data, b'34')
+        self.assertEqual(res.headers['Content-Range'], 'bytes 3-4/10')
+
+    def test_json_body(self):
+        res = self.client.post(
+            '/echo?a=1&b=2&b=3', data='{"x": 1}',
+            content_type='application/json'
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(json.loads(res.data.decode('utf-8')), {
+            'body': {'x': 1}, 'query': {'a': '1', 'b': ['2', '3']}
+        })
+
+    def test_malformed_json_body(self):
+        res = self.client.post(
+            '/echo', data='{', content_type='application/json'
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_not_found(self):
+        res = self.client.get('/missing')
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(res.status, '404 Not Found')
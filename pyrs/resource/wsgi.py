@@ -0,0 +1,105 @@
+"""
+WSGI interface of the application.
+
+.. code:: python
+
+    application = wsgi.Application(App())
+
+The raw responses (see :py:meth:`.response.Response.build_raw`) are passed
+to the server untouched: files through the `wsgi.file_wrapper` of the server
+(which can use `sendfile`), buffers as they are.
+"""
+import json
+import mmap
+
+import six
+import werkzeug.http
+import werkzeug.wrappers
+
+from . import errors
+from . import response
+
+
+class Application(object):
+    """
+    WSGI application dispatches the requests through the
+    :py:class:`.base.App`
+
+    :param app: The application
+    :param int block_size: Block size of the file responses
+    """
+
+    def __init__(self, app, block_size=64 * 1024):
+        self.app = app
+        self.block_size = block_size
+
+    def __call__(self, environ, start_response):
+        req = werkzeug.wrappers.Request(environ)
+        try:
+            body = self.get_body(req)
+        except ValueError as ex:
+            content, status, headers = errors.ErrorResponse(
+                errors.InputValidationError(cause=ex), self.app
+            ).build()
+        else:
+            content, status, headers = self.app.dispatch(
+                req.path, req.method, query=self.get_query(req), body=body,
+                headers=dict(req.headers.items()),
+                cookies=dict(req.cookies),
+            )
+        headers = dict(headers)
+        body = self.make_body(content, headers, environ)
+        start_response(
+            '%s %s' % (
+                status, werkzeug.http.HTTP_STATUS_CODES.get(status, 'UNKNOWN')
+            ),
+            [(k, str(v)) for k, v in headers.items()]
+        )
+        return body
+
+    def get_query(self, req):
+        """
+        Gives back the query as dictionary, repeated parameters as lists
+        """
+        return dict(
+            (k, v[0] if len(v) == 1 else v)
+            for k, v in req.args.to_dict(flat=False).items()
+        )
+
+    def get_body(self, req):
+        """
+        Gives back the decoded JSON or form body, raises `ValueError` if the
+        JSON body is malformed
+        """
+        if req.mimetype == 'application/json' or \
+                req.mimetype.endswith('+json'):
+            data = req.get_data(as_text=True)
+            return json.loads(data) if data else None
+        if req.form:
+            return req.form.to_dict()
+        return None
+
+    def make_body(self, content, headers, environ):
+        """
+        Gives back the WSGI iterable of the content
+        """
+        if hasattr(content, 'read'):
+            wrapper = environ.get('wsgi.file_wrapper')
+            if wrapper is not None and hasattr(content, 'fileno'):
+                return wrapper(content, self.block_size)
+            if not isinstance(content, response.FileRange):
+                content = response.FileRange(content)
+            return content
+        if isinstance(content, mmap.mmap):
+            return [memoryview(content)]
+        if isinstance(content, (six.binary_type, bytearray, memoryview)):
+            return [content]
+        if content is None:
+            body = b''
+        elif isinstance(content, six.text_type):
+            body = content.encode('utf-8')
+        else:
+            headers.setdefault('Content-Type', 'application/json')
+            body = json.dumps(content).encode('utf-8')
+        headers.setdefault('Content-Length', str(len(body)))
+        return [body]